@@ -0,0 +1,133 @@
+import asyncio, logging, time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Union
+from app.domain.entities import Identity
+from app.domain.ports import AsyncAuthGateway, IdentityNotFoundError, IdentityResult
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class _Entry:
+    value: Union[Identity, IdentityNotFoundError]
+    expires_at: float
+    stale_until: float
+
+class CachingAuthGateway(AsyncAuthGateway):
+    """Cache TTL + LRU na frente de outro ``AsyncAuthGateway``.
+
+    Clientes inexistentes (404) ficam em cache negativo por ``negative_ttl``.
+    Uma identidade vencida há menos de ``stale_ttl`` ainda é servida enquanto
+    uma única revalidação roda em segundo plano (stale-while-revalidate).
+    """
+
+    def __init__(
+        self,
+        inner: AsyncAuthGateway,
+        *,
+        max_size: int = 10000,
+        ttl: float = 300.0,
+        negative_ttl: float = 30.0,
+        stale_ttl: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._inner = inner
+        self._max_size = max_size
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._refreshing: dict[int, asyncio.Task] = {}
+        self._stats = {"hits": 0, "misses": 0, "stale_hits": 0, "negative_hits": 0, "evictions": 0, "refreshes": 0}
+
+    def stats(self) -> dict:
+        return {**self._stats, "size": len(self._entries)}
+
+    def _lookup(self, user_id: int) -> Optional[Identity]:
+        """Identidade em cache (``None`` = miss); levanta se houver cache negativo."""
+        entry = self._entries.get(user_id)
+        now = self._clock()
+        if entry is None or now >= entry.stale_until:
+            self._stats["misses"] += 1
+            return None
+        self._entries.move_to_end(user_id)
+        if isinstance(entry.value, IdentityNotFoundError):
+            self._stats["negative_hits"] += 1
+            raise IdentityNotFoundError(*entry.value.args)
+        if now < entry.expires_at:
+            self._stats["hits"] += 1
+        else:
+            self._stats["stale_hits"] += 1
+            self._revalidate(user_id)
+        return entry.value
+
+    async def resolve_identity(self, user_id: int) -> Identity:
+        cached = self._lookup(user_id)
+        if cached is not None:
+            return cached
+        return await self._load(user_id)
+
+    async def resolve_identities(self, user_ids: Iterable[int]) -> dict[int, IdentityResult]:
+        ids = list(dict.fromkeys(user_ids))
+        results: dict[int, IdentityResult] = {}
+        misses = []
+        for user_id in ids:
+            try:
+                cached = self._lookup(user_id)
+            except IdentityNotFoundError as e:
+                results[user_id] = e
+                continue
+            if cached is None:
+                misses.append(user_id)
+            else:
+                results[user_id] = cached
+        if misses:
+            for user_id, value in (await self._inner.resolve_identities(misses)).items():
+                if isinstance(value, Identity):
+                    self._store(user_id, value, self._ttl, self._stale_ttl)
+                elif isinstance(value, IdentityNotFoundError):
+                    self._store(user_id, value, self._negative_ttl, 0.0)
+                results[user_id] = value
+        return {user_id: results[user_id] for user_id in ids}
+
+    async def _load(self, user_id: int) -> Identity:
+        try:
+            identity = await self._inner.resolve_identity(user_id)
+        except IdentityNotFoundError as e:
+            self._store(user_id, e, self._negative_ttl, 0.0)
+            raise
+        self._store(user_id, identity, self._ttl, self._stale_ttl)
+        return identity
+
+    def _store(self, user_id: int, value, ttl: float, stale_ttl: float) -> None:
+        now = self._clock()
+        self._entries[user_id] = _Entry(value=value, expires_at=now + ttl, stale_until=now + ttl + stale_ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _revalidate(self, user_id: int) -> None:
+        if user_id in self._refreshing:
+            return
+        self._stats["refreshes"] += 1
+        task = asyncio.create_task(self._refresh(user_id))
+        self._refreshing[user_id] = task
+
+    async def _refresh(self, user_id: int) -> None:
+        try:
+            await self._load(user_id)
+        except IdentityNotFoundError:
+            pass
+        except Exception as e:
+            # mantém a entrada antiga; a próxima leitura tenta de novo
+            logger.warning("revalidação da identidade %s falhou: %s", user_id, e)
+        finally:
+            self._refreshing.pop(user_id, None)
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        if user_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(user_id, None)
@@ -1,30 +1,149 @@
-import json
-import urllib.request
-from urllib.error import HTTPError
-from dataclasses import dataclass
+import asyncio
+import importlib.util
+import threading
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+import httpx
 from infra.settings import settings
 from app.domain.entities import Identity
-from app.domain.ports import AuthGateway
+from app.domain.ports import AuthGateway, AsyncAuthGateway, IdentityNotFoundError, IdentityResult
+
+def _client_url(user_id) -> str:
+    return f"{settings.AUTH_SERVICE_URL.rstrip('/')}/api/client/{user_id}"
+
+def _bulk_url() -> str:
+    return f"{settings.AUTH_SERVICE_URL.rstrip('/')}/{settings.AUTH_BULK_PATH.lstrip('/')}"
+
+def _client_options() -> dict:
+    # h2 é opcional: sem o pacote, o cliente segue em HTTP/1.1 com keep-alive
+    http2 = settings.AUTH_HTTP2 and importlib.util.find_spec("h2") is not None
+    return dict(
+        headers={"Accept": "application/json"},
+        timeout=httpx.Timeout(settings.AUTH_READ_TIMEOUT, connect=settings.AUTH_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=settings.AUTH_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.AUTH_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.AUTH_POOL_KEEPALIVE_EXPIRY,
+        ),
+        http2=http2,
+    )
+
+def _to_identity(data: Optional[dict]) -> Identity:
+    email = (data or {}).get("email")
+    name = (data or {}).get("name") or "cliente"
+    if not email:
+        raise ValueError("Auth não retornou e-mail")
+    return Identity(email=email, name=name, locale=(data or {}).get("locale"))
+
+def _parse(r: httpx.Response) -> Identity:
+    if r.status_code == 404:
+        raise IdentityNotFoundError("Cliente não encontrado")
+    r.raise_for_status()
+    return _to_identity(r.json())
 
 @dataclass
 class HttpAuthGateway(AuthGateway):
+    client: Optional[httpx.Client] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def _http(self) -> httpx.Client:
+        if self.client is None:
+            with self._lock:
+                if self.client is None:
+                    self.client = httpx.Client(**_client_options())
+        return self.client
+
     def resolve_identity(self, user_id: str) -> Identity:
-        url = f"{settings.AUTH_SERVICE_URL.rstrip('/')}/api/client/{user_id}"
-        req = urllib.request.Request(
-            url=url,
-            method="GET",
-            headers={"Accept": "application/json"},
-        )
+        return _parse(self._http().get(_client_url(user_id)))
+
+    def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
+@dataclass
+class AsyncHttpAuthGateway(AsyncAuthGateway):
+    client: Optional[httpx.AsyncClient] = None
+    bulk_supported: Optional[bool] = None  # None: ainda não testado contra o serviço
+
+    def _http(self) -> httpx.AsyncClient:
+        if self.client is None:
+            self.client = httpx.AsyncClient(**_client_options())
+        return self.client
+
+    def start(self) -> None:
+        self._http()
+
+    async def resolve_identity(self, user_id: int) -> Identity:
+        return _parse(await self._http().get(_client_url(user_id)))
+
+    async def resolve_identities(self, user_ids: Iterable[int]) -> dict[int, IdentityResult]:
+        ids = list(dict.fromkeys(user_ids))
+        results: dict[int, IdentityResult] = {}
+        if settings.AUTH_BULK_PATH and self.bulk_supported is not False:
+            size = settings.AUTH_BULK_MAX_IDS
+            for chunk in (ids[i:i + size] for i in range(0, len(ids), size)):
+                found = await self._fetch_bulk(chunk)
+                if found is None:
+                    break
+                results.update(found)
+        pending = [uid for uid in ids if uid not in results]
+        if pending:
+            results.update(await self._fan_out(pending))
+        return {uid: results[uid] for uid in ids}
+
+    async def _fetch_bulk(self, ids: list[int]) -> Optional[dict[int, IdentityResult]]:
         try:
-            with urllib.request.urlopen(req, timeout=settings.AUTH_TIMEOUT) as r:
-                data = json.loads(r.read().decode("utf-8"))
-        except HTTPError as e:
-            if e.code == 404:
-                raise ValueError("Cliente não encontrado")
-            raise
-
-        email = (data or {}).get("email")
-        name = (data or {}).get("name") or "cliente"
-        if not email:
-            raise ValueError("Auth não retornou e-mail")
-        return Identity(email=email, name=name)
+            r = await self._http().post(_bulk_url(), json={"ids": ids})
+        except httpx.HTTPError as e:
+            return {uid: e for uid in ids}
+        if r.status_code in (404, 405, 501):
+            # o serviço de clientes não oferece o endpoint em lote
+            self.bulk_supported = False
+            return None
+        if r.is_error:
+            error = httpx.HTTPStatusError(f"Bulk auth falhou: {r.status_code}", request=r.request, response=r)
+            return {uid: error for uid in ids}
+        self.bulk_supported = True
+        try:
+            items = r.json() or []
+        except ValueError:
+            items = None
+        if not isinstance(items, list):
+            error = ValueError("Bulk auth retornou resposta inválida")
+            return {uid: error for uid in ids}
+        by_id = {str(item.get("id")): item for item in items if isinstance(item, dict)}
+        # item que não é objeto não diz de quem é: os ids sem resposta não são "não encontrado"
+        malformed = len(by_id) < len(items)
+        results: dict[int, IdentityResult] = {}
+        for uid in ids:
+            item = by_id.get(str(uid))
+            if item is None:
+                results[uid] = (
+                    ValueError("Bulk auth retornou item inválido") if malformed
+                    else IdentityNotFoundError("Cliente não encontrado")
+                )
+                continue
+            try:
+                results[uid] = _to_identity(item)
+            except ValueError as e:
+                results[uid] = e
+        return results
+
+    async def _fan_out(self, ids: list[int]) -> dict[int, IdentityResult]:
+        slots = asyncio.Semaphore(settings.AUTH_BULK_CONCURRENCY)
+
+        async def one(uid: int) -> IdentityResult:
+            async with slots:
+                try:
+                    return await self.resolve_identity(uid)
+                except Exception as e:
+                    return e
+
+        values = await asyncio.gather(*(one(uid) for uid in ids))
+        return dict(zip(ids, values))
+
+    async def aclose(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
@@ -0,0 +1,163 @@
+import threading, time
+from collections import deque
+from typing import Callable, Iterable
+import httpx
+from app.domain.entities import Identity
+from app.domain.ports import AsyncAuthGateway, CircuitOpenError, IdentityResult
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    """Circuit breaker por taxa de falhas numa janela das últimas ``window`` chamadas.
+
+    Fechado, abre quando ao menos ``min_calls`` chamadas da janela deram
+    ``failure_rate`` de falhas. Aberto, recusa tudo com ``CircuitOpenError`` por
+    ``cooldown`` segundos; depois deixa passar ``half_open_calls`` chamadas de
+    teste: se todas derem certo fecha, se uma falhar abre de novo.
+
+    Quem recebe permissão de ``allow`` deve sempre informar o resultado em
+    ``record`` ou devolvê-la com ``release``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        min_calls: int = 10,
+        cooldown: float = 30.0,
+        half_open_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not 0 < failure_rate <= 1:
+            raise ValueError("failure_rate deve estar em (0, 1]")
+        self.name = name
+        self._failure_rate = failure_rate
+        self._min_calls = max(1, min(min_calls, window))
+        self._cooldown = cooldown
+        self._half_open_calls = max(1, half_open_calls)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._calls: deque[bool] = deque(maxlen=window)  # True = falha
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0  # chamadas de teste liberadas no half-open
+        self._successes = 0  # chamadas de teste que deram certo
+        self._counters = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self._cooldown:
+            self._state, self._trials, self._successes = HALF_OPEN, 0, 0
+        return self._state
+
+    def _retry_after(self) -> float:
+        return max(0.0, self._opened_at + self._cooldown - self._clock())
+
+    def allow(self) -> None:
+        """Libera uma chamada ou levanta ``CircuitOpenError``."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._trials < self._half_open_calls:
+                self._trials += 1
+                return
+            self._counters["rejected"] += 1
+            retry_after = self._retry_after() if state == OPEN else min(1.0, self._cooldown)
+        raise CircuitOpenError(f"{self.name} indisponível (circuito aberto)", retry_after)
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            state = self._current_state()
+            if state == HALF_OPEN:
+                if not ok:
+                    self._open()
+                    return
+                self._successes += 1
+                if self._successes >= self._half_open_calls:
+                    self._state = CLOSED
+                    self._calls.clear()
+                return
+            if state == OPEN:
+                return  # resposta atrasada de uma chamada anterior à abertura
+            self._calls.append(not ok)
+            failures = sum(self._calls)
+            if len(self._calls) >= self._min_calls and failures >= self._failure_rate * len(self._calls):
+                self._open()
+
+    def release(self) -> None:
+        """Devolve a permissão de uma chamada que terminou sem dizer nada sobre a dependência."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._trials > self._successes:
+                self._trials -= 1
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._calls.clear()
+        self._counters["opened"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            calls = len(self._calls)
+            failures = sum(self._calls)
+            return {
+                "state": state,
+                "calls": calls,
+                "failure_rate": failures / calls if calls else 0.0,
+                "retry_after": self._retry_after() if state == OPEN else 0.0,
+                **self._counters,
+            }
+
+
+def auth_outage(exc: BaseException) -> bool:
+    """Falha do serviço de clientes (rede, timeout, 5xx); 404 e dados inválidos não contam."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return not isinstance(exc, ValueError)
+
+
+class CircuitBreakerAuthGateway(AsyncAuthGateway):
+    """Falha na hora, sem esperar o timeout, enquanto o serviço de clientes estiver fora."""
+
+    def __init__(self, inner: AsyncAuthGateway, breaker: CircuitBreaker):
+        self._inner = inner
+        self.breaker = breaker
+
+    async def resolve_identity(self, user_id: int) -> Identity:
+        self.breaker.allow()
+        try:
+            identity = await self._inner.resolve_identity(user_id)
+        except Exception as e:
+            self.breaker.record(not auth_outage(e))
+            raise
+        except BaseException:
+            self.breaker.release()  # cancelado: não diz nada sobre o serviço
+            raise
+        self.breaker.record(True)
+        return identity
+
+    async def resolve_identities(self, user_ids: Iterable[int]) -> dict[int, IdentityResult]:
+        ids = list(dict.fromkeys(user_ids))
+        try:
+            self.breaker.allow()
+        except CircuitOpenError as e:
+            return {uid: e for uid in ids}
+        try:
+            results = await self._inner.resolve_identities(ids)
+        except Exception as e:
+            self.breaker.record(not auth_outage(e))
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record(not any(isinstance(v, Exception) and auth_outage(v) for v in results.values()))
+        return results
@@ -1,45 +1,56 @@
+from typing import Sequence
 from app.domain.entities import NotificationInput, Identity, EmailMessage
-from app.domain.ports import EmailComposer
+from app.domain.ports import EmailComposer, AsyncEmailComposer
+from app.adapters.driven.email_templates import EmailTemplates, DEFAULT_ROOT
+from infra.settings import settings
+
+# variáveis disponíveis nos templates, na ordem em que render() as recebe
+TEMPLATE_VARIABLES = ("name", "job_id", "video_url", "error_message")
+# variáveis do template de resumo (digest/); os itens vêm de digest/<status> com TEMPLATE_VARIABLES
+DIGEST_VARIABLES = ("name", "count", "items_text", "items_html")
+
+def _build_templates(variables: tuple[str, ...]) -> EmailTemplates:
+    return EmailTemplates(
+        variables,
+        settings.EMAIL_TEMPLATES_DIR or DEFAULT_ROOT,
+        default_locale=settings.EMAIL_DEFAULT_LOCALE,
+        reload_interval=settings.EMAIL_TEMPLATES_RELOAD_INTERVAL if settings.EMAIL_TEMPLATES_RELOAD_INTERVAL >= 0 else None,
+    )
 
 class DefaultEmailComposer(EmailComposer):
+    """Monta o e-mail a partir dos templates de ``templates/email/<locale>/<status>``."""
+    def __init__(self, templates: EmailTemplates | None = None, digest_templates: EmailTemplates | None = None):
+        self._templates = templates or _build_templates(TEMPLATE_VARIABLES)
+        self._digest_templates = digest_templates or _build_templates(DIGEST_VARIABLES)
+
     def compose(self, data: NotificationInput, identity: Identity) -> EmailMessage:
-        name = identity.name
-        job_id = data.job_id
-
-        if data.status == "success":
-            subject = f"Seu vídeo foi processado (#{job_id})"
-            link_txt = f"Link: {data.video_url}\n" if data.video_url else ""
-            text = (
-                f"Olá, {name}!\n\n"
-                f"Seu vídeo (job {job_id}) foi processado com sucesso.\n"
-                f"{link_txt}\nObrigado por usar nosso serviço."
-            )
-            html_link = f'<p><a href="{data.video_url}">Abrir vídeo</a></p>' if data.video_url else ""
-            html = (
-                f"<p>Olá, <strong>{name}</strong>!</p>"
-                f"<p>Seu vídeo (job <strong>{job_id}</strong>) foi processado com sucesso.</p>"
-                f"{html_link}"
-                f"<p>Obrigado por usar nosso serviço.</p>"
-            )
-        else:
-            subject = f"Falha ao processar seu vídeo (#{job_id})"
-            detail = data.error_message or "não informado."
-            text = (
-                f"Olá, {name}!\n\n"
-                f"Ocorreu um erro ao processar seu vídeo (job {job_id}).\n"
-                f"Detalhes: {detail}\n\n"
-                f"Tente novamente mais tarde."
-            )
-            html = (
-                f"<p>Olá, <strong>{name}</strong>!</p>"
-                f"<p><strong>Falha</strong> ao processar seu vídeo (job <strong>{job_id}</strong>).</p>"
-                f"<p>Detalhes: {detail}</p>"
-                f"<p>Tente novamente mais tarde.</p>"
+        template = self._templates.get(data.status, identity.locale)
+        subject, text, html = template.render(
+            identity.name, data.job_id, data.video_url or "", data.error_message or ""
+        )
+        return EmailMessage(to=identity.email, subject=subject, text=text, html=html)
+
+    def compose_digest(self, items: Sequence[NotificationInput], identity: Identity) -> EmailMessage:
+        """Cada item vira uma linha (assunto do item) com detalhes (texto) e um ``<li>`` (HTML)."""
+        texts, htmls = [], []
+        for data in items:
+            template = self._templates.get(f"digest/{data.status}", identity.locale)
+            title, details, html = template.render(
+                identity.name, data.job_id, data.video_url or "", data.error_message or ""
             )
+            texts.append(f"- {title}\n  {details}" if details else f"- {title}")
+            htmls.append(html)
+        template = self._digest_templates.get("digest", identity.locale)
+        subject, text, html = template.render(identity.name, str(len(items)), "\n".join(texts), "\n".join(htmls))
+        return EmailMessage(to=identity.email, subject=subject, text=text, html=html)
 
-        return EmailMessage(
-            to=identity.email,
-            subject=subject,
-            text=text.strip(),
-            html=html.strip(),
-        )
+class AsyncDefaultEmailComposer(AsyncEmailComposer):
+    """Composição é só CPU: roda no próprio loop, sem thread."""
+    def __init__(self, composer: EmailComposer | None = None):
+        self._composer = composer or DefaultEmailComposer()
+
+    async def compose(self, data: NotificationInput, identity: Identity) -> EmailMessage:
+        return self._composer.compose(data, identity)
+
+    async def compose_digest(self, items: Sequence[NotificationInput], identity: Identity) -> EmailMessage:
+        return self._composer.compose_digest(items, identity)
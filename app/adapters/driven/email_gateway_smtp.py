@@ -1,75 +1,467 @@
-import smtplib, socket, time
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import Optional
+import asyncio, logging, smtplib, socket, threading, time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Sequence
 from infra.settings import settings
+from infra import metrics
 from app.domain.entities import EmailMessage
-from app.domain.ports import EmailGateway
+from app.domain.ports import EmailGateway, AsyncEmailGateway, CircuitOpenError
+from app.adapters.driven.smtp_pool import SmtpConnectionPool, PooledConnection, PoolTimeout
+from app.adapters.driven.retry_scheduler import RetryScheduler, backoff_delay
+from app.adapters.driven.smtp_pipeline import send_pipelined, supports_pipelining
+from app.adapters.driven.mime_encoder import MimeEncoder
+from app.adapters.driven.rate_limit import SmtpRateLimiter
+from app.adapters.driven.circuit_breaker import CircuitBreaker
+from app.adapters.driven.smtp_relays import Relay, RelayConfig, RelayRouter, parse_relays
 
-_smtp_client: Optional[smtplib.SMTP] = None
+logger = logging.getLogger(__name__)
+
+_TRANSIENT = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPHeloError,
+              smtplib.SMTPDataError, smtplib.SMTPRecipientsRefused, socket.timeout, PoolTimeout)
+_SERVER_DOWN = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPHeloError,
+                smtplib.SMTPAuthenticationError)
+
+def _smtp_outage(exc: BaseException) -> bool:
+    """Relay fora do ar (rede, conexão, sessão); recusa de uma mensagem não conta."""
+    if isinstance(exc, _SERVER_DOWN):
+        return True
+    return isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+
+def _retryable(exc: BaseException) -> bool:
+    """Vale nova tentativa (e failover): falha transitória ou relay fora do ar."""
+    return isinstance(exc, _TRANSIENT) or _smtp_outage(exc)
+
+_pool: Optional[SmtpConnectionPool] = None
+_scheduler: Optional[RetryScheduler] = None
+_limiter: Optional[SmtpRateLimiter] = None
+_breaker: Optional[CircuitBreaker] = None
+_router: Optional[RelayRouter] = None
+_pool_lock = threading.Lock()
+
+def _default_relay() -> RelayConfig:
+    """O relay único dos EMAIL_* (quando SMTP_RELAYS está vazio)."""
+    return RelayConfig(
+        "default", settings.EMAIL_HOST, settings.EMAIL_PORT, settings.EMAIL_USER, settings.EMAIL_PASS,
+        settings.EMAIL_USE_SSL, settings.EMAIL_USE_STARTTLS, max_connections=settings.SMTP_POOL_MAX_SIZE,
+    )
 
 def _connect() -> smtplib.SMTP:
-    if settings.EMAIL_USE_SSL:
-        client = smtplib.SMTP_SSL(settings.EMAIL_HOST, settings.EMAIL_PORT, timeout=settings.SMTP_CONNECT_TIMEOUT)
+    return _connect_to(_default_relay())
+
+def _connect_to(relay: RelayConfig) -> smtplib.SMTP:
+    with metrics.stage("smtp_connect"):
+        return _open_client(relay)
+
+def _open_client(relay: RelayConfig) -> smtplib.SMTP:
+    if relay.use_ssl:
+        client = smtplib.SMTP_SSL(relay.host, relay.port, timeout=settings.SMTP_CONNECT_TIMEOUT)
     else:
-        client = smtplib.SMTP(settings.EMAIL_HOST, settings.EMAIL_PORT, timeout=settings.SMTP_CONNECT_TIMEOUT)
-        if settings.EMAIL_USE_STARTTLS:
+        client = smtplib.SMTP(relay.host, relay.port, timeout=settings.SMTP_CONNECT_TIMEOUT)
+        if relay.use_starttls:
             client.ehlo()
             try:
                 client.starttls(); client.ehlo()
             except Exception:
                 pass
-    if settings.EMAIL_USER and settings.EMAIL_PASS:
-        client.login(settings.EMAIL_USER, settings.EMAIL_PASS)
+    if relay.user and relay.password:
+        client.login(relay.user, relay.password)
     client.timeout = settings.SMTP_OP_TIMEOUT
-    print(settings.EMAIL_USER)
-    print(settings.EMAIL_PASS)
+    logger.debug("conexão SMTP aberta com %s (%s:%s)", relay.name, relay.host, relay.port)
     return client
 
-def _get_client() -> smtplib.SMTP:
-    global _smtp_client
-    try:
-        if _smtp_client is None:
-            _smtp_client = _connect()
-        else:
-            _smtp_client.noop()
-    except Exception:
-        try:
-            if _smtp_client: _smtp_client.quit()
-        except Exception:
-            pass
-        _smtp_client = _connect()
-    return _smtp_client
-
-def _as_mime(msg: EmailMessage) -> MIMEMultipart:
-    m = MIMEMultipart("alternative")
-    m["Subject"] = msg.subject
-    m["From"] = settings.EMAIL_FROM or settings.EMAIL_USER
-    m["To"] = msg.to
-    m.attach(MIMEText(msg.text, "plain", "utf-8"))
-    m.attach(MIMEText(msg.html, "html", "utf-8"))
-    return m
+def _build_pool(connect: Optional[Callable[[], smtplib.SMTP]] = None, max_size: Optional[int] = None) -> SmtpConnectionPool:
+    max_size = max_size or settings.SMTP_POOL_MAX_SIZE
+    return SmtpConnectionPool(
+        connect or _connect,
+        min_size=min(settings.SMTP_POOL_MIN_SIZE, max_size),
+        max_size=max_size,
+        idle_timeout=settings.SMTP_POOL_IDLE_TIMEOUT,
+        max_messages=settings.SMTP_POOL_MAX_MESSAGES,
+        acquire_timeout=settings.SMTP_POOL_ACQUIRE_TIMEOUT,
+        probe_idle_after=settings.SMTP_PROBE_IDLE_AFTER,
+    )
+
+def _get_pool() -> SmtpConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _build_pool()
+    return _pool
+
+def _get_scheduler() -> RetryScheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _pool_lock:
+            if _scheduler is None:
+                _scheduler = RetryScheduler(workers=settings.SMTP_RETRY_WORKERS)
+    return _scheduler
+
+def _build_limiter(global_rate: float, global_burst: float) -> SmtpRateLimiter:
+    return SmtpRateLimiter(
+        global_rate=global_rate,
+        global_burst=global_burst,
+        connection_rate=settings.SMTP_RATE_PER_CONNECTION,
+        connection_burst=settings.SMTP_RATE_PER_CONNECTION_BURST,
+        domain_rate=settings.SMTP_RATE_PER_DOMAIN,
+        domain_burst=settings.SMTP_RATE_PER_DOMAIN_BURST,
+    )
+
+def _get_limiter() -> SmtpRateLimiter:
+    global _limiter
+    if _limiter is None:
+        with _pool_lock:
+            if _limiter is None:
+                _limiter = _build_limiter(settings.SMTP_RATE_GLOBAL, settings.SMTP_RATE_GLOBAL_BURST)
+    return _limiter
+
+def _build_breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        failure_rate=settings.SMTP_BREAKER_FAILURE_RATE,
+        window=settings.SMTP_BREAKER_WINDOW,
+        min_calls=settings.SMTP_BREAKER_MIN_CALLS,
+        cooldown=settings.SMTP_BREAKER_COOLDOWN,
+    )
+
+def _get_breaker() -> Optional[CircuitBreaker]:
+    global _breaker
+    if not settings.SMTP_BREAKER_ENABLED:
+        return None
+    if _breaker is None:
+        with _pool_lock:
+            if _breaker is None:
+                _breaker = _build_breaker("SMTP")
+    return _breaker
+
+def _build_relay(cfg: RelayConfig) -> Relay:
+    """Pool, limite (``rate`` da conta como limite global do relay) e breaker próprios."""
+    return Relay(
+        cfg.name,
+        pool=_build_pool(lambda: _connect_to(cfg), cfg.max_connections),
+        limiter=_build_limiter(cfg.rate, cfg.rate_burst),
+        breaker=_build_breaker(f"SMTP {cfg.name}") if settings.SMTP_BREAKER_ENABLED else None,
+        weight=cfg.weight,
+    )
+
+def _get_router() -> RelayRouter:
+    """Roteador dos relays de SMTP_RELAYS, compartilhado pelo processo."""
+    global _router
+    if _router is None:
+        with _pool_lock:
+            if _router is None:
+                relays = [_build_relay(cfg) for cfg in parse_relays(settings.SMTP_RELAYS)]
+                _router = RelayRouter(relays, settings.SMTP_ROUTING, is_outage=_smtp_outage)
+    return _router
+
+@dataclass
+class _Delivery:
+    from_addr: str
+    to: str
+    payload: bytes  # serializado uma vez; as retentativas reenviam os mesmos bytes
+    deadline: float
+    attempt: int = 1
+    future: Future = field(default_factory=Future)
+    failed_on: list = field(default_factory=list)  # relays em que já falhou (failover evita)
 
 class SmtpEmailGateway(EmailGateway):
+    def __init__(
+        self,
+        pool: Optional[SmtpConnectionPool] = None,
+        scheduler: Optional[RetryScheduler] = None,
+        limiter: Optional[SmtpRateLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        router: Optional[RelayRouter] = None,
+    ):
+        self._pool = pool
+        self._scheduler = scheduler
+        self._limiter = limiter
+        self._breaker = breaker
+        self._router = router
+        self._router_lock = threading.Lock()
+        self._encoder: Optional[MimeEncoder] = None
+
+    @property
+    def pool(self) -> SmtpConnectionPool:
+        return self._pool or _get_pool()
+
+    @property
+    def scheduler(self) -> RetryScheduler:
+        return self._scheduler or _get_scheduler()
+
+    @property
+    def limiter(self) -> SmtpRateLimiter:
+        return self._limiter or _get_limiter()
+
+    @property
+    def breaker(self) -> Optional[CircuitBreaker]:
+        """Breaker do relay único; com SMTP_RELAYS cada relay do ``router`` tem o seu."""
+        if self._breaker is not None:
+            return self._breaker
+        if settings.SMTP_RELAYS and self._pool is None:
+            return None
+        return _get_breaker()
+
+    @property
+    def router(self) -> RelayRouter:
+        """Com SMTP_RELAYS, o roteador compartilhado; sem, um relay só (pool/limiter/breaker acima)."""
+        if self._router is None:
+            with self._router_lock:
+                if self._router is None and settings.SMTP_RELAYS and self._pool is None:
+                    self._router = _get_router()
+                elif self._router is None:
+                    relay = Relay("default", self.pool, self.limiter, self.breaker)
+                    self._router = RelayRouter([relay], is_outage=_smtp_outage)
+        return self._router
+
+    def _route(self, deliveries: Sequence[_Delivery]) -> Optional[Relay]:
+        """Relay da próxima tentativa; com todos os circuitos abertos as entregas
+        falham na hora com ``CircuitOpenError``."""
+        try:
+            return self.router.pick(exclude=deliveries[0].failed_on)
+        except CircuitOpenError as e:
+            for delivery in deliveries:
+                delivery.future.set_exception(e)
+            return None
+
+    def _throttle(self, relay: Relay, deliveries: Sequence[_Delivery], conn: PooledConnection) -> None:
+        """Espera (na thread de envio) até caberem nos limites; nunca rejeita."""
+        if relay.limiter.enabled:
+            relay.limiter.acquire([d.to for d in deliveries], conn)
+
+    @property
+    def encoder(self) -> MimeEncoder:
+        if self._encoder is None:
+            self._encoder = MimeEncoder(settings.EMAIL_FROM or settings.EMAIL_USER or "")
+        return self._encoder
+
     def send(self, message: EmailMessage) -> None:
-        mime = _as_mime(message)
-        last_exc: Optional[Exception] = None
-        for attempt in range(1, settings.SMTP_MAX_RETRIES + 1):
+        """Faz a primeira tentativa na thread chamadora; falhas transitórias seguem no agendador.
+
+        Falhas permanentes (ou sem orçamento de retentativa) são levantadas aqui.
+        """
+        future = self.submit(message)
+        if future.done():
+            future.result()
+
+    def submit(self, message: EmailMessage) -> Future:
+        delivery = self._delivery(message)
+        if not delivery.future.done():
+            self._attempt(delivery)
+        return delivery.future
+
+    def send_many(self, messages: Sequence[EmailMessage]) -> list[Optional[Exception]]:
+        futures = self.submit_many(messages)
+        return [f.exception() if f.done() else None for f in futures]
+
+    def submit_many(self, messages: Sequence[EmailMessage]) -> list[Future]:
+        """Agrupa as mensagens por conexão, respeitando o limite de mensagens por sessão."""
+        deliveries = [self._delivery(m) for m in messages]
+        pending = [d for d in deliveries if not d.future.done()]
+        while pending:
+            relay = self._route(pending)
+            if relay is None:
+                break
             try:
-                client = _get_client()
-                client.sendmail(mime["From"], [message.to], mime.as_string())
-                return
-            except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPHeloError,
-                    smtplib.SMTPDataError, smtplib.SMTPRecipientsRefused, socket.timeout) as e:
-                last_exc = e
-                time.sleep(min(2 ** attempt, 8))
-                try:
-                    client.quit()
-                except Exception:
-                    pass
-                finally:
-                    globals()["_smtp_client"] = None
+                conn = relay.pool.acquire()
             except Exception as e:
-                last_exc = e
+                self.router.done(relay, e)
+                for delivery in pending:
+                    if _retryable(e):
+                        self._retry_later(delivery, e, relay)
+                    else:
+                        self._fail(delivery, e)
                 break
-        raise RuntimeError(f"Falha ao enviar e-mail: {last_exc}")
+            take = max(1, relay.pool.remaining(conn))
+            chunk, pending = pending[:take], pending[take:]
+            self._send_session(relay, conn, chunk)
+        return [d.future for d in deliveries]
+
+    def _delivery(self, message: EmailMessage) -> _Delivery:
+        encoder = self.encoder
+        delivery = _Delivery(
+            from_addr=encoder.envelope_from,
+            to=message.to,
+            payload=b"",
+            deadline=time.monotonic() + settings.SMTP_RETRY_DEADLINE,
+        )
+        try:
+            with metrics.stage("mime"):
+                delivery.payload = encoder.encode(message)
+        except ValueError as e:
+            self._fail(delivery, e)
+        return delivery
+
+    def _send_session(self, relay: Relay, conn: PooledConnection, chunk: list[_Delivery]) -> None:
+        pool = relay.pool
+        outcomes: list[Optional[Exception]] = []
+        try:
+            if supports_pipelining(conn.client):
+                self._throttle(relay, chunk, conn)
+                with metrics.stage("smtp_send"):
+                    send_pipelined(conn.client, [(d.from_addr, d.to, d.payload) for d in chunk], outcomes)
+            else:
+                for d in chunk:
+                    self._throttle(relay, [d], conn)
+                    try:
+                        with metrics.stage("smtp_send"):
+                            conn.client.sendmail(d.from_addr, [d.to], d.payload)
+                        outcomes.append(None)
+                    except (smtplib.SMTPServerDisconnected, socket.timeout):
+                        raise
+                    except Exception as e:
+                        outcomes.append(e)
+        except (smtplib.SMTPException, OSError) as e:
+            # a sessão caiu: o que não teve resposta volta para retentativa (em outro relay)
+            self.router.done(relay, e)
+            pool.release(conn, discard=True)
+            self._settle(relay, chunk[:len(outcomes)], outcomes)
+            for delivery in chunk[len(outcomes):]:
+                self._retry_later(delivery, e, relay)
+            return
+        self.router.done(relay)
+        conn.messages += len(chunk)
+        pool.release(conn)
+        self._settle(relay, chunk, outcomes)
+
+    def _settle(self, relay: Relay, deliveries: list[_Delivery], outcomes: list[Optional[Exception]]) -> None:
+        for delivery, outcome in zip(deliveries, outcomes):
+            if outcome is None:
+                delivery.future.set_result(None)
+            elif _retryable(outcome):
+                self._retry_later(delivery, outcome, relay)
+            else:
+                self._fail(delivery, outcome)
+
+    def _sendmail(self, delivery: _Delivery, relay: Relay) -> None:
+        pool = relay.pool
+        conn = pool.acquire()
+        try:
+            self._throttle(relay, [delivery], conn)
+            with metrics.stage("smtp_send" if delivery.attempt == 1 else "smtp_retry"):
+                try:
+                    conn.client.sendmail(delivery.from_addr, [delivery.to], delivery.payload)
+                except smtplib.SMTPServerDisconnected:
+                    # envio otimista: a conexão ociosa caiu no servidor, reconecta sem esperar
+                    stale, conn = conn, None
+                    conn = pool.replace(stale)
+                    conn.client.sendmail(delivery.from_addr, [delivery.to], delivery.payload)
+        except Exception as e:
+            if conn is not None:
+                pool.release(conn, discard=_retryable(e))
+            raise
+        conn.messages += 1
+        pool.release(conn)
+
+    def _attempt(self, delivery: _Delivery) -> None:
+        relay = self._route([delivery])
+        if relay is None:
+            return
+        try:
+            self._sendmail(delivery, relay)
+        except Exception as e:
+            self.router.done(relay, e)
+            if _retryable(e):
+                self._retry_later(delivery, e, relay)
+            else:
+                self._fail(delivery, e)
+        else:
+            self.router.done(relay)
+            delivery.future.set_result(None)
+
+    def _retry_later(self, delivery: _Delivery, exc: Exception, relay: Optional[Relay] = None) -> None:
+        """Reagenda a entrega; havendo outro relay saudável ainda não tentado, vai
+        para ele sem esperar o backoff (failover)."""
+        if delivery.attempt >= settings.SMTP_MAX_RETRIES:
+            return self._fail(delivery, exc)
+        if relay is not None and relay not in delivery.failed_on:
+            delivery.failed_on.append(relay)
+        router = self.router
+        if relay is not None and len(router.relays) > 1 and router.available(delivery.failed_on):
+            router.failover(relay)
+            delay = 0.0
+        else:
+            delay = backoff_delay(delivery.attempt, settings.SMTP_RETRY_BASE_DELAY, settings.SMTP_RETRY_MAX_DELAY)
+        if time.monotonic() + delay > delivery.deadline:
+            return self._fail(delivery, exc)
+        delivery.attempt += 1
+        metrics.retried()
+        self.scheduler.schedule(delay, lambda: self._attempt(delivery))
+
+    def close(self) -> None:
+        """Fecha as conexões dos relays e o agendador; os singletons fechados são refeitos sob demanda."""
+        global _pool, _scheduler, _router
+        router, self._router = self._router, None
+        scheduler = self._scheduler or _scheduler
+        if router is not None:
+            for relay in router.relays:
+                relay.pool.close()
+        if scheduler is not None:
+            scheduler.shutdown(wait=False)
+        with _pool_lock:
+            if router is not None and any(relay.pool is _pool for relay in router.relays):
+                _pool = None
+            if router is _router:
+                _router = None
+            if scheduler is _scheduler:
+                _scheduler = None
+
+    def _fail(self, delivery: _Delivery, exc: Exception) -> None:
+        if delivery.attempt > 1:
+            logger.warning("e-mail descartado após %d tentativas: %s", delivery.attempt, exc)
+        delivery.future.set_exception(RuntimeError(f"Falha ao enviar e-mail: {exc}"))
+
+class AsyncSmtpEmailGateway(AsyncEmailGateway):
+    """Expõe o ``SmtpEmailGateway`` ao event loop.
+
+    O smtplib é bloqueante, então cada tentativa roda num executor dedicado do
+    tamanho do pool SMTP; o semáforo faz as notificações excedentes esperarem
+    como corrotinas em vez de ocuparem threads. Retentativas agendadas são
+    aguardadas sem thread, então ``send`` só retorna com o e-mail entregue.
+    """
+
+    def __init__(self, gateway: Optional[SmtpEmailGateway] = None, max_concurrency: Optional[int] = None):
+        self._gateway = gateway or SmtpEmailGateway()
+        size = max_concurrency or (self._gateway.router.capacity if settings.SMTP_RELAYS else settings.SMTP_POOL_MAX_SIZE)
+        self._slots = asyncio.Semaphore(size)
+        self._size = size
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ThreadPoolExecutor:
+        # as threads só nascem no primeiro submit: trocar o executor não custa nada
+        return ThreadPoolExecutor(max_workers=self._size, thread_name_prefix="smtp-send")
+
+    @property
+    def breaker(self) -> Optional[CircuitBreaker]:
+        return self._gateway.breaker
+
+    @property
+    def router(self) -> RelayRouter:
+        return self._gateway.router
+
+    async def send(self, message: EmailMessage) -> None:
+        async with self._slots:
+            future = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._gateway.submit, message
+            )
+        await asyncio.wrap_future(future)
+
+    async def send_many(self, messages: Sequence[EmailMessage]) -> list[Optional[Exception]]:
+        size = max(1, settings.SMTP_PIPELINE_BATCH)
+        chunks = [list(messages[i:i + size]) for i in range(0, len(messages), size)]
+
+        async def submit(chunk: list[EmailMessage]) -> list[Future]:
+            async with self._slots:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self._gateway.submit_many, chunk
+                )
+
+        futures = [f for batch in await asyncio.gather(*(submit(c) for c in chunks)) for f in batch]
+        outcomes = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures), return_exceptions=True)
+        return [o if isinstance(o, Exception) else None for o in outcomes]
+
+    def close(self) -> None:
+        """Encerra executor, pools e agendador; um ``send`` depois disso os recria."""
+        executor, self._executor = self._executor, self._new_executor()
+        executor.shutdown(wait=False)
+        self._gateway.close()
@@ -0,0 +1,233 @@
+import os, re, threading, time
+from dataclasses import dataclass
+from typing import Callable, Optional
+from app.adapters.driven.safe_html import escape_cache, safe_href, safe_url
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(__file__), "templates", "email")
+# arquivos de cada (locale, status): templates/email/<locale>/<status>/<arquivo>
+_FILES = ("subject.txt", "text.txt", "body.html")
+_TOKEN = re.compile(r"\{\{\s*(\w+)\s*(?:\|\s*(\w+)\s*)?\}\}|\{%\s*(if|else|endif)\s*(\w*)\s*%\}")
+# filtros aceitos em {{ var|filtro }}; "raw" insere sem escape (HTML já montado)
+_FILTERS = ("url", "raw")
+# chaves (status, locale) como vieram na chamada; passando disso o atalho é esvaziado
+_FAST_MAX = 256
+_NEVER = float("inf")
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def _parse(source: str, name: str) -> list:
+    """Árvore de nós: literal (str), ("var", nome, filtro) e ("if", nome, então, senão)."""
+    root: list = []
+    stack = [(None, root)]  # (nó "if" aberto, lista onde os nós entram)
+    pos = 0
+    for m in _TOKEN.finditer(source):
+        if m.start() > pos:
+            stack[-1][1].append(source[pos:m.start()])
+        pos = m.end()
+        var, filt, tag, arg = m.groups()
+        if var:
+            if filt and filt not in _FILTERS:
+                raise TemplateError(f"{name}: filtro desconhecido '{filt}'")
+            stack[-1][1].append(("var", var, filt))
+        elif tag == "if":
+            if not arg:
+                raise TemplateError(f"{name}: 'if' sem variável")
+            node = ("if", arg, [], [])
+            stack[-1][1].append(node)
+            stack.append((node, node[2]))
+        elif len(stack) == 1:
+            raise TemplateError(f"{name}: '{tag}' sem 'if'")
+        elif tag == "else":
+            node = stack.pop()[0]
+            stack.append((node, node[3]))
+        else:
+            stack.pop()
+    if len(stack) > 1:
+        raise TemplateError(f"{name}: 'if' sem 'endif'")
+    if pos < len(source):
+        root.append(source[pos:])
+    return root
+
+
+class _Codegen:
+    """Gera o código Python de templates que usam as variáveis ``variables``.
+
+    Cada variável vira um parâmetro posicional da função compilada (``LOAD_FAST``,
+    sem dict de contexto); variável desconhecida é erro de compilação. Em HTML
+    o escape é ``escape_cache[var]``: valores repetidos custam só um lookup.
+    Literais dentro de ``{% if %}`` viram constantes nomeadas e variáveis viram
+    ``f'{var}'``, porque expressões dentro de f-string não aceitam barra
+    invertida nem aspas duplas.
+    """
+
+    def __init__(self, variables: tuple[str, ...], name: str):
+        self.variables = variables
+        self.name = name
+        self.consts: dict = {}
+
+    def _var(self, var: str) -> str:
+        if var not in self.variables:
+            raise TemplateError(f"{self.name}: variável desconhecida '{var}'")
+        return var
+
+    def _expr(self, nodes: list, escape: bool) -> str:
+        parts = []
+        for node in nodes:
+            if isinstance(node, str):
+                const = f"_k{len(self.consts)}"
+                self.consts[const] = node
+                parts.append(const)
+            elif node[0] == "var":
+                var = self._var(node[1])
+                if node[2] == "url":
+                    parts.append(f"_h({var})" if escape else f"_u({var})")
+                else:
+                    parts.append(f"_e[{var}]" if escape and node[2] != "raw" else f"f'{{{var}}}'")
+            else:
+                cond = self._var(node[1])
+                parts.append(f"({self._expr(node[2], escape)} if {cond} else {self._expr(node[3], escape)})")
+        return " + ".join(parts) if parts else "''"
+
+    def fstring(self, source: str, escape: bool) -> str:
+        body = []
+        for node in _parse(source.strip(), self.name):
+            if isinstance(node, str):
+                text = node.encode("unicode_escape").decode("ascii")
+                body.append(text.replace('"', '\\"').replace("{", "{{").replace("}", "}}"))
+            elif node[0] == "var" and node[2] != "url" and (not escape or node[2] == "raw"):
+                body.append("{" + self._var(node[1]) + "}")  # o FORMAT_VALUE da f-string já faz o str()
+            else:
+                body.append("{" + self._expr([node], escape) + "}")
+        return f'f"{"".join(body)}"'
+
+    def function(self, exprs: list[str]) -> Callable:
+        body = exprs[0] if len(exprs) == 1 else f"({', '.join(exprs)})"
+        code = compile(f"lambda {', '.join(self.variables)}: {body}", self.name, "eval")
+        return eval(code, {"__builtins__": {}, "_e": escape_cache, "_h": safe_href, "_u": safe_url, **self.consts})
+
+
+def compile_template(source: str, variables: tuple[str, ...], escape: bool = False, name: str = "<template>") -> Callable[..., str]:
+    """Compila o template numa função ``f(*variables) -> str`` feita de uma f-string.
+
+    Valores ausentes devem chegar como ``""``: sem escape, ``None`` vira "None".
+    Espaços nas bordas do template são descartados.
+    """
+    gen = _Codegen(tuple(variables), name)
+    return gen.function([gen.fstring(source, escape)])
+
+
+class EmailTemplate:
+    """Assunto, texto e HTML compilados numa única função que devolve os três."""
+
+    def __init__(self, subject: str, text: str, html: str, variables: tuple[str, ...], name: str = "<email>"):
+        gen = _Codegen(tuple(variables), name)
+        self.render: Callable[..., tuple[str, str, str]] = gen.function(
+            [gen.fstring(subject, False), gen.fstring(text, False), gen.fstring(html, True)]
+        )
+
+
+@dataclass
+class _Entry:
+    template: EmailTemplate
+    paths: tuple[str, ...]
+    mtimes: tuple[Optional[int], ...]
+    next_check: float
+
+
+def _mtimes(paths) -> tuple[Optional[int], ...]:
+    out = []
+    for path in paths:
+        try:
+            out.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            out.append(None)
+    return tuple(out)
+
+
+class EmailTemplates:
+    """Templates de e-mail por (status, locale), lidos do disco uma vez e compilados.
+
+    ``render`` do template recebe os valores de ``variables`` na mesma ordem.
+
+    O locale cai para o idioma (``pt_BR`` -> ``pt``) e depois para ``default_locale``.
+    Só valem os locales que já são pastas em ``root`` na criação; qualquer outro
+    valor (inclusive com ``..`` ou ``/``) vai direto para o padrão.
+    A cada ``reload_interval`` segundos o mtime dos arquivos é conferido e o
+    template é recompilado se mudou; ``None`` desliga a conferência.
+    """
+
+    def __init__(
+        self,
+        variables: tuple[str, ...],
+        root: str = DEFAULT_ROOT,
+        *,
+        default_locale: str = "pt_BR",
+        reload_interval: Optional[float] = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._variables = tuple(variables)
+        self._root = root
+        self._default_locale = default_locale
+        self._reload_interval = reload_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._cache: dict[tuple[str, tuple[str, ...]], _Entry] = {}
+        # atalho pelo (status, locale) da chamada, sem normalizar o locale a cada e-mail
+        self._fast: dict[tuple[str, Optional[str]], _Entry] = {}
+        try:
+            self._locales = frozenset(e.name for e in os.scandir(root) if e.is_dir())
+        except OSError:
+            self._locales = frozenset()
+
+    def _next_check(self, now: float) -> float:
+        return _NEVER if self._reload_interval is None else now + self._reload_interval
+
+    def get(self, status: str, locale: Optional[str] = None) -> EmailTemplate:
+        entry = self._fast.get((status, locale))
+        if entry is not None and (entry.next_check == _NEVER or self._clock() < entry.next_check):
+            return entry.template
+        return self._resolve(status, locale)
+
+    def _resolve(self, status: str, locale: Optional[str]) -> EmailTemplate:
+        # a chave usa só locales conhecidos: o cache não cresce com valores arbitrários
+        key = (status, self._candidates(locale))
+        now = self._clock()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and now >= entry.next_check:
+                if _mtimes(entry.paths) == entry.mtimes:
+                    entry.next_check = self._next_check(now)
+                else:
+                    entry = None
+            if entry is None:
+                entry = self._cache[key] = self._load(status, key[1], now)
+            if len(self._fast) >= _FAST_MAX:
+                self._fast.clear()
+            self._fast[(status, locale)] = entry
+            return entry.template
+
+    def _candidates(self, locale: Optional[str]) -> tuple[str, ...]:
+        out = []
+        if locale:
+            locale = locale.replace("-", "_")
+            out += [c for c in (locale, locale.split("_")[0]) if c in self._locales]
+        out.append(self._default_locale)
+        return tuple(dict.fromkeys(out))
+
+    def _load(self, status: str, candidates: tuple[str, ...], now: float) -> _Entry:
+        for candidate in candidates:
+            folder = os.path.join(self._root, candidate, status)
+            paths = tuple(os.path.join(folder, f) for f in _FILES)
+            mtimes = _mtimes(paths)
+            if None in mtimes:
+                continue
+            sources = []
+            for path in paths:
+                with open(path, encoding="utf-8") as f:
+                    sources.append(f.read())
+            template = EmailTemplate(*sources, variables=self._variables, name=folder)
+            return _Entry(template=template, paths=paths, mtimes=mtimes, next_check=self._next_check(now))
+        raise TemplateError(f"Template de e-mail não encontrado: {status} ({candidates[0]})")
@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+from app.domain.ports import IdempotencyConflictError, IdempotencyKeyMismatchError, IdempotencyStore
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    result: Optional[dict]  # None = em processamento
+    expires_at: float
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """Chaves de idempotência no próprio processo, limitadas por ``max_size`` (LRU).
+
+    Resultados valem por ``ttl``; uma reserva sem resultado expira em
+    ``inflight_ttl`` para não travar a chave se a requisição sumir.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 100_000,
+        ttl: float = 86_400.0,
+        inflight_ttl: float = 120.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._inflight_ttl = inflight_ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def begin(self, key: str, fingerprint: str) -> Optional[dict]:
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None and now < entry.expires_at:
+            if entry.fingerprint != fingerprint:
+                raise IdempotencyKeyMismatchError("Chave de idempotência já usada com outro conteúdo")
+            if entry.result is None:
+                raise IdempotencyConflictError("Notificação em processamento")
+            self._entries.move_to_end(key)
+            return entry.result
+        self._entries[key] = _Entry(fingerprint, None, now + self._inflight_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+        return None
+
+    async def complete(self, key: str, result: dict) -> None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.result = result
+            entry.expires_at = self._clock() + self._ttl
+
+    async def release(self, key: str) -> None:
+        entry = self._entries.get(key)
+        if entry is not None and entry.result is None:
+            del self._entries[key]
@@ -0,0 +1,100 @@
+import asyncio, json, sqlite3, threading, time
+from typing import Callable, Optional
+from app.domain.ports import IdempotencyConflictError, IdempotencyKeyMismatchError, IdempotencyStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    result TEXT,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_idempotency_keys_expires ON idempotency_keys (expires_at);
+"""
+
+class SqliteIdempotencyStore(IdempotencyStore):
+    """Chaves de idempotência em SQLite: sobrevivem a restart e valem entre processos
+    que compartilham o arquivo. Usa relógio de parede; expirados são apagados a
+    cada ``purge_every`` reservas. Depois de ``close`` a próxima operação reabre a conexão.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 86_400.0,
+        inflight_ttl: float = 120.0,
+        purge_every: int = 1000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._ttl = ttl
+        self._inflight_ttl = inflight_ttl
+        self._purge_every = purge_every
+        self._clock = clock
+        self._begins = 0
+        self._lock = threading.Lock()
+        self._path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexão aberta (reaberta após ``close``); chamar com ``_lock`` ou no ``__init__``."""
+        if self._db is None:
+            self._db = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    def _begin(self, key: str, fingerprint: str) -> Optional[dict]:
+        now = self._clock()
+        with self._lock:
+            self._connect()
+            self._begins += 1
+            if self._begins % self._purge_every == 0:
+                self._db.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,))
+            # IMMEDIATE: outro processo não reserva a mesma chave entre o SELECT e o INSERT
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT fingerprint, result FROM idempotency_keys WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+                if row is None:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO idempotency_keys (key, fingerprint, result, expires_at)"
+                        " VALUES (?, ?, NULL, ?)",
+                        (key, fingerprint, now + self._inflight_ttl),
+                    )
+            finally:
+                self._db.execute("COMMIT")
+        if row is None:
+            return None
+        if row[0] != fingerprint:
+            raise IdempotencyKeyMismatchError("Chave de idempotência já usada com outro conteúdo")
+        if row[1] is None:
+            raise IdempotencyConflictError("Notificação em processamento")
+        return json.loads(row[1])
+
+    def _execute(self, sql: str, params: tuple) -> None:
+        with self._lock:
+            self._connect().execute(sql, params)
+
+    async def begin(self, key: str, fingerprint: str) -> Optional[dict]:
+        return await asyncio.to_thread(self._begin, key, fingerprint)
+
+    async def complete(self, key: str, result: dict) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE idempotency_keys SET result = ?, expires_at = ? WHERE key = ?",
+            (json.dumps(result), self._clock() + self._ttl, key),
+        )
+
+    async def release(self, key: str) -> None:
+        await asyncio.to_thread(
+            self._execute, "DELETE FROM idempotency_keys WHERE key = ? AND result IS NULL", (key,)
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
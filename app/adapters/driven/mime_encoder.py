@@ -0,0 +1,64 @@
+from binascii import b2a_base64
+from email.utils import formataddr, parseaddr
+from app.domain.entities import EmailMessage
+
+# "_" não existe no alfabeto base64: a fronteira nunca aparece no corpo
+_BOUNDARY = "=_notification_alt_="
+_PART = 'Content-Type: text/{}; charset="utf-8"\r\nContent-Transfer-Encoding: base64\r\n\r\n'
+_HEAD_TAIL = (
+    f'MIME-Version: 1.0\r\nContent-Type: multipart/alternative; boundary="{_BOUNDARY}"\r\n\r\n'
+    f"--{_BOUNDARY}\r\n{_PART.format('plain')}"
+).encode("ascii")
+_HTML_PART = f"--{_BOUNDARY}\r\n{_PART.format('html')}".encode("ascii")
+_END = f"--{_BOUNDARY}--\r\n".encode("ascii")
+_WORD_BYTES = 45  # 45 bytes viram 60 em base64: encoded-word cabe em 75 colunas
+
+
+def encode_header(value: str) -> str:
+    """Valor de cabeçalho seguro: ASCII imprimível passa direto; o resto (acentos,
+    CR/LF) vira encoded-words RFC 2047 em UTF-8/base64, dobradas em linhas."""
+    if value.isascii() and value.isprintable() and len(value) < 900:
+        return value
+    data = value.encode("utf-8")
+    words = []
+    i = 0
+    while i < len(data):
+        j = min(i + _WORD_BYTES, len(data))
+        while j < len(data) and (data[j] & 0xC0) == 0x80:  # não corta um caractere ao meio
+            j -= 1
+        words.append(f"=?utf-8?b?{b2a_base64(data[i:j], newline=False).decode('ascii')}?=")
+        i = j
+    return "\r\n ".join(words)
+
+
+def _base64_lines(text: str) -> bytes:
+    data = text.encode("utf-8")
+    # 57 bytes por linha = 76 colunas em base64, como o pacote email faz
+    return b"".join(b2a_base64(data[i:i + 57]).replace(b"\n", b"\r\n") for i in range(0, len(data), 57))
+
+
+class MimeEncoder:
+    """Serializa ``EmailMessage`` direto para os bytes que vão ao servidor SMTP.
+
+    Gera o mesmo multipart/alternative (texto + HTML, UTF-8 em base64) que o
+    ``MIMEMultipart`` gerava, sem passar pelo gerador do pacote ``email``. O
+    cabeçalho From e as partes fixas são montados uma vez no construtor.
+    """
+
+    def __init__(self, from_addr: str):
+        name, addr = parseaddr(from_addr)
+        self.envelope_from = addr or from_addr
+        self._from = f"From: {formataddr((name, addr), charset='utf-8') if addr else from_addr}\r\n".encode("ascii")
+
+    def encode(self, msg: EmailMessage) -> bytes:
+        if "\r" in msg.to or "\n" in msg.to:
+            raise ValueError("Destinatário inválido")
+        return b"".join((
+            self._from,
+            f"To: {msg.to}\r\nSubject: {encode_header(msg.subject)}\r\n".encode("ascii"),
+            _HEAD_TAIL,
+            _base64_lines(msg.text),
+            _HTML_PART,
+            _base64_lines(msg.html),
+            _END,
+        ))
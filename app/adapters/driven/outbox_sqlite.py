@@ -0,0 +1,135 @@
+import asyncio, json, queue, sqlite3, threading, time, uuid
+from concurrent.futures import Future
+from dataclasses import asdict
+from typing import Any, Callable, Optional
+from app.domain.entities import NotificationInput, QueuedNotification
+from app.domain.ports import Outbox
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_outbox_status ON outbox (status, created_at);
+"""
+
+_Op = Callable[[sqlite3.Connection], Any]
+
+class SqliteOutbox(Outbox):
+    """Outbox em SQLite (WAL, ``synchronous=FULL``) com commit em grupo.
+
+    Todas as operações passam por uma única thread escritora, que junta o que
+    estiver na fila (até ``batch_size``) numa só transação: um fsync cobre o
+    lote inteiro em vez de um por e-mail. ``flush_interval`` opcionalmente
+    segura o lote por alguns milissegundos para agrupar mais.
+    Entradas entregues são removidas; falhas ficam com ``status='failed'``.
+    Depois de ``close`` a próxima operação reabre a conexão e a thread.
+    """
+
+    def __init__(self, path: str, batch_size: int = 64, flush_interval: float = 0.0):
+        self._path = path
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._ops: "queue.Queue[Optional[tuple[_Op, Future]]]" = queue.Queue()
+        self.commits = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._thread: Optional[threading.Thread] = None
+        self._open()
+
+    def _open(self) -> None:
+        self._db = sqlite3.connect(self._path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.executescript(_SCHEMA)
+        self._thread = threading.Thread(target=self._writer, name="outbox-writer", daemon=True)
+        self._thread.start()
+
+    def _submit(self, op: _Op) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._open()
+            self._ops.put((op, future))
+        return future
+
+    def _collect(self, first: tuple[_Op, Future]) -> tuple[list[tuple[_Op, Future]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self._flush_interval
+        while len(batch) < self._batch_size:
+            try:
+                timeout = deadline - time.monotonic()
+                op = self._ops.get(timeout=timeout) if timeout > 0 else self._ops.get_nowait()
+            except queue.Empty:
+                break
+            if op is None:
+                return batch, True
+            batch.append(op)
+        return batch, False
+
+    def _writer(self) -> None:
+        stop = False
+        while not stop:
+            first = self._ops.get()
+            if first is None:
+                return
+            batch, stop = self._collect(first)
+            self._commit(batch)
+
+    def _commit(self, batch: list[tuple[_Op, Future]]) -> None:
+        results = []
+        try:
+            self._db.execute("BEGIN")
+            for op, _ in batch:
+                results.append(op(self._db))
+            self._db.execute("COMMIT")
+        except Exception as e:
+            if self._db.in_transaction:
+                self._db.execute("ROLLBACK")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.commits += 1
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    async def _run(self, op: _Op) -> Any:
+        return await asyncio.wrap_future(self._submit(op))
+
+    async def record(self, data: NotificationInput) -> str:
+        entry_id = uuid.uuid4().hex
+        payload = json.dumps(asdict(data))
+        await self._run(lambda db: db.execute(
+            "INSERT INTO outbox (id, payload, status, created_at) VALUES (?, ?, 'pending', ?)",
+            (entry_id, payload, time.time()),
+        ))
+        return entry_id
+
+    async def mark_delivered(self, entry_id: str) -> None:
+        await self._run(lambda db: db.execute("DELETE FROM outbox WHERE id = ?", (entry_id,)))
+
+    async def mark_failed(self, entry_id: str, error: str) -> None:
+        await self._run(lambda db: db.execute(
+            "UPDATE outbox SET status='failed', error=? WHERE id = ?", (error, entry_id),
+        ))
+
+    async def pending(self) -> list[QueuedNotification]:
+        rows = await self._run(lambda db: db.execute(
+            "SELECT id, payload, created_at FROM outbox WHERE status='pending' ORDER BY created_at"
+        ).fetchall())
+        return [
+            QueuedNotification(id=r[0], data=NotificationInput(**json.loads(r[1])), enqueued_at=r[2])
+            for r in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                return
+            self._ops.put(None)
+            self._thread.join()
+            self._db.close()
+            self._db, self._thread = None, None
@@ -0,0 +1,163 @@
+import asyncio, time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+from app.domain.entities import NotificationInput, QueuedNotification
+from app.domain.ports import NotificationQueue
+
+# amostras guardadas por faixa para os percentis de latência
+_SAMPLES = 1024
+
+
+def _percentiles(samples) -> dict:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {"p50": ordered[last // 2], "p95": ordered[round(last * 0.95)], "max": ordered[last]}
+
+
+@dataclass
+class Lane:
+    name: str
+    queue: NotificationQueue
+    weight: int = 1
+    current: int = 0  # crédito do round-robin ponderado
+    depth: int = 0  # itens pendentes segundo esta instância (sem consultar a fila a cada retirada)
+    counters: dict = field(default_factory=lambda: {"enqueued": 0, "acked": 0, "failed": 0})
+    waits: deque = field(default_factory=lambda: deque(maxlen=_SAMPLES))  # enfileirado -> retirado
+    latencies: deque = field(default_factory=lambda: deque(maxlen=_SAMPLES))  # enfileirado -> ack
+
+
+class LaneNotificationQueue(NotificationQueue):
+    """Fila com faixas de prioridade sobre uma fila por faixa.
+
+    ``classify`` escolhe a faixa de cada notificação. Com várias faixas com
+    itens, a retirada segue round-robin ponderado suave (o do nginx): uma faixa
+    de peso 4 é servida 4 vezes para cada 1 de uma de peso 1, intercaladas, e
+    nenhuma faixa fica sem vez. Espera na fila e latência até o ack são medidas
+    por faixa em ``stats()``.
+
+    A profundidade de cada faixa é contada em memória (lida da fila só na
+    criação), para a escolha não fazer ``COUNT(*)`` no SQLite a cada retirada.
+    Itens inseridos por outro processo são achados quando nenhuma faixa com
+    contagem entrega item.
+    """
+
+    def __init__(
+        self,
+        lanes: list[Lane],
+        classify: Callable[[NotificationInput], str],
+        *,
+        poll_interval: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        if not lanes:
+            raise ValueError("Informe ao menos uma faixa")
+        self._lanes = {lane.name: lane for lane in lanes}
+        for lane in lanes:
+            lane.depth = lane.queue.qsize()
+        self._classify = classify
+        self._poll_interval = poll_interval
+        self._clock = clock
+        self._inflight: dict[str, tuple[Lane, float]] = {}
+        self._puts = 0
+        self._cond = asyncio.Condition()
+
+    async def put(self, data: NotificationInput) -> str:
+        lane = self._lanes[self._classify(data)]
+        notification_id = await lane.queue.put(data)
+        lane.counters["enqueued"] += 1
+        lane.depth += 1
+        self._puts += 1
+        async with self._cond:
+            self._cond.notify()
+        return notification_id
+
+    def _schedule(self) -> list[Lane]:
+        """Faixas com itens, na ordem de preferência do round-robin ponderado."""
+        ready = [lane for lane in self._lanes.values() if lane.depth > 0]
+        if not ready:
+            return []
+        total = 0
+        for lane in ready:
+            lane.current += lane.weight
+            total += lane.weight
+        ready.sort(key=lambda lane: lane.current, reverse=True)
+        ready[0].current -= total
+        return ready
+
+    def _take(self, lane: Lane, item: QueuedNotification) -> QueuedNotification:
+        lane.depth = max(0, lane.depth - 1)
+        lane.waits.append(max(0.0, self._clock() - item.enqueued_at))
+        self._inflight[item.id] = (lane, item.enqueued_at)
+        return item
+
+    async def poll(self) -> Optional[QueuedNotification]:
+        ready = self._schedule()
+        for lane in ready:
+            item = await lane.queue.poll()
+            if item is not None:
+                return self._take(lane, item)
+            lane.depth = 0  # a contagem estava adiantada (ex.: outro processo retirou)
+        for lane in self._lanes.values():
+            if all(lane is not r for r in ready):
+                item = await lane.queue.poll()
+                if item is not None:
+                    return self._take(lane, item)
+        return None
+
+    async def get(self) -> QueuedNotification:
+        while True:
+            seen = self._puts
+            item = await self.poll()
+            if item is not None:
+                return item
+            async with self._cond:
+                try:
+                    # o timeout cobre itens inseridos por outro processo (SQLite)
+                    await asyncio.wait_for(self._cond.wait_for(lambda: self._puts != seen), self._poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _settle(self, notification_id: str, counter: str) -> NotificationQueue:
+        lane, enqueued_at = self._inflight.pop(notification_id)
+        lane.counters[counter] += 1
+        lane.latencies.append(max(0.0, self._clock() - enqueued_at))
+        return lane.queue
+
+    async def ack(self, notification_id: str) -> None:
+        await self._settle(notification_id, "acked").ack(notification_id)
+
+    async def fail(self, notification_id: str, error: str) -> None:
+        await self._settle(notification_id, "failed").fail(notification_id, error)
+
+    def qsize(self) -> int:
+        return sum(lane.depth for lane in self._lanes.values())
+
+    def stats(self) -> dict:
+        return {
+            lane.name: {
+                "weight": lane.weight,
+                "depth": lane.depth,
+                **lane.counters,
+                "wait": _percentiles(lane.waits),
+                "latency": _percentiles(lane.latencies),
+            }
+            for lane in self._lanes.values()
+        }
+
+    def close(self) -> None:
+        for lane in self._lanes.values():
+            if hasattr(lane.queue, "close"):
+                lane.queue.close()
+
+
+def priority_classifier(statuses, user_ids, priority: str = "priority", default: str = "bulk") -> Callable[[NotificationInput], str]:
+    """Faixa ``priority`` para os status (ex.: ``error``) e usuários informados; o resto vai para ``default``."""
+    statuses, user_ids = frozenset(statuses), frozenset(user_ids)
+
+    def classify(data: NotificationInput) -> str:
+        return priority if data.status in statuses or data.user_id in user_ids else default
+
+    return classify
@@ -0,0 +1,42 @@
+import asyncio, time, uuid
+from collections import deque
+from typing import Optional
+from app.domain.entities import NotificationInput, QueuedNotification
+from app.domain.ports import NotificationQueue, QueueFullError
+
+class InMemoryNotificationQueue(NotificationQueue):
+    """Fila limitada no próprio processo; itens pendentes se perdem se o processo cair.
+
+    Só as últimas ``failed_limit`` falhas ficam em ``failed``, como pares ``(id, erro)``.
+    """
+
+    def __init__(self, maxsize: int = 1000, failed_limit: int = 100):
+        self._queue: asyncio.Queue[QueuedNotification] = asyncio.Queue(maxsize=maxsize)
+        self.failed: deque[tuple[str, str]] = deque(maxlen=failed_limit)
+
+    async def put(self, data: NotificationInput) -> str:
+        item = QueuedNotification(id=uuid.uuid4().hex, data=data, enqueued_at=time.time())
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            raise QueueFullError("Fila de notificações cheia")
+        return item.id
+
+    async def get(self) -> QueuedNotification:
+        return await self._queue.get()
+
+    async def poll(self) -> Optional[QueuedNotification]:
+        try:
+            return self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+
+    async def ack(self, notification_id: str) -> None:
+        self._queue.task_done()
+
+    async def fail(self, notification_id: str, error: str) -> None:
+        self.failed.append((notification_id, error))
+        self._queue.task_done()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
@@ -0,0 +1,102 @@
+import asyncio, json, sqlite3, threading, time, uuid
+from dataclasses import asdict
+from typing import Optional
+from app.domain.entities import NotificationInput, QueuedNotification
+from app.domain.ports import NotificationQueue, QueueFullError
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS notification_queue (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_notification_queue_status ON notification_queue (status, enqueued_at);
+"""
+
+class SqliteNotificationQueue(NotificationQueue):
+    """Fila durável em SQLite: itens ``pending``/``inflight`` sobrevivem a um restart.
+
+    Na abertura, itens que estavam ``inflight`` voltam para ``pending``. Entregues
+    são removidos; falhas ficam com ``status='failed'`` e a mensagem de erro.
+    """
+
+    def __init__(self, path: str, maxsize: int = 10000, poll_interval: float = 1.0):
+        self._maxsize = maxsize
+        self._poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._db.execute("UPDATE notification_queue SET status='pending' WHERE status='inflight'")
+        self._wakeup = asyncio.Event()
+
+    def _insert(self, item: QueuedNotification) -> None:
+        with self._lock:
+            (depth,) = self._db.execute(
+                "SELECT COUNT(*) FROM notification_queue WHERE status IN ('pending', 'inflight')"
+            ).fetchone()
+            if depth >= self._maxsize:
+                raise QueueFullError("Fila de notificações cheia")
+            self._db.execute(
+                "INSERT INTO notification_queue (id, payload, status, enqueued_at) VALUES (?, ?, 'pending', ?)",
+                (item.id, json.dumps(asdict(item.data)), item.enqueued_at),
+            )
+
+    def _claim(self) -> Optional[QueuedNotification]:
+        with self._lock:
+            row = self._db.execute(
+                "UPDATE notification_queue SET status='inflight' WHERE id = ("
+                " SELECT id FROM notification_queue WHERE status='pending' ORDER BY enqueued_at LIMIT 1"
+                ") RETURNING id, payload, enqueued_at"
+            ).fetchone()
+        if row is None:
+            return None
+        return QueuedNotification(id=row[0], data=NotificationInput(**json.loads(row[1])), enqueued_at=row[2])
+
+    def _execute(self, sql: str, params: tuple) -> None:
+        with self._lock:
+            self._db.execute(sql, params)
+
+    async def put(self, data: NotificationInput) -> str:
+        item = QueuedNotification(id=uuid.uuid4().hex, data=data, enqueued_at=time.time())
+        await asyncio.to_thread(self._insert, item)
+        self._wakeup.set()
+        return item.id
+
+    async def get(self) -> QueuedNotification:
+        while True:
+            self._wakeup.clear()
+            item = await asyncio.to_thread(self._claim)
+            if item is not None:
+                return item
+            try:
+                # o poll cobre itens inseridos por outro processo no mesmo arquivo
+                await asyncio.wait_for(self._wakeup.wait(), self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def poll(self) -> Optional[QueuedNotification]:
+        return await asyncio.to_thread(self._claim)
+
+    async def ack(self, notification_id: str) -> None:
+        await asyncio.to_thread(self._execute, "DELETE FROM notification_queue WHERE id = ?", (notification_id,))
+
+    async def fail(self, notification_id: str, error: str) -> None:
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE notification_queue SET status='failed', error=? WHERE id = ?",
+            (error, notification_id),
+        )
+
+    def qsize(self) -> int:
+        with self._lock:
+            (depth,) = self._db.execute(
+                "SELECT COUNT(*) FROM notification_queue WHERE status='pending'"
+            ).fetchone()
+        return depth
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
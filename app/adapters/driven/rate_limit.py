@@ -0,0 +1,117 @@
+import threading, time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+from app.adapters.driven.smtp_pool import PooledConnection
+
+
+class TokenBucket:
+    """Token bucket com reserva: quem pega a ficha sem saldo fica devendo e recebe
+    quanto tempo esperar. O saldo negativo enfileira os próximos em ordem (FIFO),
+    sem rejeitar ninguém.
+    """
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate deve ser > 0")
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._clock = clock
+        self._tokens = self.burst
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, n: float = 1.0) -> float:
+        """Consome ``n`` fichas e retorna quantos segundos esperar antes de usá-las."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= n
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class SmtpRateLimiter:
+    """Limites de envio em três níveis: global (relay), por conexão SMTP e por
+    domínio do destinatário. Níveis com taxa 0 ficam desligados.
+
+    Quem passa do limite espera (``sleep``) em vez de falhar; a espera é a maior
+    entre os níveis e fica registrada em ``stats()``.
+    """
+
+    def __init__(
+        self,
+        *,
+        global_rate: float = 0.0,
+        global_burst: float = 1.0,
+        connection_rate: float = 0.0,
+        connection_burst: float = 1.0,
+        domain_rate: float = 0.0,
+        domain_burst: float = 1.0,
+        max_domains: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._clock = clock
+        self._sleep = sleep
+        self._global = TokenBucket(global_rate, global_burst, clock) if global_rate > 0 else None
+        self._connection = (connection_rate, connection_burst)
+        self._domain = (domain_rate, domain_burst)
+        self._max_domains = max_domains
+        self._domains: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {level: {"waits": 0, "wait_seconds": 0.0, "max_wait": 0.0}
+                       for level in ("global", "connection", "domain")}
+
+    @property
+    def enabled(self) -> bool:
+        return self._global is not None or self._connection[0] > 0 or self._domain[0] > 0
+
+    def _domain_bucket(self, to: str) -> TokenBucket:
+        domain = to.rpartition("@")[2].lower()
+        with self._lock:
+            bucket = self._domains.get(domain)
+            if bucket is None:
+                bucket = self._domains[domain] = TokenBucket(*self._domain, clock=self._clock)
+                if len(self._domains) > self._max_domains:
+                    self._domains.popitem(last=False)
+            else:
+                self._domains.move_to_end(domain)
+            return bucket
+
+    def _connection_bucket(self, conn: PooledConnection) -> TokenBucket:
+        if conn.bucket is None:
+            conn.bucket = TokenBucket(*self._connection, clock=self._clock)
+        return conn.bucket
+
+    def _record(self, level: str, wait: float) -> None:
+        if wait <= 0:
+            return
+        with self._lock:
+            stats = self._stats[level]
+            stats["waits"] += 1
+            stats["wait_seconds"] += wait
+            stats["max_wait"] = max(stats["max_wait"], wait)
+
+    def acquire(self, recipients: Iterable[str], conn: Optional[PooledConnection] = None) -> float:
+        """Reserva uma ficha por mensagem em cada nível e dorme a maior espera.
+
+        Para um lote pipelined, a espera devolvida cobre todas as mensagens.
+        """
+        waits = {"global": 0.0, "connection": 0.0, "domain": 0.0}
+        for to in recipients:
+            if self._global is not None:
+                waits["global"] = max(waits["global"], self._global.reserve())
+            if self._domain[0] > 0:
+                waits["domain"] = max(waits["domain"], self._domain_bucket(to).reserve())
+            if conn is not None and self._connection[0] > 0:
+                waits["connection"] = max(waits["connection"], self._connection_bucket(conn).reserve())
+        for level, wait in waits.items():
+            self._record(level, wait)
+        wait = max(waits.values())
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {level: dict(values) for level, values in self._stats.items()} | {"domains": len(self._domains)}
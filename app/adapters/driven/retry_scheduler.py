@@ -0,0 +1,64 @@
+import heapq, itertools, random, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+def backoff_delay(attempt: int, base: float, cap: float, rng: Callable[[], float] = random.random) -> float:
+    """Backoff exponencial com jitter total: uniforme em [0, min(cap, base * 2^(attempt-1))]."""
+    return rng() * min(cap, base * (2 ** (attempt - 1)))
+
+
+class RetryScheduler:
+    """Fila de atrasos: uma thread aguarda os prazos e entrega as tarefas vencidas a um executor.
+
+    Nenhuma thread fica dormindo por tarefa; quem agenda retorna imediatamente.
+    """
+
+    def __init__(self, workers: int = 2, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._heap: list[tuple[float, int, Callable[[], None]]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="smtp-retry")
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def schedule(self, delay: float, fn: Callable[[], None]) -> None:
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("Agendador de retentativas encerrado")
+            heapq.heappush(self._heap, (self._clock() + max(0.0, delay), next(self._seq), fn))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="smtp-retry-timer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _next_due(self) -> Optional[Callable[[], None]]:
+        with self._cond:
+            while not self._stopped:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                wait = self._heap[0][0] - self._clock()
+                if wait <= 0:
+                    return heapq.heappop(self._heap)[2]
+                self._cond.wait(wait)
+            return None
+
+    def _run(self) -> None:
+        while True:
+            fn = self._next_due()
+            if fn is None:
+                return
+            self._executor.submit(fn)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._cond:
+            self._stopped = True
+            self._heap.clear()
+            self._cond.notify_all()
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,61 @@
+import html
+from typing import Any
+
+_SAFE_SCHEMES = ("http://", "https://", "mailto:")
+
+
+def escape_html(value: Any) -> str:
+    if value is None:
+        return ""
+    s = value if type(value) is str else str(value)
+    # a maioria dos valores (nomes, ids) não tem o que escapar; "in" encadeado
+    # sai mais barato que regex ou laço para strings curtas
+    if "&" in s or "<" in s or ">" in s or '"' in s or "'" in s:
+        return html.escape(s, quote=True)
+    return s
+
+
+class EscapeCache(dict):
+    """Cache ``valor -> valor escapado`` para HTML, consultado com ``cache[valor]``.
+
+    Um acerto é só o lookup do dict, em C, sem chamada Python. Na falta,
+    ``__missing__`` escapa e guarda; ao passar de ``max_size`` o cache é
+    esvaziado inteiro, o que basta para nomes e ids que se repetem.
+    """
+
+    def __init__(self, max_size: int = 4096):
+        super().__init__()
+        self.max_size = max_size
+
+    def __missing__(self, value: Any) -> str:
+        s = escape_html(value)
+        if len(self) >= self.max_size:
+            self.clear()
+        self[value] = s
+        return s
+
+
+escape_cache = EscapeCache()
+
+
+def safe_url(value: Any) -> str:
+    """URL para links: só http(s) e mailto passam, o resto (``javascript:``,
+    ``data:``, relativos) vira ``#``. Não escapa; para ``href`` use ``safe_href``."""
+    if not value:
+        return ""
+    s = (value if type(value) is str else str(value)).strip()
+    if s.startswith(_SAFE_SCHEMES) or s[:8].lower().startswith(_SAFE_SCHEMES):
+        return s
+    return "#"
+
+
+def safe_href(value: Any) -> str:
+    """``safe_url`` escapado para atributo HTML, sem cache: URLs quase nunca se repetem."""
+    if not value:
+        return ""
+    s = (value if type(value) is str else str(value)).strip()
+    if not s.startswith(_SAFE_SCHEMES) and not s[:8].lower().startswith(_SAFE_SCHEMES):
+        return "#"
+    if "&" in s or "<" in s or ">" in s or '"' in s or "'" in s:
+        return html.escape(s, quote=True)
+    return s
@@ -0,0 +1,78 @@
+import asyncio, threading
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional
+from app.domain.entities import Identity
+from app.domain.ports import AuthGateway, AsyncAuthGateway, IdentityResult
+
+@dataclass
+class _Call:
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: Optional[BaseException] = None
+
+class SingleFlight:
+    """Chamadas concorrentes (threads) com a mesma chave compartilham uma única execução."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+class AsyncSingleFlight:
+    """Versão asyncio: a execução roda numa task própria, então cancelar um
+    dos interessados não cancela a chamada dos demais."""
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+class SingleFlightAuthGateway(AsyncAuthGateway):
+    def __init__(self, inner: AsyncAuthGateway):
+        self._inner = inner
+        self._flight = AsyncSingleFlight()
+
+    async def resolve_identity(self, user_id: int) -> Identity:
+        return await self._flight.do(user_id, lambda: self._inner.resolve_identity(user_id))
+
+    async def resolve_identities(self, user_ids: Iterable[int]) -> dict[int, IdentityResult]:
+        # o lote já é uma única ida ao serviço; não há o que coalescer por id
+        return await self._inner.resolve_identities(user_ids)
+
+class ThreadedSingleFlightAuthGateway(AuthGateway):
+    def __init__(self, inner: AuthGateway):
+        self._inner = inner
+        self._flight = SingleFlight()
+
+    def resolve_identity(self, user_id: int) -> Identity:
+        return self._flight.do(user_id, lambda: self._inner.resolve_identity(user_id))
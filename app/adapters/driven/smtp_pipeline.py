@@ -0,0 +1,59 @@
+import re, smtplib
+from typing import Optional, Sequence, Union
+
+CRLF = b"\r\n"
+_EOLS = re.compile(rb"(?:\r\n|\n|\r(?!\n))")
+_LEADING_DOT = re.compile(rb"(?m)^\.")
+
+Envelope = tuple[str, str, Union[str, bytes]]  # (from, to, mensagem serializada)
+
+def dot_stuff(payload: Union[str, bytes]) -> bytes:
+    """Corpo do DATA: fins de linha CRLF, pontos iniciais duplicados e o terminador ``.``."""
+    data = payload.encode("ascii") if isinstance(payload, str) else payload
+    data = _LEADING_DOT.sub(b"..", _EOLS.sub(CRLF, data))
+    if not data.endswith(CRLF):
+        data += CRLF
+    return data + b"." + CRLF
+
+def supports_pipelining(client: smtplib.SMTP) -> bool:
+    client.ehlo_or_helo_if_needed()
+    return client.has_extn("pipelining")
+
+def send_pipelined(client: smtplib.SMTP, envelopes: Sequence[Envelope], outcomes: list[Optional[Exception]]) -> None:
+    """Envia vários e-mails numa sessão com PIPELINING (RFC 2920).
+
+    ``MAIL``/``RCPT``/``DATA`` de cada mensagem vão numa só escrita, junto com o
+    ``.`` final da anterior, então cada mensagem custa uma ida e volta em vez de
+    quatro. Os resultados são anexados a ``outcomes`` na ordem (``None`` =
+    aceito); uma exceção de conexão interrompe o lote e deixa os restantes sem
+    resultado para o chamador decidir.
+    """
+    awaiting_final = False
+    for from_addr, to, payload in envelopes:
+        client.send(
+            f"MAIL FROM:{smtplib.quoteaddr(from_addr)}\r\n"
+            f"RCPT TO:{smtplib.quoteaddr(to)}\r\n"
+            "DATA\r\n"
+        )
+        if awaiting_final:
+            outcomes.append(_final_outcome(client.getreply()))
+            awaiting_final = False
+        mail, rcpt, data = client.getreply(), client.getreply(), client.getreply()
+        if data[0] == 354:
+            client.send(dot_stuff(payload))
+            awaiting_final = True
+            continue
+        if mail[0] != 250:
+            outcomes.append(smtplib.SMTPSenderRefused(mail[0], mail[1], from_addr))
+        elif rcpt[0] not in (250, 251):
+            outcomes.append(smtplib.SMTPRecipientsRefused({to: rcpt}))
+        else:
+            outcomes.append(smtplib.SMTPDataError(*data))
+        # transação abortada no meio: limpa o estado antes do próximo MAIL
+        client.rset()
+    if awaiting_final:
+        outcomes.append(_final_outcome(client.getreply()))
+
+def _final_outcome(reply: tuple[int, bytes]) -> Optional[Exception]:
+    code, resp = reply
+    return None if code == 250 else smtplib.SMTPDataError(code, resp)
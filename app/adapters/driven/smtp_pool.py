@@ -0,0 +1,198 @@
+import threading, time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+import smtplib
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+@dataclass
+class PooledConnection:
+    client: smtplib.SMTP
+    created_at: float
+    last_used: float
+    messages: int = 0
+    bucket: Any = None  # limite de envio por conexão, preenchido pelo rate limiter
+
+
+def _close_quietly(client: smtplib.SMTP) -> None:
+    try:
+        client.quit()
+    except Exception:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+class SmtpConnectionPool:
+    """Pool limitado de conexões SMTP autenticadas, seguro entre threads.
+
+    Conexões ociosas além de ``min_size`` são fechadas após ``idle_timeout`` e
+    cada conexão é reciclada após ``max_messages`` envios. O checkout valida a
+    conexão localmente (socket aberto, limite de mensagens) e só faz ``NOOP``
+    quando ela ficou ociosa por mais de ``probe_idle_after`` segundos.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], smtplib.SMTP],
+        *,
+        min_size: int = 1,
+        max_size: int = 4,
+        idle_timeout: float = 60.0,
+        max_messages: int = 100,
+        acquire_timeout: float = 10.0,
+        probe_idle_after: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size deve ser >= 1")
+        self._connect = connect
+        self._min_size = max(0, min(min_size, max_size))
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._max_messages = max_messages
+        self._acquire_timeout = acquire_timeout
+        self._probe_idle_after = probe_idle_after
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._idle: list[PooledConnection] = []  # LIFO: a mais recente fica no fim
+        self._size = 0  # conexões abertas (ociosas + em uso)
+        self._closed = False
+        self._counters = {"connects": 0, "probes": 0, "probe_failures": 0, "reconnects": 0}
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def remaining(self, conn: PooledConnection) -> int:
+        """Quantas mensagens a conexão ainda pode enviar antes de ser reciclada."""
+        return max(0, self._max_messages - conn.messages)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                **self._counters,
+            }
+
+    def _usable(self, conn: PooledConnection) -> bool:
+        if conn.messages >= self._max_messages:
+            return False
+        return getattr(conn.client, "sock", True) is not None
+
+    def _evict_idle_locked(self, now: float) -> list[PooledConnection]:
+        evicted = []
+        keep = []
+        # as mais antigas ficam no início da lista
+        for conn in self._idle:
+            expired = now - conn.last_used >= self._idle_timeout
+            if expired and self._size - len(evicted) > self._min_size:
+                evicted.append(conn)
+            else:
+                keep.append(conn)
+        self._idle = keep
+        self._size -= len(evicted)
+        return evicted
+
+    def _checkout(self, deadline: float) -> Optional[PooledConnection]:
+        """Retorna uma conexão ociosa ou ``None`` com um slot reservado para abrir outra."""
+        stale: list[PooledConnection] = []
+        try:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Pool SMTP fechado")
+                    stale.extend(self._evict_idle_locked(self._clock()))
+                    while self._idle:
+                        conn = self._idle.pop()
+                        if self._usable(conn):
+                            return conn
+                        self._size -= 1
+                        stale.append(conn)
+                    if self._size < self._max_size:
+                        self._size += 1
+                        return None
+                    remaining = deadline - self._clock()
+                    if remaining <= 0:
+                        raise PoolTimeout("Pool SMTP esgotado")
+                    self._cond.wait(remaining)
+        finally:
+            for conn in stale:
+                _close_quietly(conn.client)
+
+    def _count(self, name: str) -> None:
+        with self._cond:
+            self._counters[name] += 1
+
+    def _probe(self, conn: PooledConnection) -> bool:
+        self._count("probes")
+        try:
+            conn.client.noop()
+            return True
+        except Exception:
+            self._count("probe_failures")
+            return False
+
+    def _open(self) -> PooledConnection:
+        try:
+            client = self._connect()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        self._count("connects")
+        now = self._clock()
+        return PooledConnection(client=client, created_at=now, last_used=now)
+
+    def acquire(self) -> PooledConnection:
+        deadline = self._clock() + self._acquire_timeout
+        while True:
+            conn = self._checkout(deadline)
+            if conn is None:
+                return self._open()
+            if self._clock() - conn.last_used < self._probe_idle_after or self._probe(conn):
+                return conn
+            self.release(conn, discard=True)
+
+    def replace(self, conn: PooledConnection) -> PooledConnection:
+        """Fecha uma conexão derrubada pelo servidor e abre outra no mesmo slot."""
+        _close_quietly(conn.client)
+        self._count("reconnects")
+        return self._open()
+
+    def release(self, conn: PooledConnection, discard: bool = False) -> None:
+        conn.last_used = self._clock()
+        with self._cond:
+            if discard or self._closed or not self._usable(conn):
+                self._size -= 1
+                close = True
+            else:
+                self._idle.append(conn)
+                close = False
+            self._cond.notify()
+        if close:
+            _close_quietly(conn.client)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            _close_quietly(conn.client)
@@ -0,0 +1,158 @@
+import json, threading
+from dataclasses import dataclass, field
+from typing import Callable, Collection, Optional
+from app.domain.ports import CircuitOpenError
+from app.adapters.driven.smtp_pool import SmtpConnectionPool, PoolTimeout
+from app.adapters.driven.rate_limit import SmtpRateLimiter
+from app.adapters.driven.circuit_breaker import CircuitBreaker, OPEN
+
+STRATEGIES = ("least_outstanding", "weighted")
+
+
+@dataclass(frozen=True)
+class RelayConfig:
+    name: str
+    host: str
+    port: int = 587
+    user: Optional[str] = None
+    password: Optional[str] = None
+    use_ssl: bool = False
+    use_starttls: bool = True
+    weight: int = 1
+    max_connections: int = 4
+    rate: float = 0.0  # mensagens/s da conta no provedor; 0 = sem limite
+    rate_burst: float = 10.0
+
+
+def parse_relays(spec: str) -> list[RelayConfig]:
+    """Lê ``SMTP_RELAYS``: lista JSON de objetos com os campos de ``RelayConfig``.
+
+    Ex.: ``[{"name": "a", "host": "smtp.a", "user": "u", "password": "p", "weight": 2}]``
+    """
+    if not spec.strip():
+        return []
+    try:
+        items = json.loads(spec)
+        relays = [RelayConfig(**item) for item in items]
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"SMTP_RELAYS inválido: {e}") from e
+    names = [r.name for r in relays]
+    if len(set(names)) != len(names):
+        raise ValueError("SMTP_RELAYS inválido: nomes repetidos")
+    if any(r.weight < 1 or r.max_connections < 1 for r in relays):
+        raise ValueError("SMTP_RELAYS inválido: weight e max_connections devem ser >= 1")
+    return relays
+
+
+@dataclass(eq=False)
+class Relay:
+    """Um relay SMTP com pool, limite de envio e circuit breaker próprios."""
+
+    name: str
+    pool: SmtpConnectionPool
+    limiter: SmtpRateLimiter
+    breaker: Optional[CircuitBreaker] = None
+    weight: int = 1
+    outstanding: int = 0  # tentativas em andamento
+    current: int = 0  # peso corrente do round-robin ponderado suave
+    counters: dict = field(default_factory=lambda: {"picked": 0, "errors": 0, "failovers": 0})
+
+    @property
+    def ejected(self) -> bool:
+        return self.breaker is not None and self.breaker.state == OPEN
+
+
+class RelayRouter:
+    """Escolhe o relay de cada tentativa de envio.
+
+    ``least_outstanding`` prefere o relay com menos tentativas em andamento por
+    unidade de peso; ``weighted`` reparte as tentativas na proporção dos pesos
+    (round-robin ponderado suave). Relay com o circuito aberto fica fora da
+    escolha até o breaker liberar chamadas de teste. ``exclude`` é evitado
+    enquanto houver outro relay (failover); se todos estiverem nele, vale
+    qualquer um.
+
+    Toda escolha de ``pick`` deve terminar em ``done``.
+    """
+
+    def __init__(
+        self,
+        relays: list[Relay],
+        strategy: str = "least_outstanding",
+        is_outage: Callable[[BaseException], bool] = lambda exc: True,
+    ):
+        if not relays:
+            raise ValueError("ao menos um relay SMTP")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"estratégia de roteamento desconhecida: {strategy}")
+        self.relays = list(relays)
+        self._strategy = strategy
+        self._is_outage = is_outage
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        """Conexões somadas de todos os relays."""
+        return sum(r.pool.max_size for r in self.relays)
+
+    def _ordered(self, candidates: list[Relay]) -> list[Relay]:
+        if self._strategy == "weighted":
+            for relay in candidates:
+                relay.current += relay.weight
+            return sorted(candidates, key=lambda r: -r.current)
+        return sorted(candidates, key=lambda r: (r.outstanding / r.weight, r.counters["picked"] / r.weight))
+
+    def pick(self, exclude: Collection[Relay] = ()) -> Relay:
+        """Relay liberado pelo breaker, ou ``CircuitOpenError`` se todos estão fora."""
+        with self._lock:
+            candidates = [r for r in self.relays if r not in exclude] or list(self.relays)
+            error: Optional[CircuitOpenError] = None
+            for relay in self._ordered(candidates):
+                if relay.breaker is not None:
+                    try:
+                        relay.breaker.allow()
+                    except CircuitOpenError as e:
+                        error = e if error is None or e.retry_after < error.retry_after else error
+                        continue
+                if self._strategy == "weighted":
+                    relay.current -= sum(r.weight for r in candidates)
+                relay.outstanding += 1
+                relay.counters["picked"] += 1
+                return relay
+            if self._strategy == "weighted":
+                for relay in candidates:
+                    relay.current -= relay.weight
+        raise CircuitOpenError("Nenhum relay SMTP disponível (circuitos abertos)", error.retry_after if error else 0.0)
+
+    def available(self, exclude: Collection[Relay] = ()) -> bool:
+        """Há relay fora de ``exclude`` que não está ejetado."""
+        return any(r not in exclude and not r.ejected for r in self.relays)
+
+    def done(self, relay: Relay, exc: Optional[BaseException] = None) -> None:
+        """Fecha a tentativa: libera a vaga e informa o resultado ao breaker do relay."""
+        with self._lock:
+            relay.outstanding -= 1
+            if exc is not None:
+                relay.counters["errors"] += 1
+        if relay.breaker is None:
+            return
+        if isinstance(exc, PoolTimeout):
+            relay.breaker.release()  # pool local esgotado: o relay não foi consultado
+        else:
+            relay.breaker.record(exc is None or not self._is_outage(exc))
+
+    def failover(self, relay: Relay) -> None:
+        with self._lock:
+            relay.counters["failovers"] += 1
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            out = [
+                {"name": r.name, "weight": r.weight, "outstanding": r.outstanding, **r.counters}
+                for r in self.relays
+            ]
+        for item, relay in zip(out, self.relays):
+            item["circuit"] = relay.breaker.state if relay.breaker is not None else None
+            item["pool"] = relay.pool.stats()
+            item["rate_limit"] = relay.limiter.stats()
+        return out
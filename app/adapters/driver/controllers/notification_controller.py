@@ -1,17 +1,226 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+import asyncio, hashlib, json, math, os
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field, ValidationError
+from infra.settings import settings
+from infra import metrics
 from app.domain.entities import NotificationInput
+from app.domain.ports import (
+    CircuitOpenError, IdempotencyConflictError, IdempotencyKeyMismatchError, IdempotencyStore, NotificationQueue,
+    Outbox, QueueFullError,
+)
 from app.domain.services.notification_service import NotificationService
-from app.adapters.driven.auth_gateway_http import HttpAuthGateway
-from app.adapters.driven.email_gateway_smtp import SmtpEmailGateway
-from app.adapters.driven.email_composer_default import DefaultEmailComposer
+from app.domain.services.delivery_workers import DeliveryWorkers
+from app.domain.services.digest import DigestAggregator
+from app.adapters.driven.auth_gateway_http import AsyncHttpAuthGateway
+from app.adapters.driven.auth_gateway_cached import CachingAuthGateway
+from app.adapters.driven.circuit_breaker import CircuitBreaker, CircuitBreakerAuthGateway
+from app.adapters.driven.single_flight import SingleFlightAuthGateway
+from app.adapters.driven.email_gateway_smtp import AsyncSmtpEmailGateway
+from app.adapters.driven.email_composer_default import AsyncDefaultEmailComposer
+from app.adapters.driven.queue_memory import InMemoryNotificationQueue
+from app.adapters.driven.queue_sqlite import SqliteNotificationQueue
+from app.adapters.driven.queue_lanes import Lane, LaneNotificationQueue, priority_classifier
+from app.adapters.driven.outbox_sqlite import SqliteOutbox
+from app.adapters.driven.idempotency_memory import InMemoryIdempotencyStore
+from app.adapters.driven.idempotency_sqlite import SqliteIdempotencyStore
 
 router = APIRouter()
 
-_auth = HttpAuthGateway()
-_email = SmtpEmailGateway()
-_composer = DefaultEmailComposer()
-_service = NotificationService(auth=_auth, email=_email, composer=_composer)
+metrics.configure(enabled=settings.METRICS_ENABLED, tracing=settings.METRICS_DDTRACE)
+
+_auth_http = AsyncHttpAuthGateway()
+_auth_breaker: Optional[CircuitBreaker] = (
+    CircuitBreaker(
+        "Serviço de clientes",
+        failure_rate=settings.AUTH_BREAKER_FAILURE_RATE,
+        window=settings.AUTH_BREAKER_WINDOW,
+        min_calls=settings.AUTH_BREAKER_MIN_CALLS,
+        cooldown=settings.AUTH_BREAKER_COOLDOWN,
+    )
+    if settings.AUTH_BREAKER_ENABLED else None
+)
+_auth_coalesced = SingleFlightAuthGateway(
+    CircuitBreakerAuthGateway(_auth_http, _auth_breaker) if _auth_breaker is not None else _auth_http
+)
+_auth = (
+    CachingAuthGateway(
+        _auth_coalesced,
+        max_size=settings.AUTH_CACHE_MAX_SIZE,
+        ttl=settings.AUTH_CACHE_TTL,
+        negative_ttl=settings.AUTH_CACHE_NEGATIVE_TTL,
+        stale_ttl=settings.AUTH_CACHE_STALE_TTL,
+    )
+    if settings.AUTH_CACHE_ENABLED else _auth_coalesced
+)
+
+def _auth_cache_stats() -> dict:
+    return _auth.stats() if isinstance(_auth, CachingAuthGateway) else {}
+
+if settings.AUTH_CACHE_ENABLED:
+    metrics.registry.collected(
+        "notification_auth_cache_total", "Consultas e remoções do cache de identidades", "counter",
+        lambda: {(k,): v for k, v in _auth_cache_stats().items() if k != "size"}, ("result",),
+    )
+    metrics.registry.collected(
+        "notification_auth_cache_entries", "Identidades no cache", "gauge",
+        lambda: {(): _auth_cache_stats().get("size", 0)},
+    )
+
+_email = AsyncSmtpEmailGateway()
+_composer = AsyncDefaultEmailComposer()
+
+def _durable_queue() -> bool:
+    """Com a fila SQLite quem reentrega é a fila (inflight volta a pending)."""
+    return settings.NOTIFY_MODE == "queue" and settings.NOTIFY_QUEUE_BACKEND == "sqlite"
+
+# com a fila durável o outbox só acumularia linhas pending que ninguém reenvia
+_outbox: Optional[Outbox] = (
+    SqliteOutbox(
+        settings.OUTBOX_PATH,
+        batch_size=settings.OUTBOX_BATCH_SIZE,
+        flush_interval=settings.OUTBOX_FLUSH_INTERVAL,
+    )
+    if settings.OUTBOX_ENABLED and not _durable_queue() else None
+)
+_service = NotificationService(auth=_auth, email=_email, composer=_composer, outbox=_outbox, stage=metrics.stage)
+_digest: Optional[DigestAggregator] = (
+    DigestAggregator(
+        _service,
+        window=settings.DIGEST_WINDOW,
+        max_wait=settings.DIGEST_MAX_WAIT,
+        max_items=settings.DIGEST_MAX_ITEMS,
+    )
+    if settings.DIGEST_ENABLED else None
+)
+
+def _build_idempotency() -> Optional[IdempotencyStore]:
+    if not settings.IDEMPOTENCY_ENABLED:
+        return None
+    if settings.IDEMPOTENCY_BACKEND == "sqlite":
+        return SqliteIdempotencyStore(
+            settings.IDEMPOTENCY_SQLITE_PATH,
+            ttl=settings.IDEMPOTENCY_TTL,
+            inflight_ttl=settings.IDEMPOTENCY_INFLIGHT_TTL,
+        )
+    return InMemoryIdempotencyStore(
+        max_size=settings.IDEMPOTENCY_MAX_SIZE,
+        ttl=settings.IDEMPOTENCY_TTL,
+        inflight_ttl=settings.IDEMPOTENCY_INFLIGHT_TTL,
+    )
+
+_idempotency = _build_idempotency()
+
+_queue: Optional[NotificationQueue] = None
+_workers: Optional[DeliveryWorkers] = None
+_replay: Optional[asyncio.Task] = None
+
+def _build_lane_queue(lane: Optional[str] = None) -> NotificationQueue:
+    if settings.NOTIFY_QUEUE_BACKEND == "sqlite":
+        path = settings.NOTIFY_QUEUE_SQLITE_PATH
+        if lane:
+            # um arquivo por faixa: notification_queue.db -> notification_queue.priority.db
+            base, ext = os.path.splitext(path)
+            path = f"{base}.{lane}{ext}"
+        return SqliteNotificationQueue(path, maxsize=settings.NOTIFY_QUEUE_MAXSIZE)
+    return InMemoryNotificationQueue(maxsize=settings.NOTIFY_QUEUE_MAXSIZE)
+
+def _build_queue() -> NotificationQueue:
+    if not settings.NOTIFY_LANES_ENABLED:
+        return _build_lane_queue()
+    classify = priority_classifier(
+        [s.strip() for s in settings.NOTIFY_PRIORITY_STATUSES.split(",") if s.strip()],
+        [int(u) for u in settings.NOTIFY_PRIORITY_USERS.split(",") if u.strip()],
+    )
+    return LaneNotificationQueue(
+        [
+            Lane("priority", _build_lane_queue("priority"), weight=settings.NOTIFY_LANE_PRIORITY_WEIGHT),
+            Lane("bulk", _build_lane_queue("bulk"), weight=settings.NOTIFY_LANE_BULK_WEIGHT),
+        ],
+        classify,
+    )
+
+async def startup() -> None:
+    global _queue, _workers, _replay
+    _auth_http.start()
+    # reenviar o outbox com a fila durável mandaria o mesmo e-mail duas vezes
+    if _outbox is not None and not _durable_queue():
+        # em segundo plano para não atrasar o startup com a reentrega
+        _replay = asyncio.create_task(_service.replay_pending(), name="outbox-replay")
+    if settings.NOTIFY_MODE != "queue":
+        return
+    _queue = _build_queue()
+    _workers = DeliveryWorkers(
+        _queue, _service, concurrency=settings.NOTIFY_WORKERS, digest=_digest, max_pending=settings.DIGEST_MAX_PENDING,
+    )
+    _workers.start()
+
+async def shutdown() -> None:
+    global _queue, _workers, _replay
+    if _replay is not None:
+        _replay.cancel()
+        await asyncio.gather(_replay, return_exceptions=True)
+        _replay = None
+    if _workers is not None:
+        await _workers.stop()
+    if _digest is not None:
+        await _digest.close()
+    # depois que os workers drenaram: nada mais envia nem grava no outbox. Os close()
+    # são reversíveis: um novo startup() no mesmo processo (ex.: testes) reabre tudo
+    _email.close()
+    if _outbox is not None and hasattr(_outbox, "close"):
+        _outbox.close()
+    if _idempotency is not None and hasattr(_idempotency, "close"):
+        _idempotency.close()
+    await _auth_http.aclose()
+    if _queue is not None and hasattr(_queue, "close"):
+        _queue.close()
+    _queue, _workers = None, None
+
+@router.get("/health/circuits")
+async def get_circuits():
+    """Estado dos circuit breakers das dependências (``null`` = desligado).
+
+    Com ``SMTP_RELAYS`` cada relay tem o seu breaker: ``smtp`` vira ``{relay: estado}``.
+    """
+    relays = _email.router.relays
+    if settings.SMTP_RELAYS:
+        smtp = {r.name: r.breaker.stats() if r.breaker is not None else None for r in relays}
+    else:
+        smtp = relays[0].breaker.stats() if relays[0].breaker is not None else None
+    return {
+        "auth": _auth_breaker.stats() if _auth_breaker is not None else None,
+        "smtp": smtp,
+    }
+
+@router.get("/health/relays")
+async def get_relays():
+    """Relays SMTP: peso, tentativas em andamento, erros, failovers, circuito, pool e
+    esperas do limite de envio (por nível: global, conexão e domínio)."""
+    return {"relays": _email.router.stats()}
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Histogramas de latência por etapa no formato texto do Prometheus."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/health/queue")
+async def get_queue():
+    """Profundidade da fila e, com faixas, contadores e latências por faixa."""
+    if _queue is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        # na fila SQLite qsize() é um COUNT(*): fora do event loop
+        "depth": await asyncio.to_thread(_queue.qsize),
+        "lanes": _queue.stats() if isinstance(_queue, LaneNotificationQueue) else None,
+        # a fila SQLite guarda as falhas na tabela; a em memória só as últimas
+        "failed": (
+            [{"id": notification_id, "error": error} for notification_id, error in _queue.failed]
+            if isinstance(_queue, InMemoryNotificationQueue) else None
+        ),
+    }
 
 class NotifyPayload(BaseModel):
     job_id: str = Field(..., description="ID do job")
@@ -20,16 +229,160 @@ class NotifyPayload(BaseModel):
     video_url: str | None = Field(None, description="Link do vídeo (em success)")
     error_message: str | None = Field(None, description="Detalhes do erro (em error)")
 
+def _to_input(p: NotifyPayload) -> NotificationInput:
+    return NotificationInput(
+        job_id=p.job_id,
+        status=p.status,
+        user_id=p.user_id,
+        video_url=p.video_url,
+        error_message=p.error_message,
+    )
+
+def _idempotency_key(p: NotifyPayload) -> str:
+    return f"{p.job_id}:{p.status}"
+
+def _fingerprint(p: NotifyPayload) -> str:
+    return hashlib.sha256(p.model_dump_json().encode()).hexdigest()
+
 @router.post("/notify")
-def post_notify(p: NotifyPayload):
+async def post_notify(
+    p: NotifyPayload,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, description="Padrão: <job_id>:<status>"),
+):
+    data = _to_input(p)
+    if _idempotency is None:
+        return await _notify(data, response)
+    # a repetição é resolvida aqui, antes de auth e SMTP
+    key = idempotency_key or _idempotency_key(p)
     try:
-        data = NotificationInput(
-            job_id=p.job_id,
-            status=p.status,
-            user_id=p.user_id,
-            video_url=p.video_url,
-            error_message=p.error_message,
-        )
-        return _service.execute(data)
+        previous = await _idempotency.begin(key, _fingerprint(p))
+    except IdempotencyKeyMismatchError as e:
+        raise HTTPException(422, str(e))
+    except IdempotencyConflictError as e:
+        raise HTTPException(409, str(e), headers={"Retry-After": "1"})
+    if previous is not None:
+        response.headers["Idempotent-Replayed"] = "true"
+        if settings.NOTIFY_MODE == "queue":
+            response.status_code = 202
+        return previous
+    try:
+        result = await _notify(data, response)
+    except BaseException:
+        await _idempotency.release(key)
+        raise
+    await _idempotency.complete(key, result)
+    return result
+
+async def _notify(data: NotificationInput, response: Response) -> dict:
+    if settings.NOTIFY_MODE == "queue":
+        return await _enqueue(data, response)
+    try:
+        if _digest is not None:
+            # a resposta espera o resumo do usuário sair (até DIGEST_MAX_WAIT)
+            return await _digest.submit(data)
+        return await _service.execute(data)
+    except CircuitOpenError as e:
+        raise HTTPException(503, str(e), headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))})
     except Exception as e:
         raise HTTPException(400, str(e))
+
+async def _enqueue(data: NotificationInput, response: Response) -> dict:
+    if _queue is None:
+        raise HTTPException(503, "Fila de notificações indisponível")
+    try:
+        notification_id = await _queue.put(data)
+    except QueueFullError as e:
+        raise HTTPException(429, str(e), headers={"Retry-After": "1"})
+    response.status_code = 202
+    return {"ok": True, "id": notification_id}
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, err['loc'])) or 'item'}: {err['msg']}" for err in e.errors())
+
+async def _ndjson_items(request: Request) -> AsyncIterator[object]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if buffer.strip():
+        yield json.loads(buffer)
+
+async def _batch_items(request: Request) -> list[object]:
+    try:
+        if "ndjson" in request.headers.get("content-type", ""):
+            items = []
+            async for item in _ndjson_items(request):
+                items.append(item)
+                if len(items) > settings.NOTIFY_BATCH_MAX_ITEMS:
+                    break
+        else:
+            items = await request.json()
+    except ValueError:
+        raise HTTPException(400, "Corpo do lote inválido")
+    if not isinstance(items, list):
+        raise HTTPException(400, "Lote deve ser uma lista de notificações")
+    if len(items) > settings.NOTIFY_BATCH_MAX_ITEMS:
+        raise HTTPException(413, f"Lote excede {settings.NOTIFY_BATCH_MAX_ITEMS} itens")
+    return items
+
+@router.post("/notify/batch")
+async def post_notify_batch(request: Request, response: Response):
+    """Aceita um array JSON ou NDJSON (``application/x-ndjson``) de ``NotifyPayload``."""
+    items = await _batch_items(request)
+    results: list[Optional[dict]] = [None] * len(items)
+    valid: list[tuple[int, NotificationInput]] = []
+    claimed: dict[int, str] = {}
+    for i, raw in enumerate(items):
+        try:
+            p = NotifyPayload.model_validate(raw)
+        except ValidationError as e:
+            job_id = raw.get("job_id") if isinstance(raw, dict) else None
+            results[i] = {"job_id": job_id, "ok": False, "error": _validation_message(e)}
+            continue
+        if _idempotency is not None:
+            key = _idempotency_key(p)
+            try:
+                previous = await _idempotency.begin(key, _fingerprint(p))
+            except IdempotencyConflictError as e:
+                results[i] = {"job_id": p.job_id, "ok": False, "error": str(e)}
+                continue
+            if previous is not None:
+                results[i] = {"job_id": p.job_id, **previous, "replayed": True}
+                continue
+            claimed[i] = key
+        valid.append((i, _to_input(p)))
+
+    try:
+        if settings.NOTIFY_MODE == "queue":
+            if _queue is None:
+                raise HTTPException(503, "Fila de notificações indisponível")
+            for i, data in valid:
+                try:
+                    results[i] = {"job_id": data.job_id, "ok": True, "id": await _queue.put(data)}
+                except QueueFullError as e:
+                    results[i] = {"job_id": data.job_id, "ok": False, "error": str(e)}
+            response.status_code = 202
+        elif valid:
+            delivered = await _service.execute_many([data for _, data in valid])
+            for (i, _), result in zip(valid, delivered):
+                results[i] = result
+    except BaseException:
+        # os já enfileirados ficam gravados; as outras chaves são liberadas para o retry
+        await _settle_claims(claimed, results)
+        raise
+
+    await _settle_claims(claimed, results)
+    return {"ok": all(r["ok"] for r in results), "results": results}
+
+async def _settle_claims(claimed: dict[int, str], results: list[Optional[dict]]) -> None:
+    """Grava o resultado dos itens entregues e libera as chaves dos que falharam."""
+    for i, key in claimed.items():
+        result = results[i]
+        if result is not None and result["ok"]:
+            await _idempotency.complete(key, {k: v for k, v in result.items() if k != "job_id"})
+        else:
+            await _idempotency.release(key)
@@ -7,6 +7,7 @@ Status = Literal["success", "error"]
 class Identity:
     email: str
     name: str
+    locale: Optional[str] = None
 
 @dataclass(frozen=True)
 class NotificationInput:
@@ -22,3 +23,9 @@ class EmailMessage:
     subject: str
     text: str
     html: str
+
+@dataclass(frozen=True)
+class QueuedNotification:
+    id: str
+    data: NotificationInput
+    enqueued_at: float
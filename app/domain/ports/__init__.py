@@ -1,17 +1,161 @@
 from abc import ABC, abstractmethod
-from app.domain.entities import Identity, NotificationInput, EmailMessage
+from typing import Iterable, Optional, Sequence, Union
+from app.domain.entities import Identity, NotificationInput, EmailMessage, QueuedNotification
+
+class IdentityNotFoundError(ValueError):
+    pass
+
+IdentityResult = Union[Identity, Exception]
 
 class AuthGateway(ABC):
     @abstractmethod
     def resolve_identity(self, user_id: id) -> Identity:
         ...
 
+    def resolve_identities(self, user_ids: Iterable[int]) -> dict[int, IdentityResult]:
+        """Resolve vários ids; falhas individuais vêm como a exceção no lugar da identidade."""
+        results: dict[int, IdentityResult] = {}
+        for user_id in dict.fromkeys(user_ids):
+            try:
+                results[user_id] = self.resolve_identity(user_id)
+            except Exception as e:
+                results[user_id] = e
+        return results
+
 class EmailGateway(ABC):
     @abstractmethod
     def send(self, message: EmailMessage) -> None:
         ...
 
+    def send_many(self, messages: Sequence[EmailMessage]) -> list[Optional[Exception]]:
+        """Envia várias mensagens; o resultado de cada uma é ``None`` (ok) ou a exceção."""
+        outcomes: list[Optional[Exception]] = []
+        for message in messages:
+            try:
+                self.send(message)
+                outcomes.append(None)
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
 class EmailComposer(ABC):
     @abstractmethod
     def compose(self, data: NotificationInput, identity: Identity) -> EmailMessage:
         ...
+
+    @abstractmethod
+    def compose_digest(self, items: Sequence[NotificationInput], identity: Identity) -> EmailMessage:
+        """Um único e-mail listando várias notificações do mesmo usuário."""
+
+class AsyncAuthGateway(ABC):
+    @abstractmethod
+    async def resolve_identity(self, user_id: int) -> Identity:
+        ...
+
+    async def resolve_identities(self, user_ids: Iterable[int]) -> dict[int, IdentityResult]:
+        results: dict[int, IdentityResult] = {}
+        for user_id in dict.fromkeys(user_ids):
+            try:
+                results[user_id] = await self.resolve_identity(user_id)
+            except Exception as e:
+                results[user_id] = e
+        return results
+
+class AsyncEmailGateway(ABC):
+    @abstractmethod
+    async def send(self, message: EmailMessage) -> None:
+        ...
+
+    async def send_many(self, messages: Sequence[EmailMessage]) -> list[Optional[Exception]]:
+        outcomes: list[Optional[Exception]] = []
+        for message in messages:
+            try:
+                await self.send(message)
+                outcomes.append(None)
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
+class AsyncEmailComposer(ABC):
+    @abstractmethod
+    async def compose(self, data: NotificationInput, identity: Identity) -> EmailMessage:
+        ...
+
+    @abstractmethod
+    async def compose_digest(self, items: Sequence[NotificationInput], identity: Identity) -> EmailMessage:
+        ...
+
+class QueueFullError(Exception):
+    pass
+
+class CircuitOpenError(RuntimeError):
+    """Dependência marcada como fora do ar pelo circuit breaker; nada foi tentado."""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class NotificationQueue(ABC):
+    @abstractmethod
+    async def put(self, data: NotificationInput) -> str:
+        """Enfileira e retorna o id; levanta ``QueueFullError`` se não houver espaço."""
+
+    @abstractmethod
+    async def get(self) -> QueuedNotification:
+        ...
+
+    @abstractmethod
+    async def poll(self) -> Optional[QueuedNotification]:
+        """Como ``get``, mas retorna ``None`` na hora se não houver item."""
+
+    @abstractmethod
+    async def ack(self, notification_id: str) -> None:
+        ...
+
+    @abstractmethod
+    async def fail(self, notification_id: str, error: str) -> None:
+        ...
+
+    @abstractmethod
+    def qsize(self) -> int:
+        ...
+
+class Outbox(ABC):
+    @abstractmethod
+    async def record(self, data: NotificationInput) -> str:
+        """Grava a notificação de forma durável antes da entrega e retorna o id."""
+
+    @abstractmethod
+    async def mark_delivered(self, entry_id: str) -> None:
+        ...
+
+    @abstractmethod
+    async def mark_failed(self, entry_id: str, error: str) -> None:
+        ...
+
+    @abstractmethod
+    async def pending(self) -> list[QueuedNotification]:
+        """Entradas gravadas que não chegaram a ser entregues nem falharam."""
+
+class IdempotencyConflictError(Exception):
+    """A chave está reservada por uma requisição ainda em processamento."""
+
+class IdempotencyKeyMismatchError(IdempotencyConflictError):
+    """A chave já foi usada com outro conteúdo."""
+
+class IdempotencyStore(ABC):
+    @abstractmethod
+    async def begin(self, key: str, fingerprint: str) -> Optional[dict]:
+        """Reserva a chave e retorna ``None``; se já concluída, retorna o resultado gravado.
+
+        Levanta ``IdempotencyConflictError`` se ela estiver em processamento e
+        ``IdempotencyKeyMismatchError`` se ``fingerprint`` não bater.
+        """
+
+    @abstractmethod
+    async def complete(self, key: str, result: dict) -> None:
+        ...
+
+    @abstractmethod
+    async def release(self, key: str) -> None:
+        """Libera a reserva sem gravar resultado (falha: a repetição tenta de novo)."""
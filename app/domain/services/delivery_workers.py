@@ -0,0 +1,97 @@
+import asyncio, logging
+from typing import Optional
+from app.domain.ports import CircuitOpenError, NotificationQueue
+from app.domain.services.notification_service import NotificationService
+from app.domain.services.digest import DigestAggregator
+
+logger = logging.getLogger(__name__)
+
+class DeliveryWorkers:
+    """Pool de tarefas asyncio que drena a fila pelo ``NotificationService``.
+
+    Com ``digest``, o worker entrega o item ao agregador e já pega o próximo:
+    até ``max_pending`` itens ficam aguardando o envio do resumo (ack/fail
+    acontecem quando ele sai).
+    """
+
+    def __init__(
+        self,
+        queue: NotificationQueue,
+        service: NotificationService,
+        concurrency: int = 4,
+        min_defer: float = 0.5,
+        digest: Optional[DigestAggregator] = None,
+        max_pending: int = 1000,
+    ):
+        self._queue = queue
+        self._service = service
+        self._concurrency = concurrency
+        self._min_defer = min_defer
+        self._digest = digest
+        self._max_pending = max_pending
+        self._pending: Optional[asyncio.Semaphore] = None
+        self._held: set[asyncio.Task] = set()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._pending = asyncio.Semaphore(self._max_pending)
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"delivery-worker-{i}")
+            for i in range(self._concurrency)
+        ]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._digest is not None:
+            await self._digest.close()
+        if self._held:
+            # resumos já enviados: deixa os itens confirmarem antes de cancelar o resto
+            _, late = await asyncio.wait(set(self._held), timeout=1.0)
+            for t in late:
+                t.cancel()
+            await asyncio.gather(*late, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            item = await self._queue.get()
+            if self._digest is None:
+                await self.deliver(item.id, item.data)
+                continue
+            await self._pending.acquire()
+            task = asyncio.create_task(self.deliver(item.id, item.data))
+            self._held.add(task)
+            task.add_done_callback(self._release)
+
+    def _release(self, task: asyncio.Task) -> None:
+        self._held.discard(task)
+        self._pending.release()
+
+    async def deliver(self, notification_id: str, data) -> Optional[dict]:
+        while True:
+            try:
+                if self._digest is not None:
+                    result = await self._digest.submit(data)
+                else:
+                    result = await self._service.execute(data)
+                break
+            except asyncio.CancelledError:
+                raise
+            except CircuitOpenError as e:
+                # dependência fora do ar: o item espera o cooldown em vez de virar falha
+                logger.info("notificação %s adiada: %s", notification_id, e)
+                await asyncio.sleep(max(e.retry_after, self._min_defer))
+            except Exception as e:
+                logger.warning("notificação %s falhou: %s", notification_id, e)
+                await self._queue.fail(notification_id, str(e))
+                return None
+        await self._queue.ack(notification_id)
+        return result
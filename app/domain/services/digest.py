@@ -0,0 +1,118 @@
+import asyncio, logging, time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+from app.domain.entities import NotificationInput
+from app.domain.services.notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class _Batch:
+    deadline: float  # limite de espera contado a partir do primeiro item
+    due: float = 0.0  # quando o lote sai se nada mais chegar
+    items: list[tuple[NotificationInput, asyncio.Future]] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+class DigestAggregator:
+    """Junta as notificações do mesmo ``user_id`` num único e-mail de resumo.
+
+    Cada item novo adia o envio do lote em ``window`` segundos, até no máximo
+    ``max_wait`` depois do primeiro; com ``max_items`` itens o lote sai na hora.
+    Lote de um item só vira o e-mail normal. Os prazos são medidos por ``clock``;
+    o timer do loop só acorda ``flush_due``, que também pode ser chamado à mão.
+    """
+
+    def __init__(
+        self,
+        service: NotificationService,
+        *,
+        window: float = 5.0,
+        max_wait: float = 60.0,
+        max_items: int = 20,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._service = service
+        self._clock = clock
+        self._window = window
+        self._max_wait = max(window, max_wait)
+        self._max_items = max(1, max_items)
+        self._batches: dict[int, _Batch] = {}
+        self._sending: set[asyncio.Task] = set()
+        self._stats = {"items": 0, "emails": 0}
+
+    def stats(self) -> dict:
+        return {**self._stats, "waiting": sum(len(b.items) for b in self._batches.values())}
+
+    def add(self, data: NotificationInput) -> asyncio.Future:
+        """Coloca o item no lote do usuário; o future recebe o resultado do envio."""
+        loop = asyncio.get_running_loop()
+        now = self._clock()
+        batch = self._batches.get(data.user_id)
+        if batch is None:
+            batch = self._batches[data.user_id] = _Batch(deadline=now + self._max_wait)
+        future = loop.create_future()
+        batch.items.append((data, future))
+        self._stats["items"] += 1
+        if batch.timer is not None:
+            batch.timer.cancel()
+        if len(batch.items) >= self._max_items:
+            self._flush(data.user_id)
+        else:
+            batch.due = min(now + self._window, batch.deadline)
+            batch.timer = loop.call_later(batch.due - now, self._expire, data.user_id)
+        return future
+
+    def flush_due(self) -> int:
+        """Envia os lotes cujo prazo já passou; retorna quantos saíram."""
+        now = self._clock()
+        due = [user_id for user_id, batch in self._batches.items() if batch.due <= now]
+        for user_id in due:
+            self._flush(user_id)
+        return len(due)
+
+    def _expire(self, user_id: int) -> None:
+        batch = self._batches.get(user_id)
+        if batch is None:
+            return
+        remaining = batch.due - self._clock()
+        if remaining > 0:  # o timer do loop pode acordar um pouco antes do prazo
+            batch.timer = asyncio.get_running_loop().call_later(remaining, self._expire, user_id)
+        else:
+            self._flush(user_id)
+
+    async def submit(self, data: NotificationInput) -> dict:
+        return await self.add(data)
+
+    def _flush(self, user_id: int) -> None:
+        batch = self._batches.pop(user_id, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        task = asyncio.create_task(self._send(batch.items), name=f"digest-{user_id}")
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, items: list[tuple[NotificationInput, asyncio.Future]]) -> None:
+        self._stats["emails"] += 1
+        try:
+            result = await self._service.execute_digest([data for data, _ in items])
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except BaseException:
+            for _, future in items:
+                future.cancel()
+            raise
+        for _, future in items:
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self) -> None:
+        """Envia na hora os lotes que estavam esperando e aguarda os envios em curso."""
+        for user_id in list(self._batches):
+            self._flush(user_id)
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
@@ -1,15 +1,129 @@
+import asyncio, contextlib, logging
+from typing import Callable, ContextManager, Optional
 from app.domain.entities import NotificationInput, EmailMessage
-from app.domain.ports import AuthGateway, EmailGateway, EmailComposer
+from app.domain.ports import AsyncAuthGateway, AsyncEmailGateway, AsyncEmailComposer, Outbox
+
+logger = logging.getLogger(__name__)
+
+_NOOP = contextlib.nullcontext()
+
+def _no_stage(name: str) -> ContextManager:
+    return _NOOP
 
 class NotificationService:
-    def __init__(self, auth: AuthGateway, email: EmailGateway, composer: EmailComposer):
+    """``stage(nome)`` devolve um context manager que mede cada etapa
+    (``auth``, ``compose``, ``send``); por padrão não mede nada."""
+
+    def __init__(
+        self,
+        auth: AsyncAuthGateway,
+        email: AsyncEmailGateway,
+        composer: AsyncEmailComposer,
+        outbox: Optional[Outbox] = None,
+        stage: Callable[[str], ContextManager] = _no_stage,
+    ):
         self._auth = auth
         self._email = email
         self._composer = composer
+        self._outbox = outbox
+        self._stage = stage
+
+    async def execute(self, data: NotificationInput) -> dict:
+        if self._outbox is None:
+            return await self._deliver(data)
+        entry_id = await self._outbox.record(data)
+        return await self._deliver_recorded(entry_id, data)
+
+    async def execute_many(self, items: list[NotificationInput]) -> list[dict]:
+        """Entrega um lote: identidades resolvidas de uma vez e envios concorrentes.
+
+        Retorna um resultado por item, na mesma ordem; falhas não interrompem o lote.
+        """
+        results: list[dict] = [{"job_id": d.job_id, "ok": True} for d in items]
+        entry_ids: list[Optional[str]] = [None] * len(items)
+        if self._outbox is not None:
+            entry_ids = list(await asyncio.gather(*(self._outbox.record(d) for d in items)))
+
+        with self._stage("auth"):
+            identities = await self._auth.resolve_identities([d.user_id for d in items])
+        pending: list[tuple[int, EmailMessage]] = []
+        for i, data in enumerate(items):
+            try:
+                identity = identities[data.user_id]
+                if isinstance(identity, Exception):
+                    raise identity
+                with self._stage("compose"):
+                    pending.append((i, await self._composer.compose(data, identity)))
+            except Exception as e:
+                results[i] = {"job_id": data.job_id, "ok": False, "error": str(e)}
+
+        sent = []
+        if pending:
+            with self._stage("send"):
+                sent = await self._email.send_many([m for _, m in pending])
+        for (i, _), outcome in zip(pending, sent):
+            if outcome is not None:
+                results[i] = {"job_id": items[i].job_id, "ok": False, "error": str(outcome)}
+
+        if self._outbox is not None:
+            await asyncio.gather(*(
+                self._outbox.mark_delivered(entry_id) if result["ok"]
+                else self._outbox.mark_failed(entry_id, result["error"])
+                for entry_id, result in zip(entry_ids, results)
+            ))
+        return results
+
+    async def execute_digest(self, items: list[NotificationInput]) -> dict:
+        """Entrega várias notificações do mesmo usuário num único e-mail de resumo.
+
+        O resultado (ou a exceção) vale para todos os itens: é um só envio.
+        """
+        if len(items) == 1:
+            return await self.execute(items[0])
+        entry_ids: list[str] = []
+        if self._outbox is not None:
+            entry_ids = list(await asyncio.gather(*(self._outbox.record(d) for d in items)))
+        try:
+            with self._stage("auth"):
+                identity = await self._auth.resolve_identity(items[0].user_id)
+            with self._stage("compose"):
+                message = await self._composer.compose_digest(items, identity)
+            with self._stage("send"):
+                await self._email.send(message)
+        except Exception as e:
+            await asyncio.gather(*(self._outbox.mark_failed(entry_id, str(e)) for entry_id in entry_ids))
+            raise
+        await asyncio.gather(*(self._outbox.mark_delivered(entry_id) for entry_id in entry_ids))
+        return {"ok": True, "digest": len(items)}
+
+    async def replay_pending(self) -> int:
+        """Reentrega o que ficou gravado no outbox sem confirmação (ex.: queda do processo)."""
+        if self._outbox is None:
+            return 0
+        replayed = 0
+        for entry in await self._outbox.pending():
+            try:
+                await self._deliver_recorded(entry.id, entry.data)
+                replayed += 1
+            except Exception as e:
+                logger.warning("reentrega de %s falhou: %s", entry.id, e)
+        return replayed
+
+    async def _deliver_recorded(self, entry_id: str, data: NotificationInput) -> dict:
+        try:
+            result = await self._deliver(data)
+        except Exception as e:
+            await self._outbox.mark_failed(entry_id, str(e))
+            raise
+        await self._outbox.mark_delivered(entry_id)
+        return result
 
-    def execute(self, data: NotificationInput) -> dict:
-        identity = self._auth.resolve_identity(data.user_id)
-        print(identity)
-        message: EmailMessage = self._composer.compose(data, identity)
-        self._email.send(message)
+    async def _deliver(self, data: NotificationInput) -> dict:
+        with self._stage("auth"):
+            identity = await self._auth.resolve_identity(data.user_id)
+        logger.debug("notificação %s (%s) para %s", data.job_id, data.status, identity.email)
+        with self._stage("compose"):
+            message: EmailMessage = await self._composer.compose(data, identity)
+        with self._stage("send"):
+            await self._email.send(message)
         return {"ok": True}
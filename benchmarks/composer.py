@@ -0,0 +1,100 @@
+"""Microbenchmark: composição com templates compilados x f-strings fixas.
+
+Uso: python -m benchmarks.composer [iterações]
+"""
+import sys, timeit
+
+from app.adapters.driven.email_composer_default import DefaultEmailComposer, TEMPLATE_VARIABLES
+from app.adapters.driven.email_templates import DEFAULT_ROOT, compile_template
+from app.domain.entities import EmailMessage, Identity, NotificationInput
+
+
+def fstring_compose(data: NotificationInput, identity: Identity) -> EmailMessage:
+    """Implementação anterior aos templates, mantida só como referência."""
+    name = identity.name
+    job_id = data.job_id
+    if data.status == "success":
+        subject = f"Seu vídeo foi processado (#{job_id})"
+        link_txt = f"Link: {data.video_url}\n" if data.video_url else ""
+        text = (
+            f"Olá, {name}!\n\n"
+            f"Seu vídeo (job {job_id}) foi processado com sucesso.\n"
+            f"{link_txt}\nObrigado por usar nosso serviço."
+        )
+        html_link = f'<p><a href="{data.video_url}">Abrir vídeo</a></p>' if data.video_url else ""
+        html = (
+            f"<p>Olá, <strong>{name}</strong>!</p>"
+            f"<p>Seu vídeo (job <strong>{job_id}</strong>) foi processado com sucesso.</p>"
+            f"{html_link}"
+            f"<p>Obrigado por usar nosso serviço.</p>"
+        )
+    else:
+        subject = f"Falha ao processar seu vídeo (#{job_id})"
+        detail = data.error_message or "não informado."
+        text = (
+            f"Olá, {name}!\n\n"
+            f"Ocorreu um erro ao processar seu vídeo (job {job_id}).\n"
+            f"Detalhes: {detail}\n\n"
+            f"Tente novamente mais tarde."
+        )
+        html = (
+            f"<p>Olá, <strong>{name}</strong>!</p>"
+            f"<p><strong>Falha</strong> ao processar seu vídeo (job <strong>{job_id}</strong>).</p>"
+            f"<p>Detalhes: {detail}</p>"
+            f"<p>Tente novamente mais tarde.</p>"
+        )
+    return EmailMessage(to=identity.email, subject=subject, text=text.strip(), html=html.strip())
+
+
+CASES = [
+    (NotificationInput(job_id="42", status="success", user_id=1, video_url="https://cdn.example.com/v/42.mp4"),
+     Identity(email="ana@example.com", name="Ana Souza")),
+    (NotificationInput(job_id="43", status="error", user_id=2, error_message="Falha no encoder"),
+     Identity(email="joao@example.com", name="João")),
+]
+
+
+def run(number: int = 100_000) -> dict[str, float]:
+    """Microssegundos por composição de cada implementação (melhor de 5 rodadas)."""
+    composer = DefaultEmailComposer()
+
+    def templated():
+        for data, identity in CASES:
+            composer.compose(data, identity)
+
+    def fstrings():
+        for data, identity in CASES:
+            fstring_compose(data, identity)
+
+    calls = number * len(CASES)
+    best = {"fstring": float("inf"), "template": float("inf")}
+    # rodadas intercaladas: ruído da máquina afeta as duas implementações igualmente
+    for _ in range(5):
+        for name, fn in (("fstring", fstrings), ("template", templated)):
+            best[name] = min(best[name], timeit.timeit(fn, number=number) / calls * 1e6)
+    return best
+
+
+def escaping_overhead(number: int = 100_000) -> dict[str, float]:
+    """Nanossegundos por render do HTML de sucesso com e sem escape/saneamento de URL."""
+    with open(f"{DEFAULT_ROOT}/pt_BR/success/body.html", encoding="utf-8") as f:
+        source = f.read()
+    raw = compile_template(source.replace("|url", ""), TEMPLATE_VARIABLES)
+    safe = compile_template(source, TEMPLATE_VARIABLES, escape=True)
+    args = ("Ana Souza", "42", "https://cdn.example.com/v/42.mp4", "")
+    best = {"raw": float("inf"), "escaped": float("inf")}
+    for _ in range(5):
+        for name, fn in (("raw", raw), ("escaped", safe)):
+            best[name] = min(best[name], timeit.timeit(lambda: fn(*args), number=number) / number * 1e9)
+    return best
+
+
+if __name__ == "__main__":
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    results = run(number)
+    for name, us in results.items():
+        print(f"{name:>9}: {us:.3f} us/compose")
+    print(f"    ratio: {results['template'] / results['fstring']:.2f}x")
+    html = escaping_overhead(number)
+    print(f"html raw: {html['raw']:.0f} ns, escaped: {html['escaped']:.0f} ns "
+          f"(+{html['escaped'] - html['raw']:.0f} ns/mensagem)")
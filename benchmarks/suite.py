@@ -0,0 +1,198 @@
+"""Suíte de microbenchmarks do caminho quente, com baseline e limite de regressão.
+
+Cada benchmark roda ``rounds`` rodadas de ``number`` operações e guarda o
+melhor tempo por operação (o menos afetado por ruído da máquina). O resultado
+é comparado com ``benchmarks/baseline.json``: se algum ficar mais de
+``threshold`` mais lento, o processo sai com código 1.
+
+O baseline depende da máquina e por isso não é versionado: gere-o (``--save``)
+no mesmo ambiente em que a comparação vai rodar. No CI (job ``benchmarks``) ele
+é medido no commit base, no próprio runner, antes de rodar a suíte no commit atual.
+
+Uso: python -m benchmarks.suite [--save] [--threshold 0.25] [--only compose,mime_encode] [--quick] [--rounds 7]
+"""
+import argparse, asyncio, json, os, platform, sys, time
+from typing import Callable, Optional
+
+from app.adapters.driven.email_composer_default import AsyncDefaultEmailComposer, DefaultEmailComposer
+from app.adapters.driven.mime_encoder import MimeEncoder
+from app.domain.entities import EmailMessage, Identity
+from app.domain.ports import AsyncAuthGateway, AsyncEmailGateway
+from app.domain.services.notification_service import NotificationService
+from benchmarks.composer import CASES
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+FROM = "Serviço de Vídeos <noreply@example.com>"
+
+PAYLOADS = [
+    {"job_id": "42", "status": "success", "user_id": 1, "video_url": "https://cdn.example.com/v/42.mp4"},
+    {"job_id": "43", "status": "error", "user_id": 2, "error_message": "Falha no encoder"},
+]
+
+
+class MemoryAuth(AsyncAuthGateway):
+    def __init__(self):
+        self._identities = {data.user_id: identity for data, identity in CASES}
+
+    async def resolve_identity(self, user_id: int) -> Identity:
+        return self._identities[user_id]
+
+
+class MemoryEmail(AsyncEmailGateway):
+    """Serializa como o gateway SMTP faria e descarta."""
+
+    def __init__(self):
+        self._encoder = MimeEncoder(FROM)
+        self.sent = 0
+
+    async def send(self, message: EmailMessage) -> None:
+        self._encoder.encode(message)
+        self.sent += 1
+
+
+# cada benchmark: fábrica de uma função f(n) que executa n operações
+def _compose() -> Callable[[int], None]:
+    composer = DefaultEmailComposer()
+
+    def run(n: int) -> None:
+        for i in range(n):
+            composer.compose(*CASES[i & 1])
+    return run
+
+
+def _mime_encode() -> Callable[[int], None]:
+    encoder = MimeEncoder(FROM)
+    composer = DefaultEmailComposer()
+    messages = [composer.compose(data, identity) for data, identity in CASES]
+
+    def run(n: int) -> None:
+        for i in range(n):
+            encoder.encode(messages[i & 1])
+    return run
+
+
+def _payload_validation() -> Callable[[int], None]:
+    from app.adapters.driver.controllers.notification_controller import NotifyPayload
+
+    def run(n: int) -> None:
+        for i in range(n):
+            NotifyPayload.model_validate(PAYLOADS[i & 1])
+    return run
+
+
+def _notification_input() -> Callable[[int], None]:
+    from app.adapters.driver.controllers.notification_controller import NotifyPayload, _to_input
+    payloads = [NotifyPayload.model_validate(p) for p in PAYLOADS]
+
+    def run(n: int) -> None:
+        for i in range(n):
+            _to_input(payloads[i & 1])
+    return run
+
+
+def _service_execute() -> Callable[[int], None]:
+    service = NotificationService(auth=MemoryAuth(), email=MemoryEmail(), composer=AsyncDefaultEmailComposer())
+    items = [data for data, _ in CASES]
+
+    async def many(n: int) -> None:
+        for i in range(n):
+            await service.execute(items[i & 1])
+
+    def run(n: int) -> None:
+        asyncio.run(many(n))
+    return run
+
+
+BENCHMARKS: dict[str, tuple[Callable[[], Callable[[int], None]], int]] = {
+    "compose": (_compose, 20_000),
+    "mime_encode": (_mime_encode, 20_000),
+    "payload_validation": (_payload_validation, 50_000),
+    "notification_input": (_notification_input, 100_000),
+    "service_execute": (_service_execute, 10_000),
+}
+
+
+def measure(factory: Callable[[], Callable[[int], None]], number: int, rounds: int = 5) -> float:
+    """Nanossegundos por operação: melhor de ``rounds`` rodadas de ``number`` operações."""
+    fn = factory()
+    fn(max(1, number // 10))  # aquecimento: caches de template, imports preguiçosos
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(number)
+        best = min(best, time.perf_counter() - start)
+    return best / number * 1e9
+
+
+def run(only: Optional[list[str]] = None, scale: float = 1.0, rounds: int = 5) -> dict[str, float]:
+    names = only or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Benchmarks desconhecidos: {', '.join(sorted(unknown))}")
+    return {
+        name: measure(BENCHMARKS[name][0], max(1, int(BENCHMARKS[name][1] * scale)), rounds)
+        for name in names
+    }
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], threshold: float) -> dict[str, dict]:
+    """Razão atual/baseline por benchmark; ``regression`` quando passa de ``1 + threshold``."""
+    report = {}
+    for name, ns in results.items():
+        base = baseline.get(name)
+        ratio = ns / base if base else None
+        report[name] = {
+            "ns_per_op": ns,
+            "baseline": base,
+            "ratio": ratio,
+            "regression": ratio is not None and ratio > 1 + threshold,
+        }
+    return report
+
+
+def load_baseline(path: str = BASELINE) -> dict[str, float]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return {name: entry["ns_per_op"] for name, entry in json.load(f)["benchmarks"].items()}
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results: dict[str, float], path: str = BASELINE) -> None:
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": {name: {"ns_per_op": round(ns, 1)} for name, ns in results.items()},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Microbenchmarks do caminho quente")
+    p.add_argument("--save", action="store_true", help="grava o resultado como novo baseline")
+    p.add_argument("--threshold", type=float, default=0.25, help="lentidão tolerada (0.25 = 25%%)")
+    p.add_argument("--only", default="", help="nomes separados por vírgula")
+    p.add_argument("--quick", action="store_true", help="10%% das operações, para smoke test")
+    p.add_argument("--rounds", type=int, default=7)
+    p.add_argument("--baseline", default=BASELINE)
+    args = p.parse_args(argv)
+
+    only = [n.strip() for n in args.only.split(",") if n.strip()] or None
+    results = run(only, scale=0.1 if args.quick else 1.0, rounds=args.rounds)
+    if args.save:
+        save_baseline({**load_baseline(args.baseline), **results}, args.baseline)
+    report = compare(results, load_baseline(args.baseline), args.threshold)
+    for name, r in report.items():
+        if r["baseline"] is None:
+            status, vs = "sem baseline", ""
+        else:
+            status = "REGRESSÃO" if r["regression"] else "ok"
+            vs = f"{r['ratio']:.2f}x do baseline ({r['baseline']:.0f} ns)"
+        print(f"{name:>20}: {r['ns_per_op']:>10.0f} ns/op  {vs}  {status}")
+    return 1 if any(r["regression"] for r in report.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""Benchmark do caminho composer -> bytes no fio: compõe, serializa e aplica o
+dot-stuffing do DATA, como o SMTP faz antes de escrever no socket.
+
+Compara o ``MIMEMultipart.as_string()`` usado antes com o ``MimeEncoder``.
+
+Uso: python -m benchmarks.wire [mensagens]
+"""
+import sys, time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from app.adapters.driven.email_composer_default import DefaultEmailComposer
+from app.adapters.driven.mime_encoder import MimeEncoder
+from app.adapters.driven.smtp_pipeline import dot_stuff
+from benchmarks.composer import CASES
+
+FROM = "Serviço de Vídeos <noreply@example.com>"
+
+
+def mime_multipart(msg) -> bytes:
+    """Serialização anterior ao ``MimeEncoder``, mantida só como referência."""
+    m = MIMEMultipart("alternative")
+    m["Subject"] = msg.subject
+    m["From"] = FROM
+    m["To"] = msg.to
+    m.attach(MIMEText(msg.text, "plain", "utf-8"))
+    m.attach(MIMEText(msg.html, "html", "utf-8"))
+    return m.as_string().encode("ascii")
+
+
+def run(number: int = 5_000) -> dict[str, dict[str, float]]:
+    composer = DefaultEmailComposer()
+    encoder = MimeEncoder(FROM)
+    results = {}
+    for name, serialize in (("mime_multipart", mime_multipart), ("mime_encoder", encoder.encode)):
+        best = float("inf")
+        for _ in range(3):
+            total = 0
+            start = time.perf_counter()
+            for i in range(number):
+                data, identity = CASES[i % len(CASES)]
+                total += len(dot_stuff(serialize(composer.compose(data, identity))))
+            best = min(best, time.perf_counter() - start)
+        results[name] = {"msgs_per_s": number / best, "mb_per_s": total / best / 1e6}
+    return results
+
+
+if __name__ == "__main__":
+    for name, r in run(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000).items():
+        print(f"{name:>15}: {r['msgs_per_s']:>9.0f} msgs/s  {r['mb_per_s']:.2f} MB/s")
@@ -0,0 +1,199 @@
+import copy, importlib.util, json, logging, queue, random, re, sys, threading, time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable, Iterable, Optional
+
+_EMAIL = re.compile(r"([A-Za-z0-9._%+-])[A-Za-z0-9._%+-]*@([A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)+)")
+# atributos que todo LogRecord tem; o resto veio de ``extra=`` e entra no JSON
+_RESERVED = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class Redactor:
+    """Mascara e-mails (``u***@dominio``) e troca os segredos informados por ``***``."""
+
+    def __init__(self, secrets: Iterable[str] = ()):
+        # os mais longos primeiro: um segredo que contém outro é trocado inteiro
+        self._secrets = sorted({s for s in secrets if s}, key=len, reverse=True)
+
+    def __call__(self, text: str) -> str:
+        for secret in self._secrets:
+            text = text.replace(secret, "***")
+        return _EMAIL.sub(r"\1***@\2", text)
+
+
+class RedactingFilter(logging.Filter):
+    """Aplica o ``Redactor`` à mensagem já formatada, ao traceback e aos extras em texto."""
+
+    def __init__(self, redactor: Redactor):
+        super().__init__()
+        self._redact = redactor
+        self._formatter = logging.Formatter()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.msg = self._redact(record.getMessage())
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._formatter.formatException(record.exc_info)
+            record.exc_info = None
+        if record.exc_text:
+            record.exc_text = self._redact(record.exc_text)
+        for key, value in vars(record).items():
+            if key not in _RESERVED and isinstance(value, str):
+                setattr(record, key, self._redact(value))
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Deixa passar só uma fração dos eventos abaixo de WARNING.
+
+    A taxa é escolhida pelo ``extra={"event": ...}`` do registro ou pelo nome do
+    logger (o prefixo mais longo em ``rates`` vence); sem taxa, tudo passa.
+    """
+
+    def __init__(self, rates: dict[str, float], rng: Callable[[], float] = random.random):
+        super().__init__()
+        self._rates = sorted(rates.items(), key=lambda kv: len(kv[0]), reverse=True)
+        self._rng = rng
+
+    def _rate(self, record: logging.LogRecord) -> float:
+        event = getattr(record, "event", None)
+        for key, rate in self._rates:
+            if key == event or record.name == key or record.name.startswith(key + "."):
+                return rate
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record)
+        return rate >= 1.0 or self._rng() < rate
+
+
+class TraceContextFilter(logging.Filter):
+    """Anexa ``trace_id``/``span_id`` do span ativo do ddtrace (na thread que loga)."""
+
+    def __init__(self, tracer=None):
+        super().__init__()
+        self._tracer = tracer
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        span = self._tracer.current_span() if self._tracer is not None else None
+        if span is not None:
+            record.trace_id = str(span.trace_id)
+            record.span_id = str(span.span_id)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro: ts, level, logger, msg, extras e traceback."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED:
+                out[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Enfileira sem bloquear: com a fila cheia o registro é descartado e contado."""
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # os filtros já resolveram mensagem e traceback; a formatação fica na thread do listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_rates(spec: str) -> dict[str, float]:
+    """``"nome=0.1,outro=0.5"`` -> ``{"nome": 0.1, "outro": 0.5}``."""
+    rates = {}
+    for item in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+def _ddtrace_tracer():
+    if importlib.util.find_spec("ddtrace") is None:
+        return None
+    from ddtrace import tracer
+    return tracer
+
+
+# bibliotecas que logam uma linha por requisição em INFO (ex.: "HTTP Request: GET ...")
+QUIET_LOGGERS = ("httpx", "httpcore")
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[DroppingQueueHandler] = None
+_lock = threading.Lock()
+
+
+def configure(
+    *,
+    level: str = "INFO",
+    json_format: bool = True,
+    queue_size: int = 10000,
+    sample_rates: Optional[dict[str, float]] = None,
+    secrets: Iterable[str] = (),
+    stream=None,
+) -> DroppingQueueHandler:
+    """Instala no logger raiz o handler de fila; a escrita acontece numa thread à parte.
+
+    Chamar de novo troca a configuração anterior. Os loggers de ``QUIET_LOGGERS``
+    ficam em WARNING (ou no nível pedido, se for maior).
+    """
+    global _listener, _handler
+    target = logging.StreamHandler(stream or sys.stdout)
+    target.setFormatter(JsonFormatter() if json_format else logging.Formatter(
+        "%(asctime)s %(levelname)s %(name)s: %(message)s"
+    ))
+    handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    handler.addFilter(SamplingFilter(sample_rates or {}))
+    handler.addFilter(TraceContextFilter(_ddtrace_tracer()))
+    handler.addFilter(RedactingFilter(Redactor(secrets)))
+    listener = QueueListener(handler.queue, target, respect_handler_level=False)
+    with _lock:
+        _stop()
+        root = logging.getLogger()
+        root.addHandler(handler)
+        root.setLevel(level.upper())
+        for name in QUIET_LOGGERS:
+            logging.getLogger(name).setLevel(max(logging.WARNING, root.level))
+        listener.start()
+        _listener, _handler = listener, handler
+    return handler
+
+
+def shutdown() -> None:
+    """Remove o handler e escreve o que ainda estiver na fila."""
+    with _lock:
+        _stop()
+
+
+def _stop() -> None:
+    global _listener, _handler
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+    if _listener is not None:
+        _listener.stop()
+    _listener, _handler = None, None
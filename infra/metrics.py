@@ -0,0 +1,173 @@
+import bisect, contextlib, importlib.util, threading, time
+from typing import Callable, ContextManager, Sequence
+
+# limites (segundos) dos buckets das etapas: de 1 ms a 10 s
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = STAGE_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series: dict[tuple, list] = {}  # labels -> [contagem por bucket..., soma, total]
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 3)
+            series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="' + _num(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_num(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        lines += [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in sorted(snapshot.items())]
+        return lines
+
+
+class Collected:
+    """Série lida de ``collect`` na hora da exposição: ``{valores dos labels: número}``.
+
+    Para contadores que já vivem no próprio adaptador (ex.: estatísticas de cache).
+    """
+
+    def __init__(self, name: str, help: str, kind: str, collect: Callable[[], dict], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._collect = collect
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in sorted(self._collect().items())]
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        metric = Counter(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def collected(self, *args, **kwargs) -> Collected:
+        metric = Collected(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Formato texto de exposição do Prometheus (0.0.4)."""
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+registry = Registry()
+STAGE_SECONDS = registry.histogram(
+    "notification_stage_seconds", "Duração de cada etapa da entrega de uma notificação", ("stage",)
+)
+SMTP_RETRIES = registry.counter("notification_smtp_retries_total", "Retentativas SMTP agendadas")
+
+_enabled = True
+_tracer = None  # ddtrace.tracer, quando o ddtrace está instalado e o tracing ligado
+
+
+def configure(enabled: bool = True, tracing: bool = True) -> None:
+    """Liga/desliga as medições; spans do ddtrace só se o pacote existir."""
+    global _enabled, _tracer
+    _enabled = enabled
+    _tracer = None
+    if enabled and tracing and importlib.util.find_spec("ddtrace") is not None:
+        from ddtrace import tracer
+        _tracer = tracer
+
+
+class _Stage:
+    __slots__ = ("name", "start", "span")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.span = None
+
+    def __enter__(self) -> "_Stage":
+        # span só dentro de um trace já aberto (ex.: a requisição sob ddtrace-run)
+        if _tracer is not None and _tracer.current_span() is not None:
+            self.span = _tracer.trace(f"notification.{self.name}", resource=self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        STAGE_SECONDS.observe(time.perf_counter() - self.start, self.name)
+        if self.span is not None:
+            if exc is not None:
+                self.span.set_exc_info(exc_type, exc, tb)
+            self.span.finish()
+
+
+_NOOP = contextlib.nullcontext()
+
+
+def stage(name: str) -> ContextManager:
+    """Mede a etapa ``name`` (histograma e, havendo trace ativo, span do ddtrace).
+
+    Desligado, devolve sempre o mesmo contexto vazio.
+    """
+    if not _enabled:
+        return _NOOP
+    return _Stage(name)
+
+
+def retried() -> None:
+    if _enabled:
+        SMTP_RETRIES.inc()
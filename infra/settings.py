@@ -9,6 +9,30 @@ class Settings: # pragma: no cover
     # Auth
     AUTH_SERVICE_URL: str = os.getenv("AUTH_SERVICE_URL", "http://clientservice-web:8000")
     AUTH_TIMEOUT: float = float(os.getenv("AUTH_TIMEOUT", "4"))
+    AUTH_CONNECT_TIMEOUT: float = float(os.getenv("AUTH_CONNECT_TIMEOUT", "1"))
+    AUTH_READ_TIMEOUT: float = float(os.getenv("AUTH_READ_TIMEOUT", os.getenv("AUTH_TIMEOUT", "4")))
+    AUTH_POOL_MAX_CONNECTIONS: int = int(os.getenv("AUTH_POOL_MAX_CONNECTIONS", "100"))
+    AUTH_POOL_MAX_KEEPALIVE: int = int(os.getenv("AUTH_POOL_MAX_KEEPALIVE", "20"))
+    AUTH_POOL_KEEPALIVE_EXPIRY: float = float(os.getenv("AUTH_POOL_KEEPALIVE_EXPIRY", "30"))
+    AUTH_HTTP2: bool = os.getenv("AUTH_HTTP2", "false").lower() == "true"
+    # Endpoint em lote do serviço de clientes (POST {"ids": [...]}); vazio = fan-out por id
+    AUTH_BULK_PATH: str = os.getenv("AUTH_BULK_PATH", "")
+    AUTH_BULK_MAX_IDS: int = int(os.getenv("AUTH_BULK_MAX_IDS", "100"))
+    AUTH_BULK_CONCURRENCY: int = int(os.getenv("AUTH_BULK_CONCURRENCY", "10"))
+
+    # Circuit breaker do serviço de clientes (mesma semântica do SMTP_BREAKER_*)
+    AUTH_BREAKER_ENABLED: bool = os.getenv("AUTH_BREAKER_ENABLED", "true").lower() == "true"
+    AUTH_BREAKER_FAILURE_RATE: float = float(os.getenv("AUTH_BREAKER_FAILURE_RATE", "0.5"))
+    AUTH_BREAKER_WINDOW: int = int(os.getenv("AUTH_BREAKER_WINDOW", "20"))
+    AUTH_BREAKER_MIN_CALLS: int = int(os.getenv("AUTH_BREAKER_MIN_CALLS", "5"))
+    AUTH_BREAKER_COOLDOWN: float = float(os.getenv("AUTH_BREAKER_COOLDOWN", "15"))
+
+    # Cache de identidades
+    AUTH_CACHE_ENABLED: bool = os.getenv("AUTH_CACHE_ENABLED", "true").lower() == "true"
+    AUTH_CACHE_MAX_SIZE: int = int(os.getenv("AUTH_CACHE_MAX_SIZE", "10000"))
+    AUTH_CACHE_TTL: float = float(os.getenv("AUTH_CACHE_TTL", "300"))
+    AUTH_CACHE_NEGATIVE_TTL: float = float(os.getenv("AUTH_CACHE_NEGATIVE_TTL", "30"))
+    AUTH_CACHE_STALE_TTL: float = float(os.getenv("AUTH_CACHE_STALE_TTL", "600"))
 
     # SMTP
     EMAIL_HOST: str = os.getenv("EMAIL_HOST", "smtp.gmail.com")
@@ -23,4 +47,101 @@ class Settings: # pragma: no cover
     SMTP_OP_TIMEOUT: float = float(os.getenv("SMTP_OP_TIMEOUT", "10"))
     SMTP_MAX_RETRIES: int = int(os.getenv("SMTP_MAX_RETRIES", "3"))
 
+    # Templates de e-mail (vazio = templates embutidos em app/adapters/driven/templates/email)
+    EMAIL_TEMPLATES_DIR: str = os.getenv("EMAIL_TEMPLATES_DIR", "")
+    EMAIL_DEFAULT_LOCALE: str = os.getenv("EMAIL_DEFAULT_LOCALE", "pt_BR")
+    # intervalo entre conferências de mtime dos arquivos; negativo desliga o reload
+    EMAIL_TEMPLATES_RELOAD_INTERVAL: float = float(os.getenv("EMAIL_TEMPLATES_RELOAD_INTERVAL", "2"))
+
+    # SMTP pool
+    SMTP_POOL_MIN_SIZE: int = int(os.getenv("SMTP_POOL_MIN_SIZE", "1"))
+    SMTP_POOL_MAX_SIZE: int = int(os.getenv("SMTP_POOL_MAX_SIZE", "4"))
+    SMTP_POOL_IDLE_TIMEOUT: float = float(os.getenv("SMTP_POOL_IDLE_TIMEOUT", "60"))
+    SMTP_POOL_MAX_MESSAGES: int = int(os.getenv("SMTP_POOL_MAX_MESSAGES", "100"))
+    SMTP_POOL_ACQUIRE_TIMEOUT: float = float(os.getenv("SMTP_POOL_ACQUIRE_TIMEOUT", "10"))
+    SMTP_PROBE_IDLE_AFTER: float = float(os.getenv("SMTP_PROBE_IDLE_AFTER", "30"))
+    # mensagens por lote entregue a uma sessão SMTP em send_many (PIPELINING quando anunciado)
+    SMTP_PIPELINE_BATCH: int = int(os.getenv("SMTP_PIPELINE_BATCH", "50"))
+
+    # Limites de envio (mensagens/s; 0 = sem limite). Excedentes esperam, não falham
+    SMTP_RATE_GLOBAL: float = float(os.getenv("SMTP_RATE_GLOBAL", "0"))
+    SMTP_RATE_GLOBAL_BURST: float = float(os.getenv("SMTP_RATE_GLOBAL_BURST", "10"))
+    SMTP_RATE_PER_CONNECTION: float = float(os.getenv("SMTP_RATE_PER_CONNECTION", "0"))
+    SMTP_RATE_PER_CONNECTION_BURST: float = float(os.getenv("SMTP_RATE_PER_CONNECTION_BURST", "5"))
+    SMTP_RATE_PER_DOMAIN: float = float(os.getenv("SMTP_RATE_PER_DOMAIN", "0"))
+    SMTP_RATE_PER_DOMAIN_BURST: float = float(os.getenv("SMTP_RATE_PER_DOMAIN_BURST", "5"))
+
+    # Circuit breaker do relay SMTP: abre com FAILURE_RATE de falhas nas últimas WINDOW
+    # idas (mínimo MIN_CALLS) e falha na hora por COOLDOWN segundos
+    SMTP_BREAKER_ENABLED: bool = os.getenv("SMTP_BREAKER_ENABLED", "true").lower() == "true"
+    SMTP_BREAKER_FAILURE_RATE: float = float(os.getenv("SMTP_BREAKER_FAILURE_RATE", "0.5"))
+    SMTP_BREAKER_WINDOW: int = int(os.getenv("SMTP_BREAKER_WINDOW", "20"))
+    SMTP_BREAKER_MIN_CALLS: int = int(os.getenv("SMTP_BREAKER_MIN_CALLS", "5"))
+    SMTP_BREAKER_COOLDOWN: float = float(os.getenv("SMTP_BREAKER_COOLDOWN", "30"))
+
+    # SMTP retries (agendadas fora da thread da requisição)
+    SMTP_RETRY_BASE_DELAY: float = float(os.getenv("SMTP_RETRY_BASE_DELAY", "1"))
+    SMTP_RETRY_MAX_DELAY: float = float(os.getenv("SMTP_RETRY_MAX_DELAY", "8"))
+    SMTP_RETRY_DEADLINE: float = float(os.getenv("SMTP_RETRY_DEADLINE", "60"))
+    SMTP_RETRY_WORKERS: int = int(os.getenv("SMTP_RETRY_WORKERS", "2"))
+
+    # Vários relays SMTP: lista JSON de {"name", "host", "port", "user", "password", "use_ssl",
+    # "use_starttls", "weight", "max_connections", "rate", "rate_burst"}; vazio = só EMAIL_HOST.
+    # Cada relay tem pool, limite e circuit breaker próprios; relay com o circuito aberto sai
+    # do rodízio e as retentativas vão para outro relay
+    SMTP_RELAYS: str = os.getenv("SMTP_RELAYS", "")
+    SMTP_ROUTING: str = os.getenv("SMTP_ROUTING", "least_outstanding")  # ou "weighted"
+
+    # Entrega: "sync" responde após o envio; "queue" enfileira e responde 202
+    NOTIFY_MODE: str = os.getenv("NOTIFY_MODE", "sync")
+    NOTIFY_QUEUE_BACKEND: str = os.getenv("NOTIFY_QUEUE_BACKEND", "memory")
+    NOTIFY_QUEUE_MAXSIZE: int = int(os.getenv("NOTIFY_QUEUE_MAXSIZE", "1000"))
+    NOTIFY_QUEUE_SQLITE_PATH: str = os.getenv("NOTIFY_QUEUE_SQLITE_PATH", "notification_queue.db")
+    NOTIFY_WORKERS: int = int(os.getenv("NOTIFY_WORKERS", "4"))
+    # Faixas de prioridade no modo fila: status/usuários prioritários passam na frente do
+    # volume, na proporção dos pesos (round-robin ponderado)
+    NOTIFY_LANES_ENABLED: bool = os.getenv("NOTIFY_LANES_ENABLED", "false").lower() == "true"
+    NOTIFY_LANE_PRIORITY_WEIGHT: int = int(os.getenv("NOTIFY_LANE_PRIORITY_WEIGHT", "4"))
+    NOTIFY_LANE_BULK_WEIGHT: int = int(os.getenv("NOTIFY_LANE_BULK_WEIGHT", "1"))
+    NOTIFY_PRIORITY_STATUSES: str = os.getenv("NOTIFY_PRIORITY_STATUSES", "error")
+    NOTIFY_PRIORITY_USERS: str = os.getenv("NOTIFY_PRIORITY_USERS", "")  # user_ids separados por vírgula
+    NOTIFY_BATCH_MAX_ITEMS: int = int(os.getenv("NOTIFY_BATCH_MAX_ITEMS", "1000"))
+
+    # Resumo: notificações do mesmo usuário dentro de DIGEST_WINDOW segundos viram um
+    # único e-mail (no máximo DIGEST_MAX_WAIT segundos de espera e DIGEST_MAX_ITEMS itens)
+    DIGEST_ENABLED: bool = os.getenv("DIGEST_ENABLED", "false").lower() == "true"
+    DIGEST_WINDOW: float = float(os.getenv("DIGEST_WINDOW", "5"))
+    DIGEST_MAX_WAIT: float = float(os.getenv("DIGEST_MAX_WAIT", "60"))
+    DIGEST_MAX_ITEMS: int = int(os.getenv("DIGEST_MAX_ITEMS", "20"))
+    # itens tirados da fila aguardando o envio do resumo (modo fila)
+    DIGEST_MAX_PENDING: int = int(os.getenv("DIGEST_MAX_PENDING", "1000"))
+
+    # Idempotência do /notify: chave = header Idempotency-Key ou "<job_id>:<status>"
+    IDEMPOTENCY_ENABLED: bool = os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+    IDEMPOTENCY_BACKEND: str = os.getenv("IDEMPOTENCY_BACKEND", "memory")
+    IDEMPOTENCY_SQLITE_PATH: str = os.getenv("IDEMPOTENCY_SQLITE_PATH", "idempotency.db")
+    IDEMPOTENCY_MAX_SIZE: int = int(os.getenv("IDEMPOTENCY_MAX_SIZE", "100000"))
+    IDEMPOTENCY_TTL: float = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+    IDEMPOTENCY_INFLIGHT_TTL: float = float(os.getenv("IDEMPOTENCY_INFLIGHT_TTL", "120"))
+
+    # Outbox durável (reentrega no startup do que ficou sem confirmação). Ignorado com
+    # NOTIFY_MODE=queue e NOTIFY_QUEUE_BACKEND=sqlite: a própria fila já reentrega
+    OUTBOX_ENABLED: bool = os.getenv("OUTBOX_ENABLED", "false").lower() == "true"
+    OUTBOX_PATH: str = os.getenv("OUTBOX_PATH", "outbox.db")
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "64"))
+    OUTBOX_FLUSH_INTERVAL: float = float(os.getenv("OUTBOX_FLUSH_INTERVAL", "0.002"))
+
+    # Métricas por etapa (auth, compose, mime, SMTP) em GET /metrics; com o ddtrace
+    # instalado, cada etapa também vira um span dentro do trace da requisição
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_DDTRACE: bool = os.getenv("METRICS_DDTRACE", "true").lower() == "true"
+
+    # Logs em JSON escritos por uma thread à parte (fila de LOG_QUEUE_SIZE; cheia, descarta),
+    # com e-mails e EMAIL_PASS mascarados e trace_id/span_id do ddtrace quando houver
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_JSON: bool = os.getenv("LOG_JSON", "true").lower() == "true"
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # amostragem abaixo de WARNING: "logger_ou_evento=taxa,..." (ex.: app.domain.services.delivery_workers=0.1)
+    LOG_SAMPLE_RATES: str = os.getenv("LOG_SAMPLE_RATES", "")
+
 settings = Settings()
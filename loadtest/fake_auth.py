@@ -0,0 +1,78 @@
+"""Serviço de clientes falso, no formato que o ``AsyncHttpAuthGateway`` consome.
+
+``GET /api/client/{id}`` devolve ``{"email", "name", "locale"}`` e
+``POST /api/clients/bulk`` (``{"ids": [...]}``) devolve a lista. Latência,
+404 e 500 são configuráveis para simular o serviço degradado.
+
+Uso: python -m loadtest.fake_auth [--port 8081] [--latency 0.005]
+     [--not-found-rate 0.01] [--error-rate 0.01]
+"""
+import argparse, asyncio, random
+from typing import Optional
+from fastapi import Body, FastAPI, HTTPException
+
+BULK_PATH = "/api/clients/bulk"
+
+
+def create_app(
+    *,
+    latency: float = 0.0,
+    not_found_rate: float = 0.0,
+    error_rate: float = 0.0,
+    seed: Optional[int] = None,
+) -> FastAPI:
+    rng = random.Random(seed)
+    app = FastAPI(title="Fake auth")
+    app.state.stats = {"requests": 0, "ids": 0, "not_found": 0, "errors": 0}
+
+    def client(user_id: int) -> Optional[dict]:
+        app.state.stats["ids"] += 1
+        if rng.random() < not_found_rate:
+            app.state.stats["not_found"] += 1
+            return None
+        return {"id": user_id, "email": f"user{user_id}@example.com", "name": f"Cliente {user_id}", "locale": "pt_BR"}
+
+    async def enter() -> None:
+        app.state.stats["requests"] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        if rng.random() < error_rate:
+            app.state.stats["errors"] += 1
+            raise HTTPException(500, "erro simulado")
+
+    @app.get("/api/client/{user_id}")
+    async def get_client(user_id: int):
+        await enter()
+        found = client(user_id)
+        if found is None:
+            raise HTTPException(404, "Cliente não encontrado")
+        return found
+
+    @app.post(BULK_PATH)
+    async def get_clients(ids: list[int] = Body(..., embed=True)):
+        await enter()
+        return [c for c in map(client, ids) if c is not None]
+
+    @app.get("/stats")
+    async def get_stats():
+        return app.state.stats
+
+    return app
+
+
+def _parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Serviço de clientes falso para testes de carga")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8081)
+    p.add_argument("--latency", type=float, default=0.0)
+    p.add_argument("--not-found-rate", type=float, default=0.0)
+    p.add_argument("--error-rate", type=float, default=0.0)
+    return p
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    args = _parser().parse_args()
+    app = create_app(latency=args.latency, not_found_rate=args.not_found_rate, error_rate=args.error_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
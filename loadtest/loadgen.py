@@ -0,0 +1,140 @@
+"""Gerador de carga em malha aberta para o ``POST /notify``.
+
+A requisição ``i`` sai em ``início + i / rps``, espere ou não as anteriores
+(a latência medida inclui a fila do servidor, sem "coordinated omission").
+``max_in_flight`` limita as requisições abertas; as que não couberem são
+contadas como ``dropped``.
+
+Uso: python -m loadtest.loadgen --url http://127.0.0.1:8000 --rps 200 --duration 10
+"""
+import argparse, asyncio, json, random, time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+import httpx
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """Percentil por posição mais próxima numa lista já ordenada."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+
+
+@dataclass
+class LoadReport:
+    target_rps: float
+    duration: float
+    latencies: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    dropped: int = 0
+
+    @property
+    def completed(self) -> int:
+        return sum(self.statuses.values())
+
+    @property
+    def errors(self) -> int:
+        return sum(n for status, n in self.statuses.items() if not 200 <= status < 300)
+
+    def summary(self) -> dict:
+        ordered = sorted(self.latencies)
+        completed = self.completed
+        return {
+            "target_rps": self.target_rps,
+            "duration_s": round(self.duration, 3),
+            "requests": completed + self.dropped,
+            "throughput_rps": round(completed / self.duration, 1) if self.duration else 0.0,
+            "error_rate": round(self.errors / completed, 4) if completed else 0.0,
+            "dropped": self.dropped,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "latency_ms": {
+                name: round(percentile(ordered, q) * 1000, 2)
+                for name, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+            },
+        }
+
+
+def payloads(users: int = 1000, error_ratio: float = 0.1, seed: Optional[int] = None) -> Callable[[int], dict]:
+    """Corpo da i-ésima requisição: job único, usuário sorteado, ``error_ratio`` de falhas."""
+    rng = random.Random(seed)
+    run_id = f"{time.time_ns():x}"
+
+    def make(i: int) -> dict:
+        if rng.random() < error_ratio:
+            return {"job_id": f"{run_id}-{i}", "status": "error", "user_id": rng.randint(1, users),
+                    "error_message": "falha simulada"}
+        return {"job_id": f"{run_id}-{i}", "status": "success", "user_id": rng.randint(1, users),
+                "video_url": f"https://cdn.example.com/{run_id}/{i}.mp4"}
+
+    return make
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    *,
+    rps: float,
+    duration: float,
+    make_payload: Callable[[int], dict],
+    max_in_flight: int = 1000,
+    path: str = "/notify",
+) -> LoadReport:
+    loop = asyncio.get_running_loop()
+    total = int(rps * duration)
+    report = LoadReport(target_rps=rps, duration=0.0)
+    slots = asyncio.Semaphore(max_in_flight)
+    tasks = []
+
+    async def one(i: int) -> None:
+        start = loop.time()
+        try:
+            r = await client.post(path, json=make_payload(i))
+            report.statuses[r.status_code] += 1
+        except httpx.HTTPError:
+            report.statuses[0] += 1  # 0 = erro de transporte
+        finally:
+            report.latencies.append(loop.time() - start)
+            slots.release()
+
+    started = loop.time()
+    for i in range(total):
+        delay = started + i / rps - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if slots.locked():
+            report.dropped += 1
+            continue
+        await slots.acquire()
+        tasks.append(asyncio.create_task(one(i)))
+    await asyncio.gather(*tasks)
+    report.duration = loop.time() - started
+    return report
+
+
+async def _main(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        report = await run_load(
+            client,
+            rps=args.rps,
+            duration=args.duration,
+            make_payload=payloads(args.users, args.error_ratio),
+            max_in_flight=args.max_in_flight,
+        )
+    print(json.dumps(report.summary(), indent=2))
+
+
+def _parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Gerador de carga para o /notify")
+    p.add_argument("--url", default="http://127.0.0.1:8000")
+    p.add_argument("--rps", type=float, default=100)
+    p.add_argument("--duration", type=float, default=10)
+    p.add_argument("--users", type=int, default=1000)
+    p.add_argument("--error-ratio", type=float, default=0.1)
+    p.add_argument("--max-in-flight", type=int, default=500)
+    p.add_argument("--timeout", type=float, default=30)
+    return p
+
+
+if __name__ == "__main__":
+    asyncio.run(_main(_parser().parse_args()))
@@ -0,0 +1,119 @@
+"""Teste de carga completo e offline: SMTP sink + auth falso + o serviço + gerador.
+
+O serviço roda num subprocesso ``uvicorn main:app`` apontado para os dois
+falsos (que rodam neste processo); ao fim imprime o relatório do gerador e os
+contadores do sink e do auth. Variáveis extras do serviço podem ser passadas
+com ``--env CHAVE=valor`` (ex.: ``--env NOTIFY_MODE=queue``).
+
+Uso: python -m loadtest.run --rps 200 --duration 10 [--smtp-latency 0.002]
+     [--smtp-disconnect-rate 0.01] [--smtp-data-error-rate 0.01] [--auth-latency 0.005]
+"""
+import argparse, asyncio, json, os, socket, sys
+import httpx
+import uvicorn
+
+from loadtest.fake_auth import BULK_PATH, create_app
+from loadtest.loadgen import payloads, run_load
+from loadtest.smtp_sink import SmtpSink
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_ready(url: str, timeout: float = 20.0) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                await client.get(f"{url}/health/circuits")
+                return
+            except httpx.HTTPError:
+                if loop.time() > deadline:
+                    raise RuntimeError("Serviço não subiu a tempo")
+                await asyncio.sleep(0.1)
+
+
+def service_env(smtp_port: int, auth_url: str, extra: dict[str, str]) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "AUTH_SERVICE_URL": auth_url,
+        "AUTH_BULK_PATH": BULK_PATH,
+        "EMAIL_HOST": "127.0.0.1",
+        "EMAIL_PORT": str(smtp_port),
+        "EMAIL_USE_SSL": "false",
+        "EMAIL_USE_STARTTLS": "false",
+        "EMAIL_USER": "",
+        "EMAIL_PASS": "",
+        "EMAIL_FROM": "Serviço de Vídeos <noreply@example.com>",
+        "OUTBOX_ENABLED": "false",
+        "IDEMPOTENCY_BACKEND": "memory",
+    })
+    env.update(extra)
+    return env
+
+
+async def _main(args: argparse.Namespace) -> dict:
+    sink = SmtpSink(
+        latency=args.smtp_latency,
+        disconnect_rate=args.smtp_disconnect_rate,
+        data_error_rate=args.smtp_data_error_rate,
+    )
+    auth_app = create_app(latency=args.auth_latency, not_found_rate=args.auth_not_found_rate,
+                          error_rate=args.auth_error_rate)
+    auth_port, app_port = _free_port(), _free_port()
+    auth = uvicorn.Server(uvicorn.Config(auth_app, host="127.0.0.1", port=auth_port, log_level="warning"))
+    auth_task = asyncio.create_task(auth.serve())
+    await sink.start()
+    extra = dict(kv.split("=", 1) for kv in args.env)
+    service = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(app_port),
+        "--log-level", "warning",
+        env=service_env(sink.port, f"http://127.0.0.1:{auth_port}", extra),
+        stdout=None if args.verbose else asyncio.subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{app_port}"
+    try:
+        await _wait_ready(url)
+        limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+            report = await run_load(
+                client,
+                rps=args.rps,
+                duration=args.duration,
+                make_payload=payloads(args.users, args.error_ratio),
+                max_in_flight=args.max_in_flight,
+            )
+        return {"load": report.summary(), "smtp": sink.stats, "auth": auth_app.state.stats}
+    finally:
+        service.terminate()
+        await service.wait()
+        await sink.stop()
+        auth.should_exit = True
+        await auth_task
+
+
+def _parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Teste de carga offline do serviço de notificações")
+    p.add_argument("--rps", type=float, default=100)
+    p.add_argument("--duration", type=float, default=10)
+    p.add_argument("--users", type=int, default=1000)
+    p.add_argument("--error-ratio", type=float, default=0.1)
+    p.add_argument("--max-in-flight", type=int, default=500)
+    p.add_argument("--timeout", type=float, default=30)
+    p.add_argument("--smtp-latency", type=float, default=0.0)
+    p.add_argument("--smtp-disconnect-rate", type=float, default=0.0)
+    p.add_argument("--smtp-data-error-rate", type=float, default=0.0)
+    p.add_argument("--auth-latency", type=float, default=0.0)
+    p.add_argument("--auth-not-found-rate", type=float, default=0.0)
+    p.add_argument("--auth-error-rate", type=float, default=0.0)
+    p.add_argument("--env", action="append", default=[], metavar="CHAVE=valor")
+    p.add_argument("--verbose", action="store_true", help="mostra a saída padrão do serviço")
+    return p
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(_main(_parser().parse_args())), indent=2))
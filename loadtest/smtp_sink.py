@@ -0,0 +1,157 @@
+"""Servidor SMTP local (asyncio) que aceita e descarta as mensagens.
+
+Serve para medir o ``SmtpEmailGateway`` sem relay real: anuncia PIPELINING
+(RFC 2920) e AUTH, aceita qualquer credencial, e pode simular latência por
+resposta, queda da conexão no fim do DATA (``SMTPServerDisconnected`` no
+cliente) e ``451`` no DATA (``SMTPDataError``).
+
+Uso: python -m loadtest.smtp_sink [--port 2525] [--latency 0.005]
+     [--disconnect-rate 0.01] [--data-error-rate 0.01] [--no-pipelining]
+"""
+import argparse, asyncio, random
+from typing import Optional
+
+
+class SmtpSink:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        latency: float = 0.0,
+        disconnect_rate: float = 0.0,
+        data_error_rate: float = 0.0,
+        pipelining: bool = True,
+        seed: Optional[int] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.disconnect_rate = disconnect_rate
+        self.data_error_rate = data_error_rate
+        self.pipelining = pipelining
+        self._rng = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.stats = {"connections": 0, "messages": 0, "bytes": 0, "disconnects": 0, "data_errors": 0}
+
+    async def start(self) -> "SmtpSink":
+        self._server = await asyncio.start_server(self._session, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "SmtpSink":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    def _ehlo(self) -> bytes:
+        lines = ["sink", "8BITMIME", "AUTH PLAIN LOGIN"] + (["PIPELINING"] if self.pipelining else [])
+        return b"".join(f"250{'-' if i < len(lines) - 1 else ' '}{line}\r\n".encode() for i, line in enumerate(lines))
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats["connections"] += 1
+
+        async def reply(data: bytes) -> None:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            writer.write(data)
+            await writer.drain()
+
+        try:
+            await reply(b"220 sink ESMTP\r\n")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                verb = line[:4].upper()
+                if verb == b"EHLO":
+                    await reply(self._ehlo())
+                elif verb == b"HELO":
+                    await reply(b"250 sink\r\n")
+                elif verb == b"AUTH":
+                    if line.upper().startswith(b"AUTH LOGIN") and len(line.split()) == 2:
+                        await reply(b"334 VXNlcm5hbWU6\r\n")  # usuário
+                        await reader.readline()
+                        await reply(b"334 UGFzc3dvcmQ6\r\n")  # senha
+                        await reader.readline()
+                    elif len(line.split()) == 2:
+                        await reply(b"334 \r\n")
+                        await reader.readline()
+                    await reply(b"235 ok\r\n")
+                elif verb in (b"MAIL", b"RCPT", b"RSET", b"NOOP"):
+                    await reply(b"250 ok\r\n")
+                elif verb == b"DATA":
+                    await reply(b"354 fim com <CRLF>.<CRLF>\r\n")
+                    size = await self._read_data(reader)
+                    if self._rng.random() < self.disconnect_rate:
+                        self.stats["disconnects"] += 1
+                        return
+                    if self._rng.random() < self.data_error_rate:
+                        self.stats["data_errors"] += 1
+                        await reply(b"451 tente mais tarde\r\n")
+                        continue
+                    self.stats["messages"] += 1
+                    self.stats["bytes"] += size
+                    await reply(b"250 aceito\r\n")
+                elif verb == b"QUIT":
+                    await reply(b"221 tchau\r\n")
+                    return
+                else:
+                    await reply(b"502 comando desconhecido\r\n")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_data(reader: asyncio.StreamReader) -> int:
+        size = 0
+        while True:
+            line = await reader.readline()
+            if not line or line == b".\r\n":
+                return size
+            size += len(line)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    sink = SmtpSink(
+        args.host,
+        args.port,
+        latency=args.latency,
+        disconnect_rate=args.disconnect_rate,
+        data_error_rate=args.data_error_rate,
+        pipelining=not args.no_pipelining,
+    )
+    async with sink:
+        print(f"SMTP sink em {sink.host}:{sink.port}")
+        try:
+            while True:
+                await asyncio.sleep(5)
+                print(sink.stats)
+        except asyncio.CancelledError:
+            pass
+
+
+def _parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="SMTP local para testes de carga")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=2525)
+    p.add_argument("--latency", type=float, default=0.0, help="segundos antes de cada resposta")
+    p.add_argument("--disconnect-rate", type=float, default=0.0)
+    p.add_argument("--data-error-rate", type=float, default=0.0)
+    p.add_argument("--no-pipelining", action="store_true")
+    return p
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(_main(_parser().parse_args()))
+    except KeyboardInterrupt:
+        pass
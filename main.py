@@ -1,8 +1,34 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from infra import log
+from infra.settings import settings
+from app.adapters.driven.smtp_relays import parse_relays
+from app.adapters.driver.controllers import notification_controller
 from app.adapters.driver.controllers.notification_controller import router as notification_router
 
+def _configure_logging() -> None:
+    log.configure(
+        level=settings.LOG_LEVEL,
+        json_format=settings.LOG_JSON,
+        queue_size=settings.LOG_QUEUE_SIZE,
+        sample_rates=log.parse_rates(settings.LOG_SAMPLE_RATES),
+        secrets=(settings.EMAIL_PASS, *(r.password for r in parse_relays(settings.SMTP_RELAYS))),
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # o shutdown anterior removeu o handler: reinstala a cada ciclo de vida
+    _configure_logging()
+    await notification_controller.startup()
+    try:
+        yield
+    finally:
+        await notification_controller.shutdown()
+        log.shutdown()
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="Notification Service")
+    _configure_logging()
+    app = FastAPI(title="Notification Service", lifespan=lifespan)
     app.include_router(notification_router, tags=["notifications"])
     return app
 
@@ -0,0 +1,16 @@
+import pytest
+
+
+class Clock:
+    """Relógio manual para injetar no lugar de ``time.monotonic``."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
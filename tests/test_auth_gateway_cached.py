@@ -0,0 +1,163 @@
+import asyncio
+import pytest
+
+from app.domain.entities import Identity
+from app.domain.ports import AsyncAuthGateway, IdentityNotFoundError
+from app.adapters.driven.auth_gateway_cached import CachingAuthGateway
+from tests.conftest import Clock
+
+
+class CountingAuth(AsyncAuthGateway):
+    def __init__(self, missing=(), fail=()):
+        self.calls = []
+        self.missing = set(missing)
+        self.fail = set(fail)
+        self.version = 1
+
+    async def resolve_identity(self, user_id):
+        self.calls.append(user_id)
+        if user_id in self.missing:
+            raise IdentityNotFoundError("Cliente não encontrado")
+        if user_id in self.fail:
+            raise RuntimeError("auth down")
+        return Identity(email=f"u{user_id}@x.com", name=f"v{self.version}")
+
+    async def resolve_identities(self, user_ids):
+        self.calls.append(("bulk", list(user_ids)))
+        return await super().resolve_identities(user_ids)
+
+
+def test_hit_within_ttl_and_miss_after_expiry():
+    inner, clock = CountingAuth(), Clock()
+    cache = CachingAuthGateway(inner, ttl=10, clock=clock)
+
+    async def run():
+        a = await cache.resolve_identity(1)
+        b = await cache.resolve_identity(1)
+        clock.now = 11
+        inner.version = 2
+        c = await cache.resolve_identity(1)
+        return a, b, c
+
+    a, b, c = asyncio.run(run())
+    assert a is b
+    assert c.name == "v2"
+    assert inner.calls == [1, 1]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_lru_eviction_keeps_recently_used():
+    inner = CountingAuth()
+    cache = CachingAuthGateway(inner, max_size=2, ttl=100, clock=Clock())
+
+    async def run():
+        await cache.resolve_identity(1)
+        await cache.resolve_identity(2)
+        await cache.resolve_identity(1)
+        await cache.resolve_identity(3)
+        await cache.resolve_identity(1)
+        await cache.resolve_identity(2)
+
+    asyncio.run(run())
+    assert inner.calls == [1, 2, 3, 2]
+    assert cache.stats()["evictions"] == 2
+    assert cache.stats()["size"] == 2
+
+
+def test_negative_cache_uses_shorter_ttl():
+    inner, clock = CountingAuth(missing={9}), Clock()
+    cache = CachingAuthGateway(inner, ttl=100, negative_ttl=5, clock=clock)
+
+    async def lookup():
+        with pytest.raises(IdentityNotFoundError, match="Cliente não encontrado"):
+            await cache.resolve_identity(9)
+
+    asyncio.run(lookup())
+    asyncio.run(lookup())
+    assert inner.calls == [9]
+    assert cache.stats()["negative_hits"] == 1
+    clock.now = 6
+    asyncio.run(lookup())
+    assert inner.calls == [9, 9]
+
+
+def test_other_errors_are_not_cached():
+    inner = CountingAuth(fail={5})
+    cache = CachingAuthGateway(inner, clock=Clock())
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            asyncio.run(cache.resolve_identity(5))
+    assert inner.calls == [5, 5]
+
+
+def test_stale_while_revalidate_serves_old_value_and_refreshes_once():
+    inner, clock = CountingAuth(), Clock()
+    cache = CachingAuthGateway(inner, ttl=10, stale_ttl=50, clock=clock)
+
+    async def run():
+        await cache.resolve_identity(1)
+        clock.now = 20
+        inner.version = 2
+        stale = await asyncio.gather(cache.resolve_identity(1), cache.resolve_identity(1))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        fresh = await cache.resolve_identity(1)
+        return stale, fresh
+
+    stale, fresh = asyncio.run(run())
+    assert [s.name for s in stale] == ["v1", "v1"]
+    assert fresh.name == "v2"
+    assert inner.calls == [1, 1]
+    stats = cache.stats()
+    assert (stats["stale_hits"], stats["refreshes"]) == (2, 1)
+
+
+def test_failed_revalidation_keeps_stale_entry():
+    inner, clock = CountingAuth(), Clock()
+    cache = CachingAuthGateway(inner, ttl=10, stale_ttl=50, clock=clock)
+
+    async def run():
+        await cache.resolve_identity(1)
+        clock.now = 20
+        inner.fail.add(1)
+        first = await cache.resolve_identity(1)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        second = await cache.resolve_identity(1)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.name == second.name == "v1"
+
+
+def test_invalidate():
+    inner = CountingAuth()
+    cache = CachingAuthGateway(inner, clock=Clock())
+    asyncio.run(cache.resolve_identity(1))
+    cache.invalidate(1)
+    asyncio.run(cache.resolve_identity(1))
+    cache.invalidate()
+    assert cache.stats()["size"] == 0
+    assert inner.calls == [1, 1]
+
+
+def test_resolve_identities_only_fetches_misses_and_caches_results():
+    inner = CountingAuth(missing={3})
+    cache = CachingAuthGateway(inner, clock=Clock())
+
+    async def run():
+        await cache.resolve_identity(1)
+        first = await cache.resolve_identities([1, 2, 3])
+        second = await cache.resolve_identities([3, 2, 1])
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert list(first) == [1, 2, 3]
+    assert isinstance(first[3], IdentityNotFoundError)
+    assert list(second) == [3, 2, 1]
+    assert isinstance(second[3], IdentityNotFoundError)
+    assert second[2] is first[2]
+    assert ("bulk", [2, 3]) in inner.calls
+    assert [c for c in inner.calls if isinstance(c, tuple)] == [("bulk", [2, 3])]
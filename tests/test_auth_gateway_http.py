@@ -1,117 +1,245 @@
-import io
+import asyncio
 import json
 import types
+from importlib import import_module
+import httpx
 import pytest
-from urllib.error import HTTPError
-from app.adapters.driven.auth_gateway_http import HttpAuthGateway
+from app.adapters.driven.auth_gateway_http import HttpAuthGateway, AsyncHttpAuthGateway
 from app.domain.entities import Identity
+from app.domain.ports import IdentityNotFoundError
+
+MODULE = "app.adapters.driven.auth_gateway_http"
+
+
+def _patch_settings(monkeypatch, **overrides):
+    base = dict(
+        AUTH_SERVICE_URL="http://auth",
+        AUTH_TIMEOUT=2,
+        AUTH_CONNECT_TIMEOUT=0.5,
+        AUTH_READ_TIMEOUT=2,
+        AUTH_POOL_MAX_CONNECTIONS=10,
+        AUTH_POOL_MAX_KEEPALIVE=5,
+        AUTH_POOL_KEEPALIVE_EXPIRY=15,
+        AUTH_HTTP2=False,
+        AUTH_BULK_PATH="",
+        AUTH_BULK_MAX_IDS=100,
+        AUTH_BULK_CONCURRENCY=2,
+    )
+    base.update(overrides)
+    monkeypatch.setattr(f"{MODULE}.settings", types.SimpleNamespace(**base), raising=True)
 
 
-class _MockHTTPResponse:
-    def __init__(self, payload: dict, status=200):
-        self._bytes = json.dumps(payload).encode("utf-8")
-        self.status = status
-
-    def read(self) -> bytes:
-        return self._bytes
-
-    def __enter__(self):
-        return self
-
-    def __exit__(self, exc_type, exc, tb):
-        return False
+def _sync_gateway(handler):
+    return HttpAuthGateway(client=httpx.Client(transport=httpx.MockTransport(handler)))
 
 
-def _make_http_error(code: int) -> HTTPError:
-    return HTTPError(
-        url="http://example/auth",
-        code=code,
-        msg=str(code),
-        hdrs=None,
-        fp=io.BytesIO(b""),
-    )
+def _async_gateway(handler):
+    return AsyncHttpAuthGateway(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
 
 
 def test_resolve_identity_success(monkeypatch):
-    monkeypatch.setattr(
-        "app.adapters.driven.auth_gateway_http.settings",
-        types.SimpleNamespace(AUTH_SERVICE_URL="http://clientservice-web:8000/", AUTH_TIMEOUT=3),
-        raising=True,
-    )
+    _patch_settings(monkeypatch, AUTH_SERVICE_URL="http://clientservice-web:8000/")
+    seen = []
 
-    def _urlopen(req, timeout):
-        expected = "http://clientservice-web:8000/api/client/42"
-        assert req.full_url == expected
-        assert timeout == 3
-        return _MockHTTPResponse({"email": "u@example.com", "name": "Mateus"})
+    def handler(request):
+        seen.append((str(request.url), request.headers.get("accept")))
+        return httpx.Response(200, json={"email": "u@example.com", "name": "Mateus"})
 
-    monkeypatch.setattr("urllib.request.urlopen", _urlopen)
-
-    gw = HttpAuthGateway()
+    gw = _sync_gateway(handler)
     ident = gw.resolve_identity("42")
     assert isinstance(ident, Identity)
     assert ident.email == "u@example.com"
     assert ident.name == "Mateus"
+    assert seen == [("http://clientservice-web:8000/api/client/42", "*/*")]
 
 
 def test_resolve_identity_defaults_name_when_missing(monkeypatch):
-    monkeypatch.setattr(
-        "app.adapters.driven.auth_gateway_http.settings",
-        types.SimpleNamespace(AUTH_SERVICE_URL="http://auth", AUTH_TIMEOUT=1),
-        raising=True,
-    )
+    _patch_settings(monkeypatch)
 
-    def _urlopen(req, timeout):
-        assert req.full_url == "http://auth/api/client/abc"
-        assert timeout == 1
-        return _MockHTTPResponse({"email": "no-name@example.com"})
+    def handler(request):
+        assert str(request.url) == "http://auth/api/client/abc"
+        return httpx.Response(200, json={"email": "no-name@example.com"})
 
-    monkeypatch.setattr("urllib.request.urlopen", _urlopen)
-
-    gw = HttpAuthGateway()
-    ident = gw.resolve_identity("abc")
+    ident = _sync_gateway(handler).resolve_identity("abc")
     assert ident.email == "no-name@example.com"
     assert ident.name == "cliente"
+    assert ident.locale is None
 
 
-def test_resolve_identity_404_raises_value_error(monkeypatch):
-    monkeypatch.setattr(
-        "app.adapters.driven.auth_gateway_http.settings",
-        types.SimpleNamespace(AUTH_SERVICE_URL="http://auth", AUTH_TIMEOUT=2),
-        raising=True,
-    )
-
-    def _urlopen(*args, **kwargs):
-        raise _make_http_error(404)
+def test_resolve_identity_reads_locale(monkeypatch):
+    _patch_settings(monkeypatch)
+    gw = _sync_gateway(lambda req: httpx.Response(200, json={"email": "u@x", "name": "U", "locale": "en_US"}))
+    assert gw.resolve_identity("1").locale == "en_US"
 
-    monkeypatch.setattr("urllib.request.urlopen", _urlopen)
 
-    gw = HttpAuthGateway()
+def test_resolve_identity_404_raises_value_error(monkeypatch):
+    _patch_settings(monkeypatch)
+    gw = _sync_gateway(lambda req: httpx.Response(404))
     with pytest.raises(ValueError) as exc:
         gw.resolve_identity("not-found")
     assert "Cliente não encontrado" in str(exc.value)
 
 
 def test_resolve_identity_missing_email_and_http_500(monkeypatch):
-    monkeypatch.setattr(
-        "app.adapters.driven.auth_gateway_http.settings",
-        types.SimpleNamespace(AUTH_SERVICE_URL="http://auth", AUTH_TIMEOUT=2),
-        raising=True,
-    )
-
-    def _ok_without_email(*args, **kwargs):
-        return _MockHTTPResponse({"name": "Qualquer"})
-
-    monkeypatch.setattr("urllib.request.urlopen", _ok_without_email)
-    gw = HttpAuthGateway()
+    _patch_settings(monkeypatch)
+    gw = _sync_gateway(lambda req: httpx.Response(200, json={"name": "Qualquer"}))
     with pytest.raises(ValueError) as exc:
         gw.resolve_identity("sem-email")
     assert "Auth não retornou e-mail" in str(exc.value)
 
-    def _raise_500(*args, **kwargs):
-        raise _make_http_error(500)
-
-    monkeypatch.setattr("urllib.request.urlopen", _raise_500)
-    with pytest.raises(HTTPError) as exc2:
+    gw = _sync_gateway(lambda req: httpx.Response(500))
+    with pytest.raises(httpx.HTTPStatusError) as exc2:
         gw.resolve_identity("boom")
-    assert exc2.value.code == 500
+    assert exc2.value.response.status_code == 500
+
+
+def test_sync_gateway_builds_one_pooled_client_from_settings(monkeypatch):
+    _patch_settings(monkeypatch)
+    gw = HttpAuthGateway()
+    client = gw._http()
+    assert gw._http() is client
+    assert client.timeout.connect == 0.5
+    assert client.timeout.read == 2
+    assert client.headers["accept"] == "application/json"
+    gw.close()
+    assert gw.client is None
+    assert client.is_closed
+
+
+def test_http2_requires_h2_package(monkeypatch):
+    m = import_module(MODULE)
+    _patch_settings(monkeypatch, AUTH_HTTP2=True)
+    monkeypatch.setattr(f"{MODULE}.importlib.util.find_spec", lambda name: None, raising=True)
+    assert m._client_options()["http2"] is False
+
+    monkeypatch.setattr(f"{MODULE}.importlib.util.find_spec", lambda name: object(), raising=True)
+    assert m._client_options()["http2"] is True
+
+
+def test_async_resolve_identity_success(monkeypatch):
+    _patch_settings(monkeypatch, AUTH_SERVICE_URL="http://auth/")
+    seen = []
+
+    def handler(request):
+        seen.append(str(request.url))
+        return httpx.Response(200, json={"email": "a@example.com", "name": "Ana"})
+
+    gw = _async_gateway(handler)
+    ident = asyncio.run(gw.resolve_identity(42))
+    assert ident == Identity(email="a@example.com", name="Ana")
+    assert seen == ["http://auth/api/client/42"]
+
+
+def test_async_resolve_identity_404_and_missing_email_and_500(monkeypatch):
+    _patch_settings(monkeypatch)
+    responses = {
+        "1": httpx.Response(404),
+        "2": httpx.Response(200, json={"name": "Sem email"}),
+        "3": httpx.Response(500),
+    }
+    gw = _async_gateway(lambda req: responses[req.url.path.rsplit("/", 1)[-1]])
+
+    with pytest.raises(ValueError, match="Cliente não encontrado"):
+        asyncio.run(gw.resolve_identity(1))
+    with pytest.raises(ValueError, match="Auth não retornou e-mail"):
+        asyncio.run(gw.resolve_identity(2))
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(gw.resolve_identity(3))
+
+
+def test_async_gateway_start_and_aclose_manage_client(monkeypatch):
+    _patch_settings(monkeypatch)
+    gw = AsyncHttpAuthGateway()
+    assert gw.client is None
+    gw.start()
+    client = gw.client
+    assert isinstance(client, httpx.AsyncClient)
+    gw.start()
+    assert gw.client is client
+    asyncio.run(gw.aclose())
+    assert gw.client is None
+    assert client.is_closed
+
+
+def test_resolve_identities_fans_out_with_bounded_concurrency(monkeypatch):
+    _patch_settings(monkeypatch, AUTH_BULK_CONCURRENCY=2)
+    state = {"active": 0, "max": 0}
+
+    async def handler(request):
+        state["active"] += 1
+        state["max"] = max(state["max"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        uid = request.url.path.rsplit("/", 1)[-1]
+        if uid == "4":
+            return httpx.Response(404)
+        return httpx.Response(200, json={"email": f"{uid}@x.com"})
+
+    gw = _async_gateway(handler)
+    out = asyncio.run(gw.resolve_identities([1, 2, 3, 4, 1]))
+    assert list(out) == [1, 2, 3, 4]
+    assert out[1].email == "1@x.com"
+    assert isinstance(out[4], IdentityNotFoundError)
+    assert state["max"] == 2
+
+
+def test_resolve_identities_uses_bulk_endpoint_in_chunks(monkeypatch):
+    _patch_settings(monkeypatch, AUTH_BULK_PATH="/api/client/batch", AUTH_BULK_MAX_IDS=2)
+    posted = []
+
+    def handler(request):
+        assert request.method == "POST"
+        assert str(request.url) == "http://auth/api/client/batch"
+        ids = json.loads(request.content)["ids"]
+        posted.append(ids)
+        return httpx.Response(200, json=[
+            {"id": i, "email": f"{i}@x.com", "name": f"n{i}"} if i != 3 else {"id": i, "name": "sem"}
+            for i in ids if i != 2
+        ])
+
+    gw = _async_gateway(handler)
+    out = asyncio.run(gw.resolve_identities([1, 2, 3]))
+    assert posted == [[1, 2], [3]]
+    assert out[1] == Identity(email="1@x.com", name="n1")
+    assert isinstance(out[2], IdentityNotFoundError)
+    assert isinstance(out[3], ValueError) and "e-mail" in str(out[3])
+    assert gw.bulk_supported is True
+
+
+def test_resolve_identities_falls_back_when_bulk_not_offered(monkeypatch):
+    _patch_settings(monkeypatch, AUTH_BULK_PATH="/api/client/batch")
+    methods = []
+
+    def handler(request):
+        methods.append(request.method)
+        if request.method == "POST":
+            return httpx.Response(404)
+        uid = request.url.path.rsplit("/", 1)[-1]
+        return httpx.Response(200, json={"email": f"{uid}@x.com"})
+
+    gw = _async_gateway(handler)
+    out = asyncio.run(gw.resolve_identities([5, 6]))
+    assert out[5].email == "5@x.com" and out[6].email == "6@x.com"
+    assert gw.bulk_supported is False
+    asyncio.run(gw.resolve_identities([7]))
+    assert methods == ["POST", "GET", "GET", "GET"]
+
+
+def test_resolve_identities_bulk_server_error_is_per_id(monkeypatch):
+    _patch_settings(monkeypatch, AUTH_BULK_PATH="/bulk")
+    gw = _async_gateway(lambda req: httpx.Response(503))
+    out = asyncio.run(gw.resolve_identities([1, 2]))
+    assert all(isinstance(v, httpx.HTTPStatusError) for v in out.values())
+
+
+@pytest.mark.parametrize("response, first_ok", [
+    (httpx.Response(200, text="<html>oops</html>"), False),
+    (httpx.Response(200, json={"id": 1, "email": "1@x.com"}), False),
+    (httpx.Response(200, json=[{"id": 1, "email": "1@x.com"}, "2"]), True),
+])
+def test_resolve_identities_bulk_invalid_body_is_per_id(monkeypatch, response, first_ok):
+    _patch_settings(monkeypatch, AUTH_BULK_PATH="/bulk")
+    gw = _async_gateway(lambda req: response)
+    out = asyncio.run(gw.resolve_identities([1, 2]))
+    assert isinstance(out[2], ValueError) and not isinstance(out[2], IdentityNotFoundError)
+    assert isinstance(out[1], Identity if first_ok else ValueError)
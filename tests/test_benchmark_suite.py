@@ -0,0 +1,30 @@
+import json
+
+from benchmarks import suite
+
+
+def test_every_benchmark_runs():
+    results = suite.run(scale=0.001, rounds=1)
+    assert set(results) == set(suite.BENCHMARKS)
+    assert all(ns > 0 for ns in results.values())
+
+
+def test_compare_flags_only_slowdowns_beyond_threshold():
+    report = suite.compare({"a": 130.0, "b": 120.0, "c": 50.0, "d": 10.0}, {"a": 100.0, "b": 100.0, "c": 100.0}, 0.25)
+    assert report["a"]["regression"] is True
+    assert report["b"]["regression"] is False
+    assert report["c"]["ratio"] == 0.5
+    assert report["d"] == {"ns_per_op": 10.0, "baseline": None, "ratio": None, "regression": False}
+
+
+def test_baseline_roundtrip_and_exit_code(tmp_path, monkeypatch):
+    path = str(tmp_path / "baseline.json")
+    assert suite.load_baseline(path) == {}
+    suite.save_baseline({"compose": 100.04}, path)
+    assert json.load(open(path))["benchmarks"]["compose"] == {"ns_per_op": 100.0}
+
+    monkeypatch.setattr(suite, "run", lambda only, scale, rounds: {"compose": 200.0})
+    assert suite.main(["--baseline", path]) == 1
+    assert suite.main(["--baseline", path, "--threshold", "1.5"]) == 0
+    assert suite.main(["--baseline", path, "--save"]) == 0
+    assert suite.load_baseline(path) == {"compose": 200.0}
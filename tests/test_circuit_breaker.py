@@ -0,0 +1,135 @@
+import asyncio
+import httpx
+import pytest
+
+from app.domain.entities import Identity
+from app.domain.ports import AsyncAuthGateway, CircuitOpenError, IdentityNotFoundError
+from app.adapters.driven.circuit_breaker import CircuitBreaker, CircuitBreakerAuthGateway, auth_outage
+from tests.conftest import Clock
+
+
+def _breaker(clock, **kw):
+    opts = dict(failure_rate=0.5, window=4, min_calls=4, cooldown=10)
+    opts.update(kw)
+    return CircuitBreaker("dep", clock=clock, **opts)
+
+
+def _calls(breaker, outcomes):
+    for ok in outcomes:
+        breaker.allow()
+        breaker.record(ok)
+
+
+def test_opens_on_failure_rate_after_min_calls(clock):
+    b = _breaker(clock)
+    _calls(b, [False, True, False])
+    assert b.state == "closed"  # só 3 chamadas na janela
+    _calls(b, [True])
+    assert b.state == "open"
+
+    with pytest.raises(CircuitOpenError) as exc:
+        b.allow()
+    assert exc.value.retry_after == 10
+    stats = b.stats()
+    assert (stats["state"], stats["opened"], stats["rejected"]) == ("open", 1, 1)
+
+
+def test_window_forgets_old_failures():
+    b = _breaker(Clock())
+    _calls(b, [False, True, True, True, True, True])
+    assert b.state == "closed"
+    assert b.stats()["failure_rate"] == 0.0
+
+
+def test_half_open_closes_after_successful_trial(clock):
+    b = _breaker(clock, min_calls=1, half_open_calls=2)
+    _calls(b, [False])
+    clock.now = 10
+    assert b.state == "half_open"
+
+    b.allow()
+    b.allow()
+    with pytest.raises(CircuitOpenError):
+        b.allow()  # testes esgotados até alguém responder
+    b.record(True)
+    assert b.state == "half_open"
+    b.record(True)
+    assert b.state == "closed"
+
+
+def test_half_open_failure_reopens_and_release_returns_trial(clock):
+    b = _breaker(clock, min_calls=1)
+    _calls(b, [False])
+    clock.now = 10
+    b.allow()
+    b.release()
+    b.allow()
+    b.record(False)
+    assert b.state == "open"
+    assert b.stats()["opened"] == 2
+    clock.now = 15
+    assert b.stats()["retry_after"] == 5
+
+
+def test_invalid_failure_rate():
+    with pytest.raises(ValueError):
+        CircuitBreaker("dep", failure_rate=0)
+
+
+def test_auth_outage_classification():
+    request = httpx.Request("GET", "http://auth/api/client/1")
+    assert auth_outage(httpx.ConnectTimeout("timeout", request=request))
+    assert auth_outage(httpx.HTTPStatusError("boom", request=request, response=httpx.Response(503, request=request)))
+    assert not auth_outage(httpx.HTTPStatusError("no", request=request, response=httpx.Response(401, request=request)))
+    assert not auth_outage(IdentityNotFoundError("Cliente não encontrado"))
+
+
+class FlakyAuth(AsyncAuthGateway):
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+
+    async def resolve_identity(self, user_id):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        if user_id == 404:
+            raise IdentityNotFoundError("Cliente não encontrado")
+        return Identity(email=f"{user_id}@x", name="n")
+
+
+def test_auth_gateway_fails_fast_when_open(clock):
+    inner = FlakyAuth()
+    gw = CircuitBreakerAuthGateway(inner, _breaker(clock, window=2, min_calls=2))
+
+    async def run():
+        inner.error = httpx.ConnectError("refused")
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                await gw.resolve_identity(1)
+        with pytest.raises(CircuitOpenError):
+            await gw.resolve_identity(1)
+        batch = await gw.resolve_identities([1, 2])
+        assert all(isinstance(v, CircuitOpenError) for v in batch.values())
+        assert inner.calls == 2
+
+        clock.now = 10
+        inner.error = None
+        assert (await gw.resolve_identity(1)).email == "1@x"
+
+    asyncio.run(run())
+    assert gw.breaker.state == "closed"
+
+
+def test_auth_gateway_not_found_is_not_an_outage():
+    gw = CircuitBreakerAuthGateway(FlakyAuth(), _breaker(Clock(), window=2, min_calls=2))
+
+    async def run():
+        for _ in range(3):
+            with pytest.raises(IdentityNotFoundError):
+                await gw.resolve_identity(404)
+        results = await gw.resolve_identities([1, 404])
+        assert isinstance(results[404], IdentityNotFoundError)
+
+    asyncio.run(run())
+    assert gw.breaker.stats()["failure_rate"] == 0.0
@@ -6,8 +6,8 @@ from types import SimpleNamespace
 DefaultEmailComposer = getattr(import_module(MODULE), "DefaultEmailComposer")
 
 
-def _identity(email="user@example.com", name="Mateus"):
-    return SimpleNamespace(email=email, name=name)
+def _identity(email="user@example.com", name="Mateus", locale=None):
+    return SimpleNamespace(email=email, name=name, locale=locale)
 
 
 def _data_success(job_id="123", video_url="http://videos/123.mp4"):
@@ -92,3 +92,65 @@ def test_compose_error_without_detail_uses_default_message():
     assert "Detalhes: não informado." in msg.html
     assert "Cliente X" in msg.text
     assert "<strong>Cliente X</strong>" in msg.html
+
+
+def test_async_composer_delegates_to_sync_composer():
+    import asyncio
+
+    AsyncDefaultEmailComposer = getattr(import_module(MODULE), "AsyncDefaultEmailComposer")
+    composer = AsyncDefaultEmailComposer()
+    msg = asyncio.run(composer.compose(_data_success(job_id="5"), _identity()))
+    assert msg.subject == "Seu vídeo foi processado (#5)"
+    assert msg.to == "user@example.com"
+
+
+def test_compose_escapes_html_but_not_text():
+    composer = DefaultEmailComposer()
+    data = _data_error(job_id="7", error_message="<script>alert(1)</script>")
+
+    msg = composer.compose(data, _identity(name="Ana & Bia"))
+
+    assert "Olá, Ana & Bia!" in msg.text
+    assert "<strong>Ana &amp; Bia</strong>" in msg.html
+    assert "&lt;script&gt;" in msg.html
+    assert "<script>" not in msg.html
+
+
+def test_compose_uses_identity_locale():
+    composer = DefaultEmailComposer()
+
+    msg = composer.compose(_data_success(job_id="8"), _identity(name="Ann", locale="en-US"))
+
+    assert msg.subject == "Your video has been processed (#8)"
+    assert "Hi, Ann!" in msg.text
+    assert '<a href="http://videos/123.mp4">Open video</a>' in msg.html
+
+
+def test_compose_neutralizes_unsafe_video_url():
+    composer = DefaultEmailComposer()
+    data = _data_success(job_id="9", video_url='javascript:alert("x")')
+
+    msg = composer.compose(data, _identity())
+
+    assert '<a href="#">Abrir vídeo</a>' in msg.html
+    assert "javascript" not in msg.html
+
+
+def test_compose_digest_lists_every_job_in_one_email():
+    composer = DefaultEmailComposer()
+    items = [_data_success(job_id="1", video_url="javascript:alert(1)"), _data_error(job_id="2", error_message="<b>codec</b>")]
+
+    msg = composer.compose_digest(items, _identity())
+
+    assert msg.to == "user@example.com"
+    assert msg.subject == "Resumo dos seus vídeos (2)"
+    assert "- Job 1: processado com sucesso" in msg.text
+    assert "- Job 2: falha no processamento\n  Detalhes: <b>codec</b>" in msg.text
+    assert msg.html.count("<li>") == 2
+    assert '<a href="#">' in msg.html
+    assert "&lt;b&gt;codec&lt;/b&gt;" in msg.html
+
+
+def test_compose_digest_uses_locale():
+    msg = DefaultEmailComposer().compose_digest([_data_success(), _data_success()], _identity(locale="en-US"))
+    assert msg.subject == "Summary of your videos (2)"
@@ -0,0 +1,83 @@
+import asyncio
+
+from app.domain.entities import NotificationInput
+from app.domain.services.delivery_workers import DeliveryWorkers
+from app.adapters.driven.queue_memory import InMemoryNotificationQueue
+
+
+class FakeService:
+    def __init__(self, fail_jobs=()):
+        self.fail_jobs = set(fail_jobs)
+        self.delivered = []
+
+    async def execute(self, data):
+        await asyncio.sleep(0)
+        if data.job_id in self.fail_jobs:
+            raise ValueError("Cliente não encontrado")
+        self.delivered.append(data.job_id)
+        return {"ok": True}
+
+
+def _data(job_id):
+    return NotificationInput(job_id=job_id, status="success", user_id=1)
+
+
+def test_workers_drain_queue_and_record_failures():
+    async def run():
+        q = InMemoryNotificationQueue()
+        svc = FakeService(fail_jobs={"2"})
+        workers = DeliveryWorkers(q, svc, concurrency=3)
+        ids = [await q.put(_data(str(i))) for i in range(5)]
+        workers.start()
+        assert workers.running
+        await asyncio.wait_for(q._queue.join(), 1)
+        await workers.stop()
+        assert not workers.running
+        return svc, q, ids
+
+    svc, q, ids = asyncio.run(run())
+    assert sorted(svc.delivered) == ["0", "1", "3", "4"]
+    assert list(q.failed) == [(ids[2], "Cliente não encontrado")]
+
+
+def test_start_is_idempotent_and_stop_without_start():
+    async def run():
+        workers = DeliveryWorkers(InMemoryNotificationQueue(), FakeService(), concurrency=2)
+        await workers.stop()
+        workers.start()
+        first = list(workers._tasks)
+        workers.start()
+        assert workers._tasks == first
+        await workers.stop()
+
+    asyncio.run(run())
+
+
+def test_open_circuit_defers_item_instead_of_failing():
+    from app.domain.ports import CircuitOpenError
+
+    class DownThenUp(FakeService):
+        def __init__(self):
+            super().__init__()
+            self.attempts = 0
+
+        async def execute(self, data):
+            self.attempts += 1
+            if self.attempts < 3:
+                raise CircuitOpenError("SMTP indisponível", retry_after=0)
+            return await super().execute(data)
+
+    async def run():
+        q = InMemoryNotificationQueue()
+        svc = DownThenUp()
+        workers = DeliveryWorkers(q, svc, concurrency=1, min_defer=0.01)
+        await q.put(_data("1"))
+        workers.start()
+        await asyncio.wait_for(q._queue.join(), 1)
+        await workers.stop()
+        return svc, q
+
+    svc, q = asyncio.run(run())
+    assert svc.delivered == ["1"]
+    assert svc.attempts == 3
+    assert not q.failed
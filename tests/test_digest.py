@@ -0,0 +1,139 @@
+import asyncio
+
+from app.domain.entities import NotificationInput
+from app.domain.services.digest import DigestAggregator
+from app.domain.services.delivery_workers import DeliveryWorkers
+from app.adapters.driven.queue_memory import InMemoryNotificationQueue
+
+
+class FakeService:
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    async def execute_digest(self, items):
+        self.batches.append([d.job_id for d in items])
+        if self.error:
+            raise self.error
+        return {"ok": True, "digest": len(items)}
+
+
+def _data(job_id, user_id=1):
+    return NotificationInput(job_id=job_id, status="success", user_id=user_id)
+
+
+def test_items_of_same_user_within_window_become_one_email(clock):
+    svc = FakeService()
+    digest = DigestAggregator(svc, window=5, max_wait=60, max_items=10, clock=clock)
+
+    async def run():
+        first = digest.add(_data("1"))
+        clock.now = 3
+        second = digest.add(_data("2"))
+        other = digest.add(_data("9", user_id=2))
+        clock.now = 7  # a janela do "1" passou, mas o "2" a empurrou para 8
+        assert digest.flush_due() == 0
+        clock.now = 8
+        assert digest.flush_due() == 2
+        return await asyncio.gather(first, second, other)
+
+    results = asyncio.run(run())
+    assert sorted(svc.batches) == [["1", "2"], ["9"]]
+    assert results[0] == results[1] == {"ok": True, "digest": 2}
+    assert digest.stats() == {"items": 3, "emails": 2, "waiting": 0}
+
+
+def test_loop_timer_flushes_with_the_default_clock():
+    svc = FakeService()
+    digest = DigestAggregator(svc, window=0.01, max_wait=1, max_items=10)
+
+    async def run():
+        return await asyncio.wait_for(digest.submit(_data("1")), 1)
+
+    assert asyncio.run(run()) == {"ok": True, "digest": 1}
+    assert svc.batches == [["1"]]
+
+
+def test_early_timer_is_rearmed_until_the_batch_is_due(clock):
+    svc = FakeService()
+    digest = DigestAggregator(svc, window=5, max_wait=60, max_items=10, clock=clock)
+
+    async def run():
+        future = digest.add(_data("1"))
+        clock.now = 4.999
+        digest._expire(1)
+        assert digest.stats()["waiting"] == 1
+        clock.now = 5
+        digest._expire(1)
+        return await future
+
+    asyncio.run(run())
+    assert svc.batches == [["1"]]
+
+
+def test_max_items_flushes_immediately():
+    svc = FakeService()
+    digest = DigestAggregator(svc, window=60, max_wait=60, max_items=2)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(digest.submit(_data("1")), digest.submit(_data("2"))), 1)
+
+    asyncio.run(run())
+    assert svc.batches == [["1", "2"]]
+
+
+def test_max_wait_caps_a_window_that_keeps_sliding(clock):
+    svc = FakeService()
+    digest = DigestAggregator(svc, window=10, max_wait=22, max_items=100, clock=clock)
+
+    async def run():
+        futures = []
+        for i in range(6):  # cada item chega antes da janela fechar
+            clock.now = i * 5
+            assert digest.flush_due() == (1 if i == 5 else 0)
+            futures.append(digest.add(_data(str(i))))
+        clock.now = 35
+        assert digest.flush_due() == 1
+        await asyncio.gather(*futures)
+
+    asyncio.run(run())
+    assert svc.batches == [["0", "1", "2", "3", "4"], ["5"]]
+
+
+def test_failure_is_shared_by_all_items_and_close_flushes():
+    svc = FakeService(error=RuntimeError("smtp down"))
+    digest = DigestAggregator(svc, window=60, max_wait=60, max_items=10)
+
+    async def run():
+        futures = [digest.add(_data("1")), digest.add(_data("2"))]
+        await digest.close()
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert [str(r) for r in results] == ["smtp down", "smtp down"]
+    assert svc.batches == [["1", "2"]]
+
+
+def test_workers_keep_pulling_while_items_wait_for_the_digest():
+    svc = FakeService()
+    digest = DigestAggregator(svc, window=60, max_wait=60, max_items=3)
+
+    async def run():
+        q = InMemoryNotificationQueue()
+        workers = DeliveryWorkers(q, svc, concurrency=1, digest=digest)
+        for i in range(4):
+            await q.put(_data(str(i)))
+        workers.start()
+        for _ in range(100):  # só cede o loop; nenhum prazo do resumo vence aqui
+            if svc.batches:
+                break
+            await asyncio.sleep(0)
+        # um worker só, mas os 3 primeiros já saíram juntos; o 4º espera a janela
+        assert svc.batches == [["0", "1", "2"]]
+        await workers.stop()  # envia o que ficou esperando
+        return q
+
+    q = asyncio.run(run())
+    assert svc.batches == [["0", "1", "2"], ["3"]]
+    assert q._queue._unfinished_tasks == 0
+    assert not q.failed
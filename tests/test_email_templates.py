@@ -0,0 +1,133 @@
+import os
+import pytest
+
+from app.adapters.driven.email_templates import EmailTemplates, TemplateError, compile_template
+
+VARS = ("name", "url")
+
+
+def _write(root, locale, status, subject="S {{ name }}", text="T {{ name }}", html="<b>{{ name }}</b>"):
+    folder = root / locale / status
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / "subject.txt").write_text(subject, encoding="utf-8")
+    (folder / "text.txt").write_text(text, encoding="utf-8")
+    (folder / "body.html").write_text(html, encoding="utf-8")
+    return folder
+
+
+def test_compile_template_variables_and_conditionals():
+    render = compile_template(
+        'Oi {{name}}!{% if url %}\n"{{ url }}"\\{x}{% else %} sem link{% endif %}\n',
+        VARS,
+    )
+    assert render("Ana", "http://v") == 'Oi Ana!\n"http://v"\\{x}'
+    assert render("Ana", "") == "Oi Ana! sem link"
+
+
+def test_compile_template_nested_if_and_escape():
+    render = compile_template(
+        "{% if name %}<p>{{ name }}{% if url %} <a href=\"{{ url }}\">x</a>{% endif %}</p>{% endif %}",
+        VARS,
+        escape=True,
+    )
+    assert render("<Ana & \"Bia\">", "http://v?a=1&b=2") == (
+        '<p>&lt;Ana &amp; &quot;Bia&quot;&gt; <a href="http://v?a=1&amp;b=2">x</a></p>'
+    )
+    assert render("", "http://v") == ""
+
+
+def test_url_filter_sanitizes_in_text_and_html():
+    text = compile_template("{% if url %}Link: {{ url|url }}{% endif %}", VARS)
+    html = compile_template('<a href="{{ url | url }}">{{ name }}</a>', VARS, escape=True)
+
+    assert text("a", "javascript:alert(1)") == "Link: #"
+    assert text("a", "https://v") == "Link: https://v"
+    assert html("<b>", "https://v?a=1&b=2") == '<a href="https://v?a=1&amp;b=2">&lt;b&gt;</a>'
+    assert html("b", "javascript:alert(1)") == '<a href="#">b</a>'
+
+
+def test_raw_filter_skips_escaping():
+    html = compile_template("<ul>{{ name|raw }}</ul>{% if url %}{{ name | raw }}{% endif %}", VARS, escape=True)
+    assert html("<li>a</li>", "") == "<ul><li>a</li></ul>"
+    assert html("<li>a</li>", "x") == "<ul><li>a</li></ul><li>a</li>"
+
+
+@pytest.mark.parametrize("source, message", [
+    ("{{ idade }}", "variável desconhecida"),
+    ("{{ name|upper }}", "filtro desconhecido"),
+    ("{% if name %}x", "sem 'endif'"),
+    ("x{% endif %}", "sem 'if'"),
+    ("{% if %}x{% endif %}", "sem variável"),
+])
+def test_compile_template_errors(source, message):
+    with pytest.raises(TemplateError, match=message):
+        compile_template(source, VARS)
+
+
+def test_locale_falls_back_to_language_then_default(tmp_path):
+    _write(tmp_path, "pt_BR", "success", subject="pt")
+    _write(tmp_path, "en", "success", subject="en")
+    templates = EmailTemplates(VARS, str(tmp_path), reload_interval=None)
+
+    assert templates.get("success", "en-US").render("a", "")[0] == "en"
+    assert templates.get("success", "fr").render("a", "")[0] == "pt"
+    assert templates.get("success").render("a", "")[0] == "pt"
+    with pytest.raises(TemplateError, match="não encontrado"):
+        templates.get("error")
+
+
+def test_unknown_locales_fall_back_without_touching_other_paths(tmp_path):
+    root = tmp_path / "templates"
+    _write(root, "pt_BR", "success", subject="pt")
+    _write(tmp_path, "evil", "success", subject="evil")  # fora da raiz dos templates
+    templates = EmailTemplates(VARS, str(root), reload_interval=None)
+
+    for locale in ("../evil", "../evil/..", "/etc", "evil", "x" * 500):
+        assert templates.get("success", locale).render("a", "")[0] == "pt"
+    for i in range(1000):
+        templates.get("success", f"zz_{i}")
+    assert len(templates._cache) == 1
+    assert len(templates._fast) <= 256
+
+
+def test_fast_path_skips_locale_resolution_and_clock(tmp_path, monkeypatch):
+    _write(tmp_path, "pt_BR", "success")
+    calls = []
+    templates = EmailTemplates(VARS, str(tmp_path), reload_interval=None, clock=lambda: calls.append(1) or 0.0)
+    first = templates.get("success", "en-US")
+    monkeypatch.setattr(templates, "_candidates", None)  # um acerto não pode chegar aqui
+    calls.clear()
+    assert templates.get("success", "en-US") is first
+    assert calls == []
+
+
+def test_templates_are_cached_and_reloaded_on_mtime_change(tmp_path, clock):
+    folder = _write(tmp_path, "pt_BR", "success", subject="v1 {{ name }}")
+    templates = EmailTemplates(VARS, str(tmp_path), reload_interval=5, clock=clock)
+
+    first = templates.get("success")
+    assert first.render("Ana", "")[0] == "v1 Ana"
+    assert templates.get("success") is first
+
+    path = folder / "subject.txt"
+    path.write_text("v2 {{ name }}", encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert templates.get("success") is first  # ainda dentro do intervalo
+
+    clock.now = 6
+    assert templates.get("success").render("Ana", "")[0] == "v2 Ana"
+
+
+def test_unchanged_files_keep_compiled_template(tmp_path, clock):
+    _write(tmp_path, "pt_BR", "success")
+    templates = EmailTemplates(VARS, str(tmp_path), reload_interval=1, clock=clock)
+    first = templates.get("success")
+    clock.now = 10
+    assert templates.get("success") is first
+
+
+def test_text_and_subject_are_not_escaped(tmp_path):
+    _write(tmp_path, "pt_BR", "success")
+    templates = EmailTemplates(VARS, str(tmp_path))
+    assert templates.get("success").render("A&B", "") == ("S A&B", "T A&B", "<b>A&amp;B</b>")
@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+
+from app.domain.ports import IdempotencyConflictError, IdempotencyKeyMismatchError
+from app.adapters.driven.idempotency_memory import InMemoryIdempotencyStore
+from app.adapters.driven.idempotency_sqlite import SqliteIdempotencyStore
+from tests.conftest import Clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(clock, **kw):
+        if request.param == "memory":
+            return InMemoryIdempotencyStore(clock=clock, **kw)
+        return SqliteIdempotencyStore(str(tmp_path / "idem.db"), clock=clock, **kw)
+    return make
+
+
+def test_begin_complete_replay(make_store):
+    async def run():
+        store = make_store(Clock(1000.0))
+        assert await store.begin("k", "fp") is None
+        with pytest.raises(IdempotencyConflictError):
+            await store.begin("k", "fp")
+        await store.complete("k", {"ok": True, "id": "x"})
+        assert await store.begin("k", "fp") == {"ok": True, "id": "x"}
+        with pytest.raises(IdempotencyKeyMismatchError):
+            await store.begin("k", "other")
+
+    asyncio.run(run())
+
+
+def test_release_allows_retry(make_store):
+    async def run():
+        store = make_store(Clock(1000.0))
+        await store.begin("k", "fp")
+        await store.release("k")
+        assert await store.begin("k", "fp") is None
+        await store.complete("k", {"ok": True})
+        await store.release("k")  # resultado gravado não é liberado
+        assert await store.begin("k", "fp") == {"ok": True}
+
+    asyncio.run(run())
+
+
+def test_results_and_reservations_expire(make_store):
+    async def run():
+        clock = Clock(1000.0)
+        store = make_store(clock, ttl=100, inflight_ttl=10)
+        await store.begin("stuck", "fp")
+        await store.begin("done", "fp")
+        await store.complete("done", {"ok": True})
+        clock.now += 11
+        assert await store.begin("stuck", "fp") is None
+        assert await store.begin("done", "fp") == {"ok": True}
+        clock.now += 100
+        assert await store.begin("done", "fp") is None
+
+    asyncio.run(run())
+
+
+def test_memory_store_is_bounded_lru():
+    async def run():
+        store = InMemoryIdempotencyStore(max_size=2, clock=Clock(1000.0))
+        for key in ("a", "b", "c"):
+            await store.begin(key, "fp")
+            await store.complete(key, {"key": key})
+        assert len(store) == 2
+        assert await store.begin("a", "fp") is None
+
+    asyncio.run(run())
+
+
+def test_sqlite_store_reconnects_after_close(tmp_path):
+    async def run():
+        store = SqliteIdempotencyStore(str(tmp_path / "idem.db"))
+        await store.begin("k", "fp")
+        store.close()
+        store.close()
+        await store.complete("k", {"ok": True})
+        result = await store.begin("k", "fp")
+        store.close()
+        return result
+
+    assert asyncio.run(run()) == {"ok": True}
+
+
+def test_sqlite_store_survives_reopen(tmp_path):
+    async def run():
+        path = str(tmp_path / "idem.db")
+        store = SqliteIdempotencyStore(path)
+        await store.begin("k", "fp")
+        await store.complete("k", {"ok": True})
+        store.close()
+        return await SqliteIdempotencyStore(path).begin("k", "fp")
+
+    assert asyncio.run(run()) == {"ok": True}
+
+
+def test_sqlite_store_purges_expired_rows(tmp_path):
+    async def run():
+        clock = Clock(1000.0)
+        store = SqliteIdempotencyStore(str(tmp_path / "idem.db"), inflight_ttl=1, purge_every=2, clock=clock)
+        await store.begin("old", "fp")
+        clock.now += 5
+        await store.begin("new", "fp")
+        return store._db.execute("SELECT key FROM idempotency_keys").fetchall()
+
+    assert asyncio.run(run()) == [("new",)]
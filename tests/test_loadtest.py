@@ -0,0 +1,109 @@
+import asyncio
+import smtplib
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.adapters.driven.smtp_pipeline import send_pipelined, supports_pipelining
+from loadtest.fake_auth import BULK_PATH, create_app
+from loadtest.loadgen import payloads, percentile, run_load
+from loadtest.smtp_sink import SmtpSink
+
+
+def _with_sink(fn, **kw):
+    """Roda o sink num loop e ``fn(port)`` (smtplib bloqueante) numa thread."""
+    async def run():
+        async with SmtpSink(seed=1, **kw) as sink:
+            result = await asyncio.to_thread(fn, sink.port)
+            return result, sink.stats
+
+    return asyncio.run(run())
+
+
+def test_sink_accepts_login_and_messages():
+    def send(port):
+        with smtplib.SMTP("127.0.0.1", port, timeout=5) as c:
+            c.login("u", "p")
+            c.sendmail("a@x", ["b@y"], b"Subject: oi\r\n\r\n.linha com ponto\r\n")
+            assert c.noop()[0] == 250
+
+    _, stats = _with_sink(send)
+    assert stats["messages"] == 1
+    assert stats["connections"] == 1
+
+
+def test_sink_supports_pipelining():
+    def send(port):
+        with smtplib.SMTP("127.0.0.1", port, timeout=5) as c:
+            assert supports_pipelining(c)
+            outcomes = []
+            send_pipelined(c, [("a@x", f"u{i}@y", b"corpo") for i in range(5)], outcomes)
+            return outcomes
+
+    outcomes, stats = _with_sink(send)
+    assert outcomes == [None] * 5
+    assert stats["messages"] == 5
+
+
+def test_sink_injects_data_errors_and_disconnects():
+    def data_error(port):
+        with smtplib.SMTP("127.0.0.1", port, timeout=5) as c:
+            assert not supports_pipelining(c)
+            with pytest.raises(smtplib.SMTPDataError):
+                c.sendmail("a@x", ["b@y"], b"x")
+
+    def disconnect(port):
+        c = smtplib.SMTP("127.0.0.1", port, timeout=5)
+        with pytest.raises(smtplib.SMTPServerDisconnected):
+            c.sendmail("a@x", ["b@y"], b"x")
+
+    _, stats = _with_sink(data_error, pipelining=False, data_error_rate=1.0)
+    assert (stats["data_errors"], stats["messages"]) == (1, 0)
+    _, stats = _with_sink(disconnect, disconnect_rate=1.0)
+    assert stats["disconnects"] == 1
+
+
+def test_fake_auth_single_bulk_and_injected_failures():
+    client = TestClient(create_app())
+    r = client.get("/api/client/7")
+    assert r.json()["email"] == "user7@example.com"
+    r = client.post(BULK_PATH, json={"ids": [1, 2]})
+    assert [c["id"] for c in r.json()] == [1, 2]
+
+    assert TestClient(create_app(not_found_rate=1.0)).get("/api/client/7").status_code == 404
+    failing = create_app(error_rate=1.0)
+    assert TestClient(failing).get("/api/client/7").status_code == 500
+    assert failing.state.stats["errors"] == 1
+
+
+def test_percentile_nearest_rank():
+    ordered = [float(i) for i in range(1, 101)]
+    assert percentile(ordered, 0.50) == 50
+    assert percentile(ordered, 0.99) == 99
+    assert percentile(ordered, 1.0) == 100
+    assert percentile([], 0.5) == 0.0
+
+
+def test_run_load_reports_latency_throughput_and_errors():
+    app = FastAPI()
+
+    @app.post("/notify")
+    async def notify(body: dict):
+        return {"ok": True} if body["status"] == "success" else {}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://svc") as client:
+            ok = await run_load(client, rps=200, duration=0.1, make_payload=payloads(error_ratio=0.0, seed=1))
+            bad = await run_load(client, rps=200, duration=0.1, make_payload=lambda i: {}, path="/missing")
+        return ok, bad
+
+    ok, bad = asyncio.run(run())
+    summary = ok.summary()
+    assert summary["requests"] == 20
+    assert summary["statuses"] == {"200": 20}
+    assert summary["error_rate"] == 0.0
+    assert summary["throughput_rps"] > 0
+    assert set(summary["latency_ms"]) == {"p50", "p95", "p99", "max"}
+    assert bad.summary()["error_rate"] == 1.0
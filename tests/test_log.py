@@ -0,0 +1,99 @@
+import io, json, logging, queue, sys
+
+from infra import log
+from infra.log import (
+    DroppingQueueHandler, JsonFormatter, RedactingFilter, Redactor, SamplingFilter, TraceContextFilter,
+)
+
+
+def _record(msg="m", *args, name="app.x", level=logging.INFO, **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    for k, v in extra.items():
+        setattr(record, k, v)
+    return record
+
+
+def test_redactor_masks_emails_and_secrets():
+    redact = Redactor(["s3nha", "", "s3nha-longa"])
+    assert redact("login joao.silva@example.com.br com s3nha-longa e s3nha") == (
+        "login j***@example.com.br com *** e ***"
+    )
+
+
+def test_redacting_filter_formats_message_traceback_and_extras():
+    f = RedactingFilter(Redactor(["pw"]))
+    try:
+        raise RuntimeError("auth pw falhou")
+    except RuntimeError:
+        record = _record("para %s", "ana@x.io", to="bia@y.com")
+        record.exc_info = sys.exc_info()
+
+    assert f.filter(record)
+    assert (record.msg, record.args) == ("para a***@x.io", None)
+    assert record.to == "b***@y.com"
+    assert record.exc_info is None
+    assert "auth *** falhou" in record.exc_text
+
+
+def test_sampling_keeps_warnings_and_uses_longest_prefix_or_event():
+    f = SamplingFilter({"app": 0.0, "app.keep": 1.0, "entrega": 0.5}, rng=lambda: 0.4)
+    assert not f.filter(_record(name="app.x"))
+    assert f.filter(_record(name="app.keep.y"))
+    assert f.filter(_record(name="app.x", level=logging.WARNING))
+    assert f.filter(_record(name="app.x", event="entrega"))  # 0.4 < 0.5
+    assert f.filter(_record(name="outro"))
+
+
+def test_trace_context_filter_adds_ids_when_span_active():
+    span = type("S", (), {"trace_id": 123, "span_id": 456})()
+    tracer = type("T", (), {"current_span": lambda self: span})()
+    record = _record()
+    TraceContextFilter(tracer).filter(record)
+    assert (record.trace_id, record.span_id) == ("123", "456")
+
+    bare = _record()
+    TraceContextFilter(None).filter(bare)
+    assert not hasattr(bare, "trace_id")
+
+
+def test_json_formatter_one_line_with_extras():
+    line = JsonFormatter().format(_record("olá %s", "mundo", job_id="42"))
+    out = json.loads(line)
+    assert "\n" not in line
+    assert out["msg"] == "olá mundo"
+    assert (out["level"], out["logger"], out["job_id"]) == ("INFO", "app.x", "42")
+    assert out["ts"].endswith("Z")
+
+
+def test_queue_handler_drops_when_full_instead_of_blocking():
+    h = DroppingQueueHandler(queue.Queue(maxsize=1))
+    h.handle(_record("a"))
+    h.handle(_record("b"))
+    assert h.dropped == 1
+    assert h.queue.get_nowait().msg == "a"
+
+
+def test_parse_rates():
+    assert log.parse_rates(" a=0.1, b.c=1 ,") == {"a": 0.1, "b.c": 1.0}
+    assert log.parse_rates("") == {}
+
+
+def test_configure_writes_redacted_json_from_listener_thread():
+    stream = io.StringIO()
+    root = logging.getLogger()
+    level = root.level
+    try:
+        log.configure(level="DEBUG", stream=stream, secrets=["segredo"], sample_rates={"tests.amostrado": 0.0})
+        logger = logging.getLogger("tests.log")
+        logger.info("senha segredo de %s", "ze@exemplo.com", extra={"job_id": "1"})
+        logging.getLogger("tests.amostrado").debug("some")
+        logging.getLogger("httpx").info("HTTP Request: GET http://auth/api/client/1")
+        logging.getLogger("httpx").warning("httpx avisa")
+    finally:
+        log.shutdown()
+        root.setLevel(level)
+
+    lines = [json.loads(l) for l in stream.getvalue().splitlines()]
+    assert [l["msg"] for l in lines] == ["senha *** de z***@exemplo.com", "httpx avisa"]
+    assert lines[0]["job_id"] == "1"
+    assert not any(isinstance(h, DroppingQueueHandler) for h in root.handlers)
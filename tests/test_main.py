@@ -0,0 +1,15 @@
+import logging
+from fastapi.testclient import TestClient
+
+import main
+from infra import log
+
+
+def test_app_survives_two_lifespan_cycles():
+    controller = main.notification_controller
+    for _ in range(2):
+        with TestClient(main.app) as client:
+            assert client.get("/health/queue").status_code == 200
+            assert log._handler in logging.getLogger().handlers
+            assert controller._email._executor.submit(lambda: "ok").result() == "ok"
+        assert log._handler is None
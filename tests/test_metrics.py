@@ -0,0 +1,136 @@
+import pytest
+
+from infra import metrics
+from infra.metrics import Collected, Counter, Histogram, Registry
+
+
+def _sample(text, line_prefix):
+    return [l for l in text.splitlines() if l.startswith(line_prefix)]
+
+
+def test_histogram_cumulative_buckets_sum_and_count():
+    h = Histogram("x_seconds", "ajuda", ("stage",), buckets=(0.1, 1.0))
+    h.observe(0.05, "auth")
+    h.observe(0.1, "auth")  # "le" é inclusivo
+    h.observe(3.0, "auth")
+
+    lines = h.render()
+    assert lines[:2] == ["# HELP x_seconds ajuda", "# TYPE x_seconds histogram"]
+    assert lines[2:] == [
+        'x_seconds_bucket{stage="auth",le="0.1"} 2',
+        'x_seconds_bucket{stage="auth",le="1.0"} 2',
+        'x_seconds_bucket{stage="auth",le="+Inf"} 3',
+        'x_seconds_sum{stage="auth"} 3.15',
+        'x_seconds_count{stage="auth"} 3',
+    ]
+
+
+def test_collected_reads_values_at_render_time():
+    stats = {"hits": 1}
+    c = Collected("c_total", "c", "counter", lambda: {(k,): v for k, v in stats.items()}, ("result",))
+    stats["misses"] = 2
+    assert c.render() == [
+        "# HELP c_total c", "# TYPE c_total counter", 'c_total{result="hits"} 1.0', 'c_total{result="misses"} 2.0',
+    ]
+    assert Collected("g", "g", "gauge", lambda: {(): 3}).render()[2:] == ["g 3.0"]
+
+
+def test_registry_renders_every_metric():
+    reg = Registry()
+    reg.histogram("a_seconds", "a", ("stage",)).observe(0.2, "mime")
+    reg.counter("b_total", "b").inc()
+    c = reg.counter("c_total", "c", ("kind",))
+    c.inc("x", amount=2)
+
+    text = reg.render()
+    assert text.endswith("\n")
+    assert _sample(text, 'a_seconds_count{stage="mime"}') == ['a_seconds_count{stage="mime"} 1']
+    assert "b_total 1.0" in text
+    assert 'c_total{kind="x"} 2.0' in text
+
+
+def test_stage_observes_duration(monkeypatch):
+    hist = Histogram("s", "s", ("stage",))
+    monkeypatch.setattr(metrics, "STAGE_SECONDS", hist)
+    monkeypatch.setattr(metrics, "_enabled", True)
+    monkeypatch.setattr(metrics, "_tracer", None)
+
+    with metrics.stage("compose"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.stage("compose"):
+            raise ValueError("x")
+
+    assert 's_count{stage="compose"} 2' in hist.render()
+
+
+def test_disabled_stage_is_shared_noop(monkeypatch):
+    hist = Histogram("s", "s", ("stage",))
+    monkeypatch.setattr(metrics, "STAGE_SECONDS", hist)
+    monkeypatch.setattr(metrics, "SMTP_RETRIES", Counter("r", "r"))
+    monkeypatch.setattr(metrics, "_enabled", False)
+
+    assert metrics.stage("auth") is metrics.stage("send")
+    with metrics.stage("auth"):
+        pass
+    metrics.retried()
+    assert hist.render()[2:] == []
+    assert metrics.SMTP_RETRIES.render()[2:] == []
+
+
+class FakeSpan:
+    def __init__(self, name, resource):
+        self.name = name
+        self.resource = resource
+        self.finished = False
+        self.exc = None
+
+    def set_exc_info(self, exc_type, exc, tb):
+        self.exc = exc
+
+    def finish(self):
+        self.finished = True
+
+
+class FakeTracer:
+    def __init__(self, active=True):
+        self.active = active
+        self.spans = []
+
+    def current_span(self):
+        return object() if self.active else None
+
+    def trace(self, name, resource=None):
+        span = FakeSpan(name, resource)
+        self.spans.append(span)
+        return span
+
+
+def test_stage_opens_span_only_inside_active_trace(monkeypatch):
+    monkeypatch.setattr(metrics, "STAGE_SECONDS", Histogram("s", "s", ("stage",)))
+    monkeypatch.setattr(metrics, "_enabled", True)
+    tracer = FakeTracer()
+    monkeypatch.setattr(metrics, "_tracer", tracer)
+
+    with pytest.raises(OSError):
+        with metrics.stage("smtp_send"):
+            raise OSError("reset")
+    tracer.active = False
+    with metrics.stage("mime"):
+        pass
+
+    assert [(s.name, s.resource) for s in tracer.spans] == [("notification.smtp_send", "smtp_send")]
+    assert tracer.spans[0].finished
+    assert isinstance(tracer.spans[0].exc, OSError)
+
+
+def test_configure_picks_ddtrace_only_when_enabled(monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", True)
+    monkeypatch.setattr(metrics, "_tracer", None)
+    monkeypatch.setattr(metrics.importlib.util, "find_spec", lambda name: None)
+    metrics.configure(enabled=True, tracing=True)
+    assert metrics._tracer is None
+
+    metrics.configure(enabled=False)
+    assert metrics._enabled is False
+    assert metrics._tracer is None
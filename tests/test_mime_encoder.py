@@ -0,0 +1,59 @@
+from email import message_from_bytes
+from email.header import decode_header, make_header
+from types import SimpleNamespace
+
+import pytest
+
+from app.adapters.driven.mime_encoder import MimeEncoder, encode_header
+
+
+def _msg(**kw):
+    base = dict(to="dest@test", subject="Assunto", text="Olá,\nmundo", html="<p>Olá</p>")
+    base.update(kw)
+    return SimpleNamespace(**base)
+
+
+def _decoded(value):
+    return str(make_header(decode_header(value)))
+
+
+def test_encode_roundtrips_through_email_parser():
+    data = MimeEncoder("Serviço de Vídeos <noreply@test>").encode(_msg(text="a" * 200 + "\nç", html="<p>é</p>" * 50))
+    mime = message_from_bytes(data)
+
+    assert b"\r\n" in data and b"\n" not in data.replace(b"\r\n", b"")
+    assert max(len(line) for line in data.split(b"\r\n")) <= 78
+    assert _decoded(mime["From"]) == "Serviço de Vídeos <noreply@test>"
+    assert mime["To"] == "dest@test"
+    assert mime.get_content_type() == "multipart/alternative"
+    text, html = mime.get_payload()
+    assert text.get_payload(decode=True).decode("utf-8") == "a" * 200 + "\nç"
+    assert html.get_content_type() == "text/html"
+    assert html.get_payload(decode=True).decode("utf-8") == "<p>é</p>" * 50
+
+
+def test_envelope_from_is_bare_address():
+    assert MimeEncoder("Vídeos <noreply@test>").envelope_from == "noreply@test"
+    assert MimeEncoder("noreply@test").envelope_from == "noreply@test"
+
+
+def test_encode_header_keeps_ascii_and_encodes_the_rest():
+    assert encode_header("Seu video (#1)") == "Seu video (#1)"
+    subject = "Seu vídeo foi processado (#" + "9" * 80 + ")"
+    encoded = encode_header(subject)
+    assert all(len(line) <= 76 for line in encoded.split("\r\n"))
+    assert _decoded(encoded) == subject
+
+
+def test_encode_header_neutralizes_header_injection():
+    encoded = encode_header("x\r\nBcc: evil@test")
+    assert "\r\nBcc" not in encoded
+    mime = message_from_bytes(MimeEncoder("f@test").encode(_msg(subject="x\r\nBcc: evil@test")))
+    assert mime["Bcc"] is None
+    assert _decoded(mime["Subject"]) == "x\r\nBcc: evil@test"
+
+
+@pytest.mark.parametrize("to", ["a@test\r\nBcc: evil@test", "joão@test"])
+def test_encode_rejects_unsafe_recipient(to):
+    with pytest.raises(ValueError):
+        MimeEncoder("f@test").encode(_msg(to=to))
@@ -0,0 +1,118 @@
+import asyncio
+import pytest
+
+from app.domain.entities import NotificationInput
+from app.domain.ports import QueueFullError
+from app.adapters.driven.queue_memory import InMemoryNotificationQueue
+from app.adapters.driven.queue_sqlite import SqliteNotificationQueue
+
+
+def _data(job_id="1", **over):
+    base = dict(job_id=job_id, status="success", user_id=7, video_url="http://cdn/v.mp4")
+    base.update(over)
+    return NotificationInput(**base)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_queue(request, tmp_path):
+    def make(maxsize=10):
+        if request.param == "memory":
+            return InMemoryNotificationQueue(maxsize=maxsize)
+        return SqliteNotificationQueue(str(tmp_path / "q.db"), maxsize=maxsize, poll_interval=0.01)
+    return make
+
+
+def test_put_get_roundtrip_in_fifo_order(make_queue):
+    async def run():
+        q = make_queue()
+        id1 = await q.put(_data("a"))
+        id2 = await q.put(_data("b", status="error", error_message="x", video_url=None))
+        assert q.qsize() == 2
+        first = await q.get()
+        second = await q.get()
+        await q.ack(first.id)
+        await q.fail(second.id, "boom")
+        return id1, id2, first, second
+
+    id1, id2, first, second = asyncio.run(run())
+    assert (first.id, second.id) == (id1, id2)
+    assert first.data == _data("a")
+    assert second.data.error_message == "x"
+
+
+def test_put_raises_when_full(make_queue):
+    async def run():
+        q = make_queue(maxsize=1)
+        await q.put(_data("a"))
+        with pytest.raises(QueueFullError):
+            await q.put(_data("b"))
+
+    asyncio.run(run())
+
+
+def test_get_waits_for_put(make_queue):
+    async def run():
+        q = make_queue()
+        getter = asyncio.create_task(q.get())
+        await asyncio.sleep(0.02)
+        assert not getter.done()
+        await q.put(_data("late"))
+        item = await asyncio.wait_for(getter, 1)
+        return item
+
+    assert asyncio.run(run()).data.job_id == "late"
+
+
+def test_memory_queue_keeps_only_the_last_failures():
+    async def run():
+        q = InMemoryNotificationQueue(failed_limit=2)
+        for job_id in ("a", "b", "c"):
+            await q.put(_data(job_id))
+            item = await q.get()
+            await q.fail(item.id, f"erro {job_id}")
+        return q
+
+    q = asyncio.run(run())
+    assert [error for _, error in q.failed] == ["erro b", "erro c"]
+    assert q._queue._unfinished_tasks == 0
+
+
+def test_sqlite_queue_survives_restart_and_requeues_inflight(tmp_path):
+    path = str(tmp_path / "q.db")
+
+    async def first_process():
+        q = SqliteNotificationQueue(path)
+        await q.put(_data("a"))
+        await q.put(_data("b"))
+        claimed = await q.get()
+        q.close()
+        return claimed
+
+    async def second_process():
+        q = SqliteNotificationQueue(path)
+        items = [await q.get(), await q.get()]
+        for item in items:
+            await q.ack(item.id)
+        depth = q.qsize()
+        q.close()
+        return items, depth
+
+    claimed = asyncio.run(first_process())
+    items, depth = asyncio.run(second_process())
+    assert claimed.data.job_id == "a"
+    assert sorted(i.data.job_id for i in items) == ["a", "b"]
+    assert depth == 0
+
+
+def test_sqlite_queue_keeps_failed_rows_out_of_depth(tmp_path):
+    async def run():
+        q = SqliteNotificationQueue(str(tmp_path / "q.db"), maxsize=1)
+        await q.put(_data("a"))
+        item = await q.get()
+        await q.fail(item.id, "Cliente não encontrado")
+        await q.put(_data("b"))
+        row = q._db.execute("SELECT status, error FROM notification_queue WHERE id = ?", (item.id,)).fetchone()
+        q.close()
+        return row
+
+    assert asyncio.run(run()) == ("failed", "Cliente não encontrado")
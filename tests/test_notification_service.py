@@ -1,5 +1,6 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock
 
 from app.domain.entities import Identity, NotificationInput, EmailMessage
 from app.domain.services.notification_service import NotificationService
@@ -21,9 +22,9 @@ def _msg():
 
 
 def test_execute_happy_path_calls_all_dependencies_and_returns_ok():
-    auth = MagicMock()
-    email = MagicMock()
-    composer = MagicMock()
+    auth = AsyncMock()
+    email = AsyncMock()
+    composer = AsyncMock()
 
     auth.resolve_identity.return_value = Identity(email="user@example.com", name="Mateus")
     composer.compose.return_value = _msg()
@@ -31,24 +32,24 @@ def test_execute_happy_path_calls_all_dependencies_and_returns_ok():
     svc = NotificationService(auth=auth, email=email, composer=composer)
     data = _data()
 
-    result = svc.execute(data)
+    result = asyncio.run(svc.execute(data))
 
     assert result == {"ok": True}
-    auth.resolve_identity.assert_called_once_with(7)
-    composer.compose.assert_called_once()
+    auth.resolve_identity.assert_awaited_once_with(7)
+    composer.compose.assert_awaited_once()
     called_data, called_identity = composer.compose.call_args.args
     assert called_data is data
     assert called_identity == Identity(email="user@example.com", name="Mateus")
-    email.send.assert_called_once()
+    email.send.assert_awaited_once()
     sent_msg = email.send.call_args.args[0]
     assert isinstance(sent_msg, EmailMessage)
     assert sent_msg.to == "user@example.com"
 
 
 def test_execute_when_composer_raises_propagates_and_does_not_send_email():
-    auth = MagicMock()
-    email = MagicMock()
-    composer = MagicMock()
+    auth = AsyncMock()
+    email = AsyncMock()
+    composer = AsyncMock()
 
     auth.resolve_identity.return_value = Identity(email="u@x.com", name="X")
     composer.compose.side_effect = RuntimeError("boom")
@@ -57,15 +58,15 @@ def test_execute_when_composer_raises_propagates_and_does_not_send_email():
     data = _data()
 
     with pytest.raises(RuntimeError, match="boom"):
-        svc.execute(data)
+        asyncio.run(svc.execute(data))
 
-    email.send.assert_not_called()
+    email.send.assert_not_awaited()
 
 
 def test_execute_when_email_gateway_raises_propagates():
-    auth = MagicMock()
-    email = MagicMock()
-    composer = MagicMock()
+    auth = AsyncMock()
+    email = AsyncMock()
+    composer = AsyncMock()
 
     auth.resolve_identity.return_value = Identity(email="u@x.com", name="X")
     composer.compose.return_value = _msg()
@@ -75,7 +76,173 @@ def test_execute_when_email_gateway_raises_propagates():
     data = _data(status="error", error_message="e")
 
     with pytest.raises(ValueError, match="smtp down"):
-        svc.execute(data)
+        asyncio.run(svc.execute(data))
 
-    auth.resolve_identity.assert_called_once_with(7)
-    composer.compose.assert_called_once()
+    auth.resolve_identity.assert_awaited_once_with(7)
+    composer.compose.assert_awaited_once()
+
+
+class MemoryOutbox:
+    def __init__(self, pending=()):
+        self.entries = {e.id: ("pending", e.data) for e in pending}
+        self.events = []
+
+    async def record(self, data):
+        entry_id = f"e{len(self.entries)}"
+        self.entries[entry_id] = ("pending", data)
+        self.events.append(("record", entry_id))
+        return entry_id
+
+    async def mark_delivered(self, entry_id):
+        self.entries[entry_id] = ("delivered", self.entries[entry_id][1])
+        self.events.append(("delivered", entry_id))
+
+    async def mark_failed(self, entry_id, error):
+        self.entries[entry_id] = ("failed", error)
+        self.events.append(("failed", entry_id))
+
+    async def pending(self):
+        from app.domain.entities import QueuedNotification
+        return [QueuedNotification(id=k, data=v[1], enqueued_at=0.0) for k, v in self.entries.items() if v[0] == "pending"]
+
+
+def _svc(outbox, send_side_effect=None):
+    auth, email, composer = AsyncMock(), AsyncMock(), AsyncMock()
+    auth.resolve_identity.return_value = Identity(email="u@x.com", name="X")
+    composer.compose.return_value = _msg()
+    email.send.side_effect = send_side_effect
+    return NotificationService(auth=auth, email=email, composer=composer, outbox=outbox), email
+
+
+def test_execute_records_in_outbox_before_sending_and_marks_delivered():
+    outbox = MemoryOutbox()
+    svc, email = _svc(outbox)
+
+    async def send(message):
+        assert outbox.events == [("record", "e0")]
+
+    email.send.side_effect = send
+    assert asyncio.run(svc.execute(_data())) == {"ok": True}
+    assert outbox.events == [("record", "e0"), ("delivered", "e0")]
+
+
+def test_execute_marks_failed_and_propagates():
+    outbox = MemoryOutbox()
+    svc, _ = _svc(outbox, send_side_effect=RuntimeError("smtp down"))
+
+    with pytest.raises(RuntimeError, match="smtp down"):
+        asyncio.run(svc.execute(_data()))
+    assert outbox.entries["e0"] == ("failed", "smtp down")
+
+
+def test_replay_pending_redelivers_unfinished_entries():
+    from app.domain.entities import QueuedNotification
+
+    pending = [
+        QueuedNotification(id="old1", data=_data(job_id="1"), enqueued_at=0.0),
+        QueuedNotification(id="old2", data=_data(job_id="2"), enqueued_at=0.0),
+    ]
+    outbox = MemoryOutbox(pending)
+    svc, email = _svc(outbox, send_side_effect=[None, RuntimeError("x")])
+
+    assert asyncio.run(svc.replay_pending()) == 1
+    assert outbox.entries["old1"][0] == "delivered"
+    assert outbox.entries["old2"] == ("failed", "x")
+    assert email.send.await_count == 2
+
+
+def test_replay_pending_without_outbox_is_noop():
+    svc = NotificationService(auth=AsyncMock(), email=AsyncMock(), composer=AsyncMock())
+    assert asyncio.run(svc.replay_pending()) == 0
+
+
+def test_execute_many_resolves_in_bulk_and_reports_per_item():
+    auth, email, composer = AsyncMock(), AsyncMock(), AsyncMock()
+    auth.resolve_identities.return_value = {
+        1: Identity(email="a@x.com", name="A"),
+        2: ValueError("Cliente não encontrado"),
+        3: Identity(email="c@x.com", name="C"),
+    }
+
+    async def compose(data, identity):
+        return EmailMessage(to=identity.email, subject=data.job_id, text="t", html="h")
+
+    async def send_many(messages):
+        return [RuntimeError("Falha ao enviar e-mail: x") if m.to == "c@x.com" else None for m in messages]
+
+    composer.compose.side_effect = compose
+    email.send_many.side_effect = send_many
+    svc = NotificationService(auth=auth, email=email, composer=composer)
+    items = [_data(job_id="j1", user_id=1), _data(job_id="j2", user_id=2),
+             _data(job_id="j3", user_id=3), _data(job_id="j4", user_id=1)]
+
+    results = asyncio.run(svc.execute_many(items))
+
+    auth.resolve_identities.assert_awaited_once_with([1, 2, 3, 1])
+    auth.resolve_identity.assert_not_awaited()
+    assert results == [
+        {"job_id": "j1", "ok": True},
+        {"job_id": "j2", "ok": False, "error": "Cliente não encontrado"},
+        {"job_id": "j3", "ok": False, "error": "Falha ao enviar e-mail: x"},
+        {"job_id": "j4", "ok": True},
+    ]
+    email.send_many.assert_awaited_once()
+    assert [m.to for m in email.send_many.call_args.args[0]] == ["a@x.com", "c@x.com", "a@x.com"]
+
+
+def test_execute_many_records_and_marks_each_item_in_outbox():
+    outbox = MemoryOutbox()
+    auth, email, composer = AsyncMock(), AsyncMock(), AsyncMock()
+    auth.resolve_identities.return_value = {1: Identity(email="a@x.com", name="A"), 2: ValueError("nope")}
+    composer.compose.return_value = _msg()
+    email.send_many.return_value = [None]
+    svc = NotificationService(auth=auth, email=email, composer=composer, outbox=outbox)
+
+    asyncio.run(svc.execute_many([_data(user_id=1), _data(user_id=2)]))
+    assert outbox.entries["e0"][0] == "delivered"
+    assert outbox.entries["e1"] == ("failed", "nope")
+
+
+def test_execute_digest_sends_one_email_and_marks_every_entry():
+    outbox = MemoryOutbox()
+    svc, email = _svc(outbox)
+    svc._composer.compose_digest.return_value = _msg()
+    items = [_data(job_id="1"), _data(job_id="2", status="error", error_message="x")]
+
+    assert asyncio.run(svc.execute_digest(items)) == {"ok": True, "digest": 2}
+    svc._auth.resolve_identity.assert_awaited_once_with(7)
+    svc._composer.compose_digest.assert_awaited_once()
+    email.send.assert_awaited_once()
+    assert [v[0] for v in outbox.entries.values()] == ["delivered", "delivered"]
+
+
+def test_execute_digest_failure_marks_all_failed_and_single_item_is_plain():
+    outbox = MemoryOutbox()
+    svc, _ = _svc(outbox, send_side_effect=RuntimeError("smtp down"))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(svc.execute_digest([_data(job_id="1"), _data(job_id="2")]))
+    assert [v for v in outbox.entries.values()] == [("failed", "smtp down")] * 2
+
+    svc, email = _svc(None)
+    assert asyncio.run(svc.execute_digest([_data()])) == {"ok": True}
+    svc._composer.compose.assert_awaited_once()
+    svc._composer.compose_digest.assert_not_called()
+
+
+def test_execute_times_each_stage():
+    import contextlib
+    seen = []
+
+    @contextlib.contextmanager
+    def stage(name):
+        seen.append(name)
+        yield
+
+    auth, email, composer = AsyncMock(), AsyncMock(), AsyncMock()
+    auth.resolve_identity.return_value = Identity(email="user@example.com", name="Mateus")
+    composer.compose.return_value = _msg()
+    svc = NotificationService(auth=auth, email=email, composer=composer, stage=stage)
+
+    asyncio.run(svc.execute(_data()))
+    assert seen == ["auth", "compose", "send"]
@@ -1,12 +1,14 @@
 MODULE = "app.adapters.driver.controllers.notification_controller"
 
 from importlib import import_module
+import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 
-def _make_app_and_patch_service(monkeypatch, *, side_effect=None, return_value=None):
+def _make_app_and_patch_service(monkeypatch, *, side_effect=None, return_value=None, idempotency=None):
     mod = import_module(MODULE)
+    monkeypatch.setattr(mod, "_idempotency", idempotency, raising=True)
 
     class FakeService:
         def __init__(self, side_effect=None, return_value=None):
@@ -14,7 +16,7 @@ def _make_app_and_patch_service(monkeypatch, *, side_effect=None, return_value=N
             self.side_effect = side_effect
             self.return_value = return_value
 
-        def execute(self, data):
+        async def execute(self, data):
             self.calls.append(data)
             if self.side_effect:
                 raise self.side_effect
@@ -111,3 +113,509 @@ def test_post_notify_service_raises_returns_400(monkeypatch):
 
     assert len(fake.calls) == 1
     assert fake.calls[0].job_id == "77"
+
+
+def test_post_notify_open_circuit_returns_503_with_retry_after(monkeypatch):
+    from app.domain.ports import CircuitOpenError
+
+    err = CircuitOpenError("SMTP indisponível (circuito aberto)", retry_after=12.2)
+    _, _, client = _make_app_and_patch_service(monkeypatch, side_effect=err)
+
+    r = client.post("/notify", json={"job_id": "1", "status": "success", "user_id": 5})
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "13"
+
+
+def test_health_circuits_reports_breaker_state(monkeypatch):
+    import types
+    from app.adapters.driven.circuit_breaker import CircuitBreaker
+
+    mod, _, client = _make_app_and_patch_service(monkeypatch)
+    auth = CircuitBreaker("auth", window=1, min_calls=1)
+    auth.record(False)
+    monkeypatch.setattr(mod, "_auth_breaker", auth, raising=True)
+    relay = types.SimpleNamespace(name="default", breaker=None)
+    monkeypatch.setattr(mod, "_email", types.SimpleNamespace(router=types.SimpleNamespace(relays=[relay])), raising=True)
+    monkeypatch.setattr(mod, "settings", types.SimpleNamespace(SMTP_RELAYS=""), raising=True)
+
+    body = client.get("/health/circuits").json()
+    assert body["auth"]["state"] == "open"
+    assert body["smtp"] is None
+
+
+def test_health_circuits_reports_each_relay_breaker(monkeypatch):
+    import types
+    from app.adapters.driven.circuit_breaker import CircuitBreaker
+
+    mod, _, client = _make_app_and_patch_service(monkeypatch)
+    down = CircuitBreaker("SMTP a", window=1, min_calls=1)
+    down.record(False)
+    relays = [types.SimpleNamespace(name="a", breaker=down), types.SimpleNamespace(name="b", breaker=None)]
+    monkeypatch.setattr(mod, "_auth_breaker", None, raising=True)
+    monkeypatch.setattr(mod, "_email", types.SimpleNamespace(router=types.SimpleNamespace(relays=relays)), raising=True)
+    monkeypatch.setattr(mod, "settings", types.SimpleNamespace(SMTP_RELAYS='[{"name": "a"}]'), raising=True)
+
+    smtp = client.get("/health/circuits").json()["smtp"]
+    assert smtp["a"]["state"] == "open"
+    assert smtp["b"] is None
+
+
+def _make_queue_app(monkeypatch, queue, idempotency=None):
+    import types
+
+    mod = import_module(MODULE)
+    monkeypatch.setattr(mod, "_idempotency", idempotency, raising=True)
+    monkeypatch.setattr(mod, "settings", types.SimpleNamespace(NOTIFY_MODE="queue"), raising=True)
+    monkeypatch.setattr(mod, "_queue", queue, raising=True)
+    app = FastAPI()
+    app.include_router(mod.router)
+    return TestClient(app)
+
+
+def test_post_notify_queue_mode_returns_202_with_id(monkeypatch):
+    from app.adapters.driven.queue_memory import InMemoryNotificationQueue
+
+    q = InMemoryNotificationQueue(maxsize=5)
+    client = _make_queue_app(monkeypatch, q)
+
+    r = client.post("/notify", json={"job_id": "42", "status": "success", "user_id": 7})
+    assert r.status_code == 202
+    body = r.json()
+    assert body["ok"] is True
+    assert len(body["id"]) == 32
+    assert q.qsize() == 1
+
+
+def test_post_notify_queue_full_returns_429(monkeypatch):
+    from app.adapters.driven.queue_memory import InMemoryNotificationQueue
+
+    client = _make_queue_app(monkeypatch, InMemoryNotificationQueue(maxsize=1))
+    payload = {"job_id": "1", "status": "error", "user_id": 7, "error_message": "x"}
+
+    assert client.post("/notify", json=payload).status_code == 202
+    r = client.post("/notify", json=payload)
+    assert r.status_code == 429
+    assert r.headers["Retry-After"] == "1"
+
+
+def test_post_notify_queue_mode_without_started_queue_returns_503(monkeypatch):
+    client = _make_queue_app(monkeypatch, None)
+    r = client.post("/notify", json={"job_id": "1", "status": "success", "user_id": 7})
+    assert r.status_code == 503
+
+
+def test_startup_and_shutdown_manage_queue_and_workers(monkeypatch, tmp_path):
+    import asyncio
+    import types
+
+    mod = import_module(MODULE)
+    monkeypatch.setattr(
+        mod,
+        "settings",
+        types.SimpleNamespace(
+            NOTIFY_MODE="queue",
+            NOTIFY_QUEUE_BACKEND="sqlite",
+            NOTIFY_QUEUE_SQLITE_PATH=str(tmp_path / "q.db"),
+            NOTIFY_QUEUE_MAXSIZE=10,
+            NOTIFY_WORKERS=2,
+            NOTIFY_LANES_ENABLED=False,
+            DIGEST_MAX_PENDING=100,
+        ),
+        raising=True,
+    )
+
+    async def run():
+        await mod.startup()
+        assert mod._workers.running
+        assert mod._queue.qsize() == 0
+        await mod.shutdown()
+        assert mod._queue is None and mod._workers is None
+
+    asyncio.run(run())
+
+
+def test_startup_replays_outbox_in_background(monkeypatch):
+    import asyncio
+    import types
+
+    mod = import_module(MODULE)
+    replayed = []
+
+    class FakeService:
+        async def replay_pending(self):
+            replayed.append(True)
+            return 1
+
+    closed = []
+    monkeypatch.setattr(mod, "settings", types.SimpleNamespace(NOTIFY_MODE="sync"), raising=True)
+    monkeypatch.setattr(mod, "_outbox", types.SimpleNamespace(close=lambda: closed.append("outbox")), raising=True)
+    monkeypatch.setattr(mod, "_email", types.SimpleNamespace(close=lambda: closed.append("email")), raising=True)
+    monkeypatch.setattr(mod, "_idempotency", types.SimpleNamespace(close=lambda: closed.append("idempotency")), raising=True)
+    monkeypatch.setattr(mod, "_service", FakeService(), raising=True)
+
+    async def run():
+        await mod.startup()
+        await asyncio.sleep(0)
+        await mod.shutdown()
+        assert mod._replay is None
+
+    asyncio.run(run())
+    assert replayed == [True]
+    assert closed == ["email", "outbox", "idempotency"]
+
+
+def test_startup_skips_outbox_replay_with_durable_queue(monkeypatch, tmp_path):
+    import asyncio
+    import types
+
+    mod = import_module(MODULE)
+
+    class FakeService:
+        async def replay_pending(self):
+            raise AssertionError("a fila SQLite já reentrega o que ficou inflight")
+
+    monkeypatch.setattr(
+        mod,
+        "settings",
+        types.SimpleNamespace(
+            NOTIFY_MODE="queue",
+            NOTIFY_QUEUE_BACKEND="sqlite",
+            NOTIFY_QUEUE_SQLITE_PATH=str(tmp_path / "q.db"),
+            NOTIFY_QUEUE_MAXSIZE=10,
+            NOTIFY_WORKERS=1,
+            NOTIFY_LANES_ENABLED=False,
+            DIGEST_MAX_PENDING=100,
+        ),
+        raising=True,
+    )
+    monkeypatch.setattr(mod, "_outbox", object(), raising=True)
+    monkeypatch.setattr(mod, "_service", FakeService(), raising=True)
+
+    async def run():
+        await mod.startup()
+        assert mod._replay is None
+        await mod.shutdown()
+
+    asyncio.run(run())
+
+
+def test_durable_queue_is_only_the_sqlite_queue_mode(monkeypatch):
+    import types
+
+    mod = import_module(MODULE)
+    for mode, backend, durable in (("queue", "sqlite", True), ("queue", "memory", False), ("sync", "sqlite", False)):
+        monkeypatch.setattr(
+            mod, "settings", types.SimpleNamespace(NOTIFY_MODE=mode, NOTIFY_QUEUE_BACKEND=backend), raising=True
+        )
+        assert mod._durable_queue() is durable
+
+
+class _BatchService:
+    def __init__(self):
+        self.batches = []
+
+    async def execute_many(self, items):
+        self.batches.append(items)
+        return [{"job_id": d.job_id, "ok": d.user_id != 13, **({} if d.user_id != 13 else {"error": "x"})}
+                for d in items]
+
+
+def _make_batch_app(monkeypatch, mode="sync", queue=None, max_items=10, idempotency=None):
+    import types
+
+    mod = import_module(MODULE)
+    monkeypatch.setattr(mod, "_idempotency", idempotency, raising=True)
+    svc = _BatchService()
+    monkeypatch.setattr(mod, "_service", svc, raising=True)
+    monkeypatch.setattr(mod, "_queue", queue, raising=True)
+    monkeypatch.setattr(
+        mod, "settings", types.SimpleNamespace(NOTIFY_MODE=mode, NOTIFY_BATCH_MAX_ITEMS=max_items), raising=True
+    )
+    app = FastAPI()
+    app.include_router(mod.router)
+    return svc, TestClient(app)
+
+
+def test_post_notify_batch_json_array_with_partial_failures(monkeypatch):
+    svc, client = _make_batch_app(monkeypatch)
+    r = client.post("/notify/batch", json=[
+        {"job_id": "a", "status": "success", "user_id": 1},
+        {"job_id": "b", "status": "pending", "user_id": 2},
+        {"job_id": "c", "status": "error", "user_id": 13, "error_message": "boom"},
+    ])
+    assert r.status_code == 200
+    body = r.json()
+    assert body["ok"] is False
+    assert [x["ok"] for x in body["results"]] == [True, False, False]
+    assert body["results"][1]["job_id"] == "b"
+    assert "status" in body["results"][1]["error"]
+    assert [d.job_id for d in svc.batches[0]] == ["a", "c"]
+
+
+def test_post_notify_batch_ndjson_stream(monkeypatch):
+    svc, client = _make_batch_app(monkeypatch)
+    lines = [
+        '{"job_id": "1", "status": "success", "user_id": 1}',
+        "",
+        '{"job_id": "2", "status": "success", "user_id": 2}',
+    ]
+
+    def body():
+        data = "\n".join(lines).encode()
+        for i in range(0, len(data), 7):
+            yield data[i:i + 7]
+
+    r = client.post("/notify/batch", content=body(), headers={"content-type": "application/x-ndjson"})
+    assert r.status_code == 200
+    assert r.json() == {"ok": True, "results": [{"job_id": "1", "ok": True}, {"job_id": "2", "ok": True}]}
+
+
+def test_post_notify_batch_rejects_bad_body_and_oversized(monkeypatch):
+    _, client = _make_batch_app(monkeypatch, max_items=2)
+    assert client.post("/notify/batch", json={"job_id": "x"}).status_code == 400
+    assert client.post("/notify/batch", content=b"{not json", headers={"content-type": "application/json"}).status_code == 400
+    item = {"job_id": "1", "status": "success", "user_id": 1}
+    assert client.post("/notify/batch", json=[item] * 3).status_code == 413
+
+
+def test_post_notify_batch_queue_mode_enqueues_each_item(monkeypatch):
+    from app.adapters.driven.queue_memory import InMemoryNotificationQueue
+
+    q = InMemoryNotificationQueue(maxsize=1)
+    svc, client = _make_batch_app(monkeypatch, mode="queue", queue=q)
+    item = {"job_id": "1", "status": "success", "user_id": 1}
+    r = client.post("/notify/batch", json=[item, item])
+    assert r.status_code == 202
+    results = r.json()["results"]
+    assert results[0]["ok"] is True and len(results[0]["id"]) == 32
+    assert results[1] == {"job_id": "1", "ok": False, "error": "Fila de notificações cheia"}
+    assert svc.batches == []
+
+
+# --------- Idempotência ---------
+def test_repeated_notify_replays_result_without_calling_service(monkeypatch):
+    from app.adapters.driven.idempotency_memory import InMemoryIdempotencyStore
+
+    _, fake, client = _make_app_and_patch_service(
+        monkeypatch, return_value={"ok": True, "n": 1}, idempotency=InMemoryIdempotencyStore()
+    )
+    payload = {"job_id": "5", "status": "success", "user_id": 7}
+
+    first = client.post("/notify", json=payload)
+    again = client.post("/notify", json=payload)
+    other_status = client.post("/notify", json={**payload, "status": "error"})
+
+    assert first.json() == again.json() == {"ok": True, "n": 1}
+    assert "Idempotent-Replayed" not in first.headers
+    assert again.headers["Idempotent-Replayed"] == "true"
+    assert other_status.status_code == 200
+    assert [(d.job_id, d.status) for d in fake.calls] == [("5", "success"), ("5", "error")]
+
+
+def test_idempotency_key_header_and_payload_mismatch(monkeypatch):
+    from app.adapters.driven.idempotency_memory import InMemoryIdempotencyStore
+
+    _, fake, client = _make_app_and_patch_service(monkeypatch, idempotency=InMemoryIdempotencyStore())
+    payload = {"job_id": "5", "status": "success", "user_id": 7}
+
+    assert client.post("/notify", json=payload, headers={"Idempotency-Key": "k1"}).status_code == 200
+    assert client.post("/notify", json=payload, headers={"Idempotency-Key": "k2"}).status_code == 200
+    r = client.post("/notify", json={**payload, "user_id": 8}, headers={"Idempotency-Key": "k1"})
+    assert r.status_code == 422
+    assert len(fake.calls) == 2
+
+
+def test_failed_notify_releases_key_for_retry(monkeypatch):
+    from app.adapters.driven.idempotency_memory import InMemoryIdempotencyStore
+
+    store = InMemoryIdempotencyStore()
+    _, fake, client = _make_app_and_patch_service(monkeypatch, side_effect=ValueError("boom"), idempotency=store)
+    payload = {"job_id": "5", "status": "success", "user_id": 7}
+
+    assert client.post("/notify", json=payload).status_code == 400
+    fake.side_effect = None
+    assert client.post("/notify", json=payload).status_code == 200
+    assert len(fake.calls) == 2
+    assert len(store) == 1
+
+
+def test_notify_in_progress_returns_409(monkeypatch):
+    import asyncio
+    from app.adapters.driven.idempotency_memory import InMemoryIdempotencyStore
+
+    store = InMemoryIdempotencyStore()
+    mod, fake, client = _make_app_and_patch_service(monkeypatch, idempotency=store)
+    payload = {"job_id": "5", "status": "success", "user_id": 7}
+    # outra requisição com o mesmo conteúdo reservou a chave e ainda não terminou
+    asyncio.run(store.begin("5:success", mod._fingerprint(mod.NotifyPayload(**payload))))
+
+    r = client.post("/notify", json=payload)
+    assert r.status_code == 409
+    assert r.headers["Retry-After"] == "1"
+    assert fake.calls == []
+
+
+def test_queue_mode_replay_keeps_202_and_does_not_enqueue_twice(monkeypatch):
+    from app.adapters.driven.idempotency_memory import InMemoryIdempotencyStore
+    from app.adapters.driven.queue_memory import InMemoryNotificationQueue
+
+    q = InMemoryNotificationQueue(maxsize=5)
+    client = _make_queue_app(monkeypatch, q, idempotency=InMemoryIdempotencyStore())
+    payload = {"job_id": "42", "status": "success", "user_id": 7}
+
+    first = client.post("/notify", json=payload)
+    again = client.post("/notify", json=payload)
+    assert (first.status_code, again.status_code) == (202, 202)
+    assert first.json() == again.json()
+    assert q.qsize() == 1
+
+
+def test_batch_queue_errors_release_claimed_keys(monkeypatch):
+    from app.adapters.driven.idempotency_memory import InMemoryIdempotencyStore
+    from app.adapters.driven.queue_memory import InMemoryNotificationQueue
+
+    class BrokenQueue(InMemoryNotificationQueue):
+        async def put(self, data):
+            if data.job_id == "b":
+                raise RuntimeError("disco cheio")
+            return await super().put(data)
+
+    store = InMemoryIdempotencyStore()
+    items = [{"job_id": "a", "status": "success", "user_id": 1}, {"job_id": "b", "status": "success", "user_id": 2}]
+    _, client = _make_batch_app(monkeypatch, mode="queue", queue=None, idempotency=store)
+    assert client.post("/notify/batch", json=items).status_code == 503
+
+    _, client = _make_batch_app(monkeypatch, mode="queue", queue=BrokenQueue(), idempotency=store)
+    with pytest.raises(RuntimeError, match="disco cheio"):
+        client.post("/notify/batch", json=items)
+
+    # "a" entrou na fila e ficou gravado; "b" foi liberado e pode ser reenviado
+    r = client.post("/notify/batch", json=items[:1]).json()
+    assert r["results"][0]["replayed"] is True
+    _, client = _make_batch_app(monkeypatch, mode="queue", queue=InMemoryNotificationQueue(), idempotency=store)
+    r = client.post("/notify/batch", json=items[1:])
+    assert r.status_code == 202 and r.json()["results"][0]["ok"] is True
+
+
+def test_batch_skips_already_delivered_items(monkeypatch):
+    from app.adapters.driven.idempotency_memory import InMemoryIdempotencyStore
+
+    svc, client = _make_batch_app(monkeypatch, idempotency=InMemoryIdempotencyStore())
+    ok = {"job_id": "a", "status": "success", "user_id": 1}
+    failing = {"job_id": "c", "status": "error", "user_id": 13, "error_message": "boom"}
+
+    client.post("/notify/batch", json=[ok, failing])
+    r = client.post("/notify/batch", json=[ok, failing])
+
+    assert r.json()["results"] == [
+        {"job_id": "a", "ok": True, "replayed": True},
+        {"job_id": "c", "ok": False, "error": "x"},
+    ]
+    assert [[d.job_id for d in b] for b in svc.batches] == [["a", "c"], ["c"]]
+
+
+def test_build_queue_with_lanes_and_queue_health(monkeypatch, tmp_path):
+    import asyncio
+    import types
+    from app.adapters.driven.queue_lanes import LaneNotificationQueue
+
+    mod = import_module(MODULE)
+    monkeypatch.setattr(
+        mod,
+        "settings",
+        types.SimpleNamespace(
+            NOTIFY_QUEUE_BACKEND="sqlite",
+            NOTIFY_QUEUE_SQLITE_PATH=str(tmp_path / "q.db"),
+            NOTIFY_QUEUE_MAXSIZE=10,
+            NOTIFY_LANES_ENABLED=True,
+            NOTIFY_LANE_PRIORITY_WEIGHT=4,
+            NOTIFY_LANE_BULK_WEIGHT=1,
+            NOTIFY_PRIORITY_STATUSES="error",
+            NOTIFY_PRIORITY_USERS="5, 6",
+        ),
+        raising=True,
+    )
+    queue = mod._build_queue()
+    assert isinstance(queue, LaneNotificationQueue)
+    assert (tmp_path / "q.priority.db").exists() and (tmp_path / "q.bulk.db").exists()
+
+    from app.domain.entities import NotificationInput
+    asyncio.run(queue.put(NotificationInput(job_id="1", status="success", user_id=5)))
+    monkeypatch.setattr(mod, "_queue", queue, raising=True)
+    app = FastAPI()
+    app.include_router(mod.router)
+    body = TestClient(app).get("/health/queue").json()
+    queue.close()
+    assert body["depth"] == 1
+    assert body["lanes"]["priority"]["enqueued"] == 1
+    assert body["lanes"]["bulk"]["depth"] == 0
+    assert body["failed"] is None
+
+
+def test_queue_health_lists_recent_failures_of_memory_queue(monkeypatch):
+    import asyncio
+    from app.adapters.driven.queue_memory import InMemoryNotificationQueue
+    from app.domain.entities import NotificationInput
+
+    mod = import_module(MODULE)
+    queue = InMemoryNotificationQueue()
+
+    async def fail_one():
+        await queue.put(NotificationInput(job_id="1", status="success", user_id=1))
+        item = await queue.get()
+        await queue.fail(item.id, "Cliente não encontrado")
+        return item.id
+
+    failed_id = asyncio.run(fail_one())
+    monkeypatch.setattr(mod, "_queue", queue, raising=True)
+    app = FastAPI()
+    app.include_router(mod.router)
+    body = TestClient(app).get("/health/queue").json()
+    assert body["depth"] == 0
+    assert body["failed"] == [{"id": failed_id, "error": "Cliente não encontrado"}]
+
+
+def test_get_metrics_exposes_stage_histograms(monkeypatch):
+    mod, _, client = _make_app_and_patch_service(monkeypatch)
+    monkeypatch.setattr(mod.metrics, "_enabled", True)
+    monkeypatch.setattr(mod.metrics, "_tracer", None)
+    with mod.metrics.stage("auth"):
+        pass
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert "# TYPE notification_stage_seconds histogram" in r.text
+    assert 'notification_stage_seconds_count{stage="auth"}' in r.text
+
+
+def test_get_metrics_exposes_auth_cache_counters(monkeypatch):
+    import asyncio
+    from app.adapters.driven.auth_gateway_cached import CachingAuthGateway
+    from app.domain.entities import Identity
+    from app.domain.ports import AsyncAuthGateway
+
+    class Auth(AsyncAuthGateway):
+        async def resolve_identity(self, user_id):
+            return Identity(email=f"{user_id}@x.com", name="n")
+
+    mod, _, client = _make_app_and_patch_service(monkeypatch)
+    cache = CachingAuthGateway(Auth())
+    asyncio.run(cache.resolve_identity(1))
+    asyncio.run(cache.resolve_identity(1))
+    monkeypatch.setattr(mod, "_auth", cache, raising=True)
+
+    text = client.get("/metrics").text
+    assert 'notification_auth_cache_total{result="hits"} 1.0' in text
+    assert 'notification_auth_cache_total{result="misses"} 1.0' in text
+    assert "notification_auth_cache_entries 1.0" in text
+
+
+def test_get_relays_reports_router_stats(monkeypatch):
+    import types
+
+    mod, _, client = _make_app_and_patch_service(monkeypatch)
+    router = types.SimpleNamespace(stats=lambda: [{"name": "a", "outstanding": 0}])
+    monkeypatch.setattr(mod, "_email", types.SimpleNamespace(router=router), raising=True)
+
+    assert client.get("/health/relays").json() == {"relays": [{"name": "a", "outstanding": 0}]}
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+
+from app.domain.entities import NotificationInput
+from app.adapters.driven.outbox_sqlite import SqliteOutbox
+
+
+def _data(job_id="1"):
+    return NotificationInput(job_id=job_id, status="success", user_id=3, video_url="http://cdn/v.mp4")
+
+
+def test_record_mark_and_pending(tmp_path):
+    outbox = SqliteOutbox(str(tmp_path / "outbox.db"))
+
+    async def run():
+        a = await outbox.record(_data("a"))
+        b = await outbox.record(_data("b"))
+        c = await outbox.record(_data("c"))
+        await outbox.mark_delivered(a)
+        await outbox.mark_failed(b, "Cliente não encontrado")
+        return c, await outbox.pending()
+
+    c, pending = asyncio.run(run())
+    assert [e.id for e in pending] == [c]
+    assert pending[0].data == _data("c")
+    outbox.close()
+
+
+def test_close_is_reversible(tmp_path):
+    outbox = SqliteOutbox(str(tmp_path / "outbox.db"))
+    first = asyncio.run(outbox.record(_data("a")))
+    outbox.close()
+    outbox.close()
+    second = asyncio.run(outbox.record(_data("b")))
+    pending = asyncio.run(outbox.pending())
+    outbox.close()
+    assert [e.id for e in pending] == [first, second]
+
+
+def test_pending_survives_reopen(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    first = SqliteOutbox(path)
+    entry_id = asyncio.run(first.record(_data("crash")))
+    first.close()
+
+    second = SqliteOutbox(path)
+    pending = asyncio.run(second.pending())
+    second.close()
+    assert [(e.id, e.data.job_id) for e in pending] == [(entry_id, "crash")]
+
+
+def test_concurrent_records_are_group_committed(tmp_path):
+    outbox = SqliteOutbox(str(tmp_path / "outbox.db"), batch_size=100, flush_interval=0.05)
+
+    async def run():
+        return await asyncio.gather(*(outbox.record(_data(str(i))) for i in range(50)))
+
+    ids = asyncio.run(run())
+    assert len(set(ids)) == 50
+    assert outbox.commits < 50
+    assert len(asyncio.run(outbox.pending())) == 50
+    outbox.close()
+
+
+def test_failed_batch_rejects_every_waiter(tmp_path):
+    outbox = SqliteOutbox(str(tmp_path / "outbox.db"))
+
+    def broken(db):
+        raise RuntimeError("disk full")
+
+    async def run():
+        with pytest.raises(RuntimeError, match="disk full"):
+            await outbox._run(broken)
+        return await outbox.record(_data("ok"))
+
+    assert asyncio.run(run())
+    outbox.close()
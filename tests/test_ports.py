@@ -1,5 +1,9 @@
+import asyncio
 import pytest
-from app.domain.ports import AuthGateway, EmailGateway, EmailComposer
+from app.domain.ports import (
+    AuthGateway, EmailGateway, EmailComposer,
+    AsyncAuthGateway, AsyncEmailGateway, AsyncEmailComposer,
+)
 from app.domain.entities import Identity, NotificationInput, EmailMessage
 
 
@@ -12,6 +16,21 @@ def test_abstract_classes_cannot_be_instantiated():
         EmailComposer()
 
 
+def test_composer_without_digest_cannot_be_instantiated():
+    class NoDigest(EmailComposer):
+        def compose(self, data, identity):
+            ...
+
+    class AsyncNoDigest(AsyncEmailComposer):
+        async def compose(self, data, identity):
+            ...
+
+    with pytest.raises(TypeError):
+        NoDigest()
+    with pytest.raises(TypeError):
+        AsyncNoDigest()
+
+
 class DummyAuth(AuthGateway):
     def resolve_identity(self, user_id: id) -> Identity:
         return Identity(email=f"user{user_id}@example.com", name="User")
@@ -34,6 +53,9 @@ class DummyComposer(EmailComposer):
             html=f"<p>hello {identity.name}</p>",
         )
 
+    def compose_digest(self, items, identity: Identity) -> EmailMessage:
+        return self.compose(items[0], identity)
+
 
 def test_concrete_authgateway_resolve_identity():
     gw = DummyAuth()
@@ -63,3 +85,66 @@ def test_concrete_emailcomposer_compose_message():
     assert out.subject == "success:123"
     assert "Mateus" in out.text
     assert "<p>hello Mateus</p>" in out.html
+
+
+def test_async_abstract_classes_cannot_be_instantiated():
+    with pytest.raises(TypeError):
+        AsyncAuthGateway()
+    with pytest.raises(TypeError):
+        AsyncEmailGateway()
+    with pytest.raises(TypeError):
+        AsyncEmailComposer()
+
+
+class DummyAsyncAuth(AsyncAuthGateway):
+    async def resolve_identity(self, user_id: int) -> Identity:
+        return Identity(email=f"user{user_id}@example.com", name="User")
+
+
+class DummyAsyncEmail(AsyncEmailGateway):
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message: EmailMessage) -> None:
+        self.sent.append(message)
+
+
+class DummyAsyncComposer(AsyncEmailComposer):
+    async def compose(self, data: NotificationInput, identity: Identity) -> EmailMessage:
+        return DummyComposer().compose(data, identity)
+
+    async def compose_digest(self, items, identity: Identity) -> EmailMessage:
+        return DummyComposer().compose_digest(items, identity)
+
+
+def test_concrete_async_ports_roundtrip():
+    async def run():
+        ident = await DummyAsyncAuth().resolve_identity(5)
+        data = NotificationInput(job_id="1", status="error", user_id=5)
+        msg = await DummyAsyncComposer().compose(data, ident)
+        gw = DummyAsyncEmail()
+        assert await gw.send(msg) is None
+        return gw.sent
+
+    sent = asyncio.run(run())
+    assert sent[0].to == "user5@example.com"
+    assert sent[0].subject == "error:1"
+
+
+def test_default_resolve_identities_maps_per_id_errors():
+    class Partial(AuthGateway):
+        def resolve_identity(self, user_id):
+            if user_id == 2:
+                raise ValueError("Cliente não encontrado")
+            return Identity(email=f"{user_id}@x.com", name="n")
+
+    class AsyncPartial(AsyncAuthGateway):
+        async def resolve_identity(self, user_id):
+            return Partial().resolve_identity(user_id)
+
+    out = Partial().resolve_identities([1, 2, 1])
+    assert list(out) == [1, 2]
+    assert isinstance(out[2], ValueError)
+    out = asyncio.run(AsyncPartial().resolve_identities([2, 3]))
+    assert isinstance(out[2], ValueError)
+    assert out[3].email == "3@x.com"
@@ -0,0 +1,141 @@
+import asyncio
+import time
+import pytest
+
+from app.domain.entities import NotificationInput
+from app.adapters.driven.queue_lanes import Lane, LaneNotificationQueue, priority_classifier
+from app.adapters.driven.queue_memory import InMemoryNotificationQueue
+from app.adapters.driven.queue_sqlite import SqliteNotificationQueue
+from tests.conftest import Clock
+
+
+def _data(job_id, status="success", user_id=1):
+    return NotificationInput(job_id=job_id, status=status, user_id=user_id)
+
+
+def _lanes(priority=4, bulk=1, clock=None, **kw):
+    return LaneNotificationQueue(
+        [Lane("priority", InMemoryNotificationQueue(), weight=priority), Lane("bulk", InMemoryNotificationQueue(), weight=bulk)],
+        priority_classifier(["error"], [99]),
+        # parte do relógio real: ``enqueued_at`` vem de ``time.time()`` nas filas
+        clock=clock or Clock(time.time() + 1),
+        **kw,
+    )
+
+
+def test_classifier_by_status_and_user():
+    classify = priority_classifier(["error"], [99])
+    assert classify(_data("1", status="error")) == "priority"
+    assert classify(_data("1", user_id=99)) == "priority"
+    assert classify(_data("1")) == "bulk"
+
+
+def test_weighted_round_robin_serves_priority_first_without_starving_bulk():
+    async def run():
+        q = _lanes(priority=3, bulk=1)
+        for i in range(8):
+            await q.put(_data(f"b{i}"))
+        for i in range(6):
+            await q.put(_data(f"p{i}", status="error"))
+        assert q.qsize() == 14
+        return [(await q.get()).data.job_id for _ in range(14)]
+
+    order = asyncio.run(run())
+    assert order[:8] == ["p0", "p1", "b0", "p2", "p3", "p4", "b1", "p5"]
+    assert order[8:] == [f"b{i}" for i in range(2, 8)]
+
+
+def test_get_waits_for_put_on_any_lane():
+    async def run():
+        q = _lanes(poll_interval=5)
+        waiter = asyncio.create_task(q.get())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        await q.put(_data("p", status="error"))
+        return await asyncio.wait_for(waiter, 1)
+
+    assert asyncio.run(run()).data.job_id == "p"
+
+
+def test_stats_track_wait_and_latency_per_lane():
+    clock = Clock(time.time() + 1)
+
+    async def run():
+        q = _lanes(clock=clock)
+        await q.put(_data("p", status="error"))
+        await q.put(_data("b"))
+        clock.now += 2
+        first = await q.get()
+        second = await q.get()
+        clock.now += 1
+        await q.ack(first.id)
+        await q.fail(second.id, "boom")
+        return q.stats()
+
+    stats = asyncio.run(run())
+    assert stats["priority"]["acked"] == 1
+    assert stats["priority"]["wait"]["p50"] == pytest.approx(3, abs=0.5)
+    assert stats["priority"]["latency"]["max"] == pytest.approx(4, abs=0.5)
+    assert stats["bulk"]["failed"] == 1
+    assert stats["bulk"]["depth"] == 0
+
+
+def test_lanes_over_sqlite(tmp_path):
+    async def run():
+        q = LaneNotificationQueue(
+            [
+                Lane("priority", SqliteNotificationQueue(str(tmp_path / "p.db")), weight=2),
+                Lane("bulk", SqliteNotificationQueue(str(tmp_path / "b.db")), weight=1),
+            ],
+            priority_classifier(["error"], []),
+            poll_interval=0.01,
+        )
+        await q.put(_data("b"))
+        await q.put(_data("p", status="error"))
+        items = [await q.get(), await q.get()]
+        for item in items:
+            await q.ack(item.id)
+        q.close()
+        return [i.data.job_id for i in items]
+
+    assert asyncio.run(run()) == ["p", "b"]
+
+
+def test_requires_a_lane():
+    with pytest.raises(ValueError):
+        LaneNotificationQueue([], lambda d: "x")
+
+
+def test_depth_is_counted_in_memory_and_external_inserts_are_found(tmp_path):
+    class CountingSqlite(SqliteNotificationQueue):
+        counts = 0
+
+        def qsize(self):
+            CountingSqlite.counts += 1
+            return super().qsize()
+
+    async def run():
+        path = str(tmp_path / "bulk.db")
+        await SqliteNotificationQueue(path).put(_data("antes"))
+        bulk = CountingSqlite(path, poll_interval=0.01)
+        q = LaneNotificationQueue(
+            [Lane("priority", InMemoryNotificationQueue(), weight=4), Lane("bulk", bulk)],
+            priority_classifier(["error"], []),
+            clock=Clock(time.time() + 1),
+            poll_interval=0.01,
+        )
+        assert q.qsize() == 1 and CountingSqlite.counts == 1  # só na criação
+        await q.put(_data("depois"))
+        got = []
+        for _ in range(2):
+            item = await q.get()
+            await q.ack(item.id)
+            got.append(item.data.job_id)
+        # outro processo grava no mesmo arquivo: a contagem local não sabe, o poll acha
+        await SqliteNotificationQueue(path).put(_data("externo"))
+        got.append((await asyncio.wait_for(q.get(), 1)).data.job_id)
+        assert q.stats()["bulk"]["depth"] == 0
+        return got
+
+    assert asyncio.run(run()) == ["antes", "depois", "externo"]
+    assert CountingSqlite.counts == 1
@@ -0,0 +1,84 @@
+import threading
+import pytest
+
+from app.adapters.driven.rate_limit import SmtpRateLimiter, TokenBucket
+from app.adapters.driven.smtp_pool import PooledConnection
+from tests.conftest import Clock
+
+
+def _limiter(clock, **kw):
+    slept = []
+    return SmtpRateLimiter(clock=clock, sleep=slept.append, **kw), slept
+
+
+def test_bucket_allows_burst_then_queues_in_order(clock):
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    clock.now = 1.0  # 2 fichas repostas pagam a dívida
+    assert bucket.reserve() == 0.5
+
+
+def test_bucket_refill_is_capped_at_burst(clock):
+    bucket = TokenBucket(rate=1, burst=3, clock=clock)
+    clock.now = 100
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.0, 1.0]
+
+
+def test_bucket_rejects_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, burst=1)
+
+
+def test_limiter_sleeps_the_largest_wait_and_records_stats(clock):
+    limiter, slept = _limiter(clock, global_rate=10, global_burst=1, domain_rate=1, domain_burst=1)
+
+    assert limiter.acquire(["a@gmail.com"]) == 0.0
+    assert limiter.acquire(["b@GMAIL.com"]) == 1.0  # domínio é o gargalo
+    assert limiter.acquire(["c@outlook.com"]) == pytest.approx(0.2)
+    assert slept == [1.0, pytest.approx(0.2)]
+
+    stats = limiter.stats()
+    assert stats["domain"]["waits"] == 1
+    assert stats["domain"]["max_wait"] == 1.0
+    assert stats["global"]["waits"] == 2
+    assert stats["domains"] == 2
+
+
+def test_limiter_per_connection_buckets_are_independent(clock):
+    limiter, slept = _limiter(clock, connection_rate=1, connection_burst=1)
+    c1 = PooledConnection(client=None, created_at=0, last_used=0)
+    c2 = PooledConnection(client=None, created_at=0, last_used=0)
+
+    limiter.acquire(["a@x"], c1)
+    limiter.acquire(["a@x"], c2)
+    assert slept == []
+    limiter.acquire(["a@x"], c1)
+    assert slept == [1.0]
+
+
+def test_limiter_batch_wait_covers_all_messages(clock):
+    limiter, slept = _limiter(clock, global_rate=4, global_burst=2)
+    assert limiter.acquire([f"u{i}@x" for i in range(6)]) == 1.0
+    assert slept == [1.0]
+
+
+def test_limiter_domain_table_is_bounded():
+    limiter, _ = _limiter(Clock(), domain_rate=1, max_domains=2)
+    for d in ("a", "b", "c"):
+        limiter.acquire([f"u@{d}"])
+    assert limiter.stats()["domains"] == 2
+
+
+def test_disabled_limiter():
+    assert SmtpRateLimiter().enabled is False
+    assert SmtpRateLimiter(domain_rate=1).enabled is True
+
+
+def test_bucket_is_thread_safe():
+    bucket = TokenBucket(rate=1000, burst=1000, clock=lambda: 0.0)
+    threads = [threading.Thread(target=lambda: [bucket.reserve() for _ in range(250)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert bucket.reserve() == pytest.approx(0.001)
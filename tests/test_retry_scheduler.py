@@ -0,0 +1,42 @@
+import threading
+import pytest
+
+from app.adapters.driven.retry_scheduler import RetryScheduler, backoff_delay
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    assert backoff_delay(1, 1.0, 8.0, rng=lambda: 1.0) == 1.0
+    assert backoff_delay(3, 1.0, 8.0, rng=lambda: 1.0) == 4.0
+    assert backoff_delay(10, 1.0, 8.0, rng=lambda: 1.0) == 8.0
+    assert backoff_delay(3, 1.0, 8.0, rng=lambda: 0.5) == 2.0
+    assert 0.0 <= backoff_delay(2, 1.0, 8.0) <= 2.0
+
+
+def test_schedule_runs_due_tasks_in_deadline_order():
+    sched = RetryScheduler(workers=1)
+    done = threading.Event()
+    order = []
+
+    sched.schedule(0.05, lambda: (order.append("late"), done.set()))
+    sched.schedule(0.0, lambda: order.append("early"))
+    assert done.wait(2)
+    assert order == ["early", "late"]
+    assert sched.pending() == 0
+    sched.shutdown()
+
+
+def test_schedule_returns_without_blocking():
+    sched = RetryScheduler(workers=1)
+    ran = threading.Event()
+    sched.schedule(30, ran.set)
+    assert sched.pending() == 1
+    assert not ran.is_set()
+    sched.shutdown()
+    assert sched.pending() == 0
+
+
+def test_schedule_after_shutdown_raises():
+    sched = RetryScheduler(workers=1)
+    sched.shutdown()
+    with pytest.raises(RuntimeError):
+        sched.schedule(0, lambda: None)
@@ -0,0 +1,41 @@
+import pytest
+
+from app.adapters.driven.safe_html import EscapeCache, escape_html, safe_href, safe_url
+
+
+def test_escape_html_fast_path_returns_same_object():
+    s = "Ana Souza 42"
+    assert escape_html(s) is s
+    assert escape_html(None) == ""
+    assert escape_html(7) == "7"
+    assert escape_html("<a href='x'>&\"") == "&lt;a href=&#x27;x&#x27;&gt;&amp;&quot;"
+
+
+def test_escape_cache_memoizes_and_is_bounded():
+    cache = EscapeCache(max_size=2)
+    assert cache["A&B"] == "A&amp;B"
+    assert "A&B" in cache
+    assert cache[None] == ""
+    assert len(cache) == 2
+    assert cache["<x>"] == "&lt;x&gt;"
+    assert len(cache) == 1  # cheio: esvaziou antes de guardar
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://cdn/v.mp4", "https://cdn/v.mp4"),
+    ("  HTTP://cdn/v.mp4 ", "HTTP://cdn/v.mp4"),
+    ("mailto:a@b", "mailto:a@b"),
+    ("javascript:alert(1)", "#"),
+    (" JavaScript:alert(1)", "#"),
+    ("data:text/html;base64,xx", "#"),
+    ("/relativo", "#"),
+    ("", ""),
+    (None, ""),
+])
+def test_safe_url_allows_only_known_schemes(url, expected):
+    assert safe_url(url) == expected
+
+
+def test_safe_href_escapes_attribute():
+    assert safe_href('https://x/?a=1&b="2"') == "https://x/?a=1&amp;b=&quot;2&quot;"
+    assert safe_href("javascript:alert(1)") == "#"
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+import pytest
+
+from app.domain.entities import Identity
+from app.adapters.driven.single_flight import (
+    SingleFlight, AsyncSingleFlight, SingleFlightAuthGateway, ThreadedSingleFlightAuthGateway,
+)
+
+
+def test_threaded_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    start = threading.Barrier(5)
+    results = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    def worker():
+        start.wait()
+        results.append(flight.do("k", fn))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+
+
+def test_threaded_exception_is_shared_and_key_released():
+    flight = SingleFlight()
+
+    with pytest.raises(RuntimeError):
+        flight.do("k", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+    assert flight.do("k", lambda: 2) == 2
+
+
+def test_async_concurrent_calls_share_one_execution():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("k", fn) for _ in range(10)))
+        assert flight.in_flight() == 0
+        again = await flight.do("k", fn)
+        return results, again
+
+    results, again = asyncio.run(run())
+    assert results == ["value"] * 10
+    assert again == "value"
+    assert len(calls) == 2
+
+
+def test_async_exception_propagates_to_every_waiter():
+    flight = AsyncSingleFlight()
+
+    async def fn():
+        await asyncio.sleep(0)
+        raise ValueError("Cliente não encontrado")
+
+    async def run():
+        return await asyncio.gather(*(flight.do(1, fn) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_async_cancelling_one_waiter_does_not_cancel_others():
+    flight = AsyncSingleFlight()
+
+    async def fn():
+        await asyncio.sleep(0.02)
+        return 42
+
+    async def run():
+        a = asyncio.create_task(flight.do("k", fn))
+        b = asyncio.create_task(flight.do("k", fn))
+        await asyncio.sleep(0)
+        a.cancel()
+        return await b
+
+    assert asyncio.run(run()) == 42
+
+
+def test_auth_gateway_decorators_coalesce_same_user():
+    calls = []
+
+    class AsyncInner:
+        async def resolve_identity(self, user_id):
+            calls.append(user_id)
+            await asyncio.sleep(0.01)
+            return Identity(email=f"{user_id}@x.com", name="n")
+
+    gw = SingleFlightAuthGateway(AsyncInner())
+
+    async def run():
+        return await asyncio.gather(gw.resolve_identity(1), gw.resolve_identity(1), gw.resolve_identity(2))
+
+    a, b, c = asyncio.run(run())
+    assert a is b
+    assert c.email == "2@x.com"
+    assert sorted(calls) == [1, 2]
+
+    class SyncInner:
+        def resolve_identity(self, user_id):
+            return Identity(email=f"{user_id}@x.com", name="n")
+
+    assert ThreadedSingleFlightAuthGateway(SyncInner()).resolve_identity(3).email == "3@x.com"
+
+
+def test_async_decorator_delegates_bulk_lookup():
+    class Inner:
+        async def resolve_identities(self, user_ids):
+            return {uid: Identity(email=f"{uid}@x.com", name="n") for uid in user_ids}
+
+    out = asyncio.run(SingleFlightAuthGateway(Inner()).resolve_identities([1, 2]))
+    assert sorted(out) == [1, 2]
@@ -25,6 +25,12 @@ class FakeSMTP:
     def ehlo(self):
         return (250, b"ok")
 
+    def ehlo_or_helo_if_needed(self):
+        pass
+
+    def has_extn(self, name):
+        return False
+
     def starttls(self):
         if self.hook_starttls_exc:
             raise self.hook_starttls_exc
@@ -76,6 +82,26 @@ def _patch_minimal_settings(monkeypatch, **overrides):
         EMAIL_PASS="s3cr3t",
         EMAIL_FROM="no-reply@test",
         SMTP_MAX_RETRIES=3,
+        SMTP_POOL_MIN_SIZE=1,
+        SMTP_POOL_MAX_SIZE=2,
+        SMTP_POOL_IDLE_TIMEOUT=60.0,
+        SMTP_POOL_MAX_MESSAGES=100,
+        SMTP_POOL_ACQUIRE_TIMEOUT=1.0,
+        SMTP_PROBE_IDLE_AFTER=30.0,
+        SMTP_RETRY_BASE_DELAY=1.0,
+        SMTP_RETRY_MAX_DELAY=8.0,
+        SMTP_RETRY_DEADLINE=60.0,
+        SMTP_RETRY_WORKERS=1,
+        SMTP_PIPELINE_BATCH=50,
+        SMTP_RATE_GLOBAL=0,
+        SMTP_RATE_GLOBAL_BURST=1,
+        SMTP_RATE_PER_CONNECTION=0,
+        SMTP_RATE_PER_CONNECTION_BURST=1,
+        SMTP_RATE_PER_DOMAIN=0,
+        SMTP_RATE_PER_DOMAIN_BURST=1,
+        SMTP_BREAKER_ENABLED=False,
+        SMTP_RELAYS="",
+        SMTP_ROUTING="least_outstanding",
     )
     base.update(overrides)
     monkeypatch.setattr(f"{MODULE}.settings", types.SimpleNamespace(**base), raising=True)
@@ -136,51 +162,68 @@ def test_connect_with_starttls_fails_but_continues(monkeypatch):
     assert c.logged == ("user@test", "s3cr3t")
 
 
-def test_get_client_caches_and_uses_noop(monkeypatch):
-    _patch_minimal_settings(monkeypatch)
+def test_get_pool_is_lazy_singleton_built_from_settings(monkeypatch):
+    _patch_minimal_settings(monkeypatch, SMTP_POOL_MAX_SIZE=3)
     _patch_smtplib(monkeypatch)
-    monkeypatch.setattr(f"{MODULE}._smtp_client", None, raising=True)
+    monkeypatch.setattr(f"{MODULE}._pool", None, raising=True)
 
-    c1 = m._get_client()
-    c2 = m._get_client()
-    assert c1 is c2
-    assert c1.noop_called == 1
+    p1 = m._get_pool()
+    p2 = m._get_pool()
+    assert p1 is p2
+    assert p1.size == 0
+    conn = p1.acquire()
+    assert isinstance(conn.client, FakeSMTP)
+    assert conn.client.host == "smtp.test"
+    assert conn.client.noop_called == 0
 
 
-def test_get_client_reconnects_when_noop_fails(monkeypatch):
-    _patch_minimal_settings(monkeypatch)
-    _patch_smtplib(monkeypatch)
-    monkeypatch.setattr(f"{MODULE}._smtp_client", None, raising=True)
+class ManualScheduler:
+    """Guarda as retentativas agendadas para o teste executá-las explicitamente."""
+    def __init__(self):
+        self.scheduled = []
 
-    first = FakeSMTP("a", 1, timeout=1)
-    first.hook_noop_exc = RuntimeError("broken")
-    second = FakeSMTP("b", 2, timeout=2)
+    def schedule(self, delay, fn):
+        self.scheduled.append((delay, fn))
 
-    make = SeqClients([first, second])
+    def run_all(self):
+        while self.scheduled:
+            _, fn = self.scheduled.pop(0)
+            fn()
 
-    def _smtp_factory(host, port, timeout=None):
-        c = make()
-        c.host, c.port, c.timeout = host, port, timeout
-        return c
 
-    monkeypatch.setattr(f"{MODULE}.smtplib.SMTP", _smtp_factory, raising=True)
+class FakeGateway:
+    """Base dos gateways falsos passados ao ``AsyncSmtpEmailGateway``."""
+    def close(self):
+        self.closed = True
+
 
-    c = m._get_client()
-    assert c is first
-    c2 = m._get_client()
-    assert c2 is second
-    assert first.quit_called == 1
+def _gateway_with_pool(clients, scheduler=None, limiter=None, breaker=None, **pool_kw):
+    seq = SeqClients(clients)
+    pool = m.SmtpConnectionPool(seq, **pool_kw)
+    gw = m.SmtpEmailGateway(
+        pool=pool, scheduler=scheduler or ManualScheduler(), limiter=limiter or m.SmtpRateLimiter(), breaker=breaker,
+    )
+    return gw, pool
 
 
-def test_as_mime_builds_alternative_with_both_parts(monkeypatch):
+def test_send_serializes_alternative_with_both_parts(monkeypatch):
+    from email import message_from_bytes
+
     _patch_minimal_settings(monkeypatch, EMAIL_FROM="from@test")
+    c = FakeSMTP("h", 1)
+    gw, _ = _gateway_with_pool([c])
     msg = types.SimpleNamespace(
         to="dest@test",
         subject="Assunto",
         text="Texto plano",
         html="<b>HTML</b>",
     )
-    mime = m._as_mime(msg)
+    gw.send(msg)
+
+    from_addr, _, data = c.sent[0]
+    assert from_addr == "from@test"
+    assert isinstance(data, bytes)
+    mime = message_from_bytes(data)
     assert mime["Subject"] == "Assunto"
     assert mime["From"] == "from@test"
     assert mime["To"] == "dest@test"
@@ -190,10 +233,67 @@ def test_as_mime_builds_alternative_with_both_parts(monkeypatch):
     assert payloads[1].get_content_type() == "text/html"
 
 
+def test_retries_reuse_serialized_payload(monkeypatch):
+    _patch_minimal_settings(monkeypatch, SMTP_MAX_RETRIES=2)
+    sched = ManualScheduler()
+    c = FakeSMTP("h", 1)
+    c.hook_sendmail_exc = m.smtplib.SMTPDataError(451, b"later")
+    gw, _ = _gateway_with_pool([c], scheduler=sched)
+    encodes = []
+    real = gw.encoder.encode
+    monkeypatch.setattr(gw.encoder, "encode", lambda msg: encodes.append(msg) or real(msg))
+
+    future = gw.submit(types.SimpleNamespace(to="d@test", subject="s", text="t", html="h"))
+    c.hook_sendmail_exc = None
+    sched.run_all()
+
+    assert future.result() is None
+    assert len(encodes) == 1
+    assert len(c.sent) == 1
+
+
+def test_stages_and_retries_are_measured(monkeypatch):
+    from infra import metrics
+    hist = metrics.Histogram("s", "s", ("stage",))
+    retries = metrics.Counter("r", "r")
+    monkeypatch.setattr(metrics, "STAGE_SECONDS", hist)
+    monkeypatch.setattr(metrics, "SMTP_RETRIES", retries)
+    monkeypatch.setattr(metrics, "_enabled", True)
+    monkeypatch.setattr(metrics, "_tracer", None)
+    _patch_minimal_settings(monkeypatch, SMTP_MAX_RETRIES=2)
+    sched = ManualScheduler()
+    c = FakeSMTP("h", 1)
+    c.hook_sendmail_exc = m.smtplib.SMTPDataError(451, b"later")
+    gw, _ = _gateway_with_pool([c], scheduler=sched)
+
+    future = gw.submit(types.SimpleNamespace(to="d@test", subject="s", text="t", html="h"))
+    c.hook_sendmail_exc = None
+    sched.run_all()
+
+    assert future.result() is None
+    text = "\n".join(hist.render())
+    for stage in ("mime", "smtp_send", "smtp_retry"):
+        assert f's_count{{stage="{stage}"}} 1' in text
+    assert retries.render()[2:] == ["r 1.0"]
+
+
+def test_invalid_recipient_fails_without_touching_pool(monkeypatch):
+    _patch_minimal_settings(monkeypatch)
+    gw, pool = _gateway_with_pool([FakeSMTP("h", 1)])
+    bad = types.SimpleNamespace(to="a@test\r\nBcc: x@evil", subject="s", text="t", html="h")
+
+    with pytest.raises(RuntimeError, match="Destinatário inválido"):
+        gw.send(bad)
+    futures = gw.submit_many([bad, types.SimpleNamespace(to="ok@test", subject="s", text="t", html="h")])
+    assert futures[0].exception() is not None
+    assert futures[1].result() is None
+    assert pool.stats()["connects"] == 1
+
+
 def test_send_success(monkeypatch):
     _patch_minimal_settings(monkeypatch, SMTP_MAX_RETRIES=2)
-    _patch_smtplib(monkeypatch)
-    monkeypatch.setattr(f"{MODULE}._smtp_client", None, raising=True)
+    c = FakeSMTP("h", 1)
+    gw, pool = _gateway_with_pool([c])
 
     msg = types.SimpleNamespace(
         to="dest@test",
@@ -201,79 +301,516 @@ def test_send_success(monkeypatch):
         text="t",
         html="<p>t</p>",
     )
-    gw = m.SmtpEmailGateway()
     gw.send(msg)
-    assert isinstance(m._smtp_client, FakeSMTP)
-    assert len(m._smtp_client.sent) == 1
-    from_addr, to_addrs, data = m._smtp_client.sent[0]
+    assert len(c.sent) == 1
+    from_addr, to_addrs, data = c.sent[0]
     assert to_addrs == ("dest@test",)
+    assert c.noop_called == 0
+    stats = pool.stats()
+    assert (stats["size"], stats["idle"], stats["in_use"]) == (1, 1, 0)
+
 
+def test_send_reuses_pooled_connection(monkeypatch):
+    _patch_minimal_settings(monkeypatch)
+    c = FakeSMTP("h", 1)
+    gw, pool = _gateway_with_pool([c, FakeSMTP("h", 1)])
 
-def test_send_retries_then_success(monkeypatch):
+    msg = types.SimpleNamespace(to="dest@test", subject="s", text="t", html="<p>t</p>")
+    gw.send(msg)
+    gw.send(msg)
+    assert len(c.sent) == 2
+    assert pool.size == 1
+
+
+def test_send_reconnects_immediately_when_server_disconnected(monkeypatch):
     _patch_minimal_settings(monkeypatch, SMTP_MAX_RETRIES=3)
-    monkeypatch.setattr(f"{MODULE}.time.sleep", lambda *_: None, raising=True)
+    sched = ManualScheduler()
 
     c1 = FakeSMTP("h", 1)
     c1.hook_sendmail_exc = m.smtplib.SMTPServerDisconnected("boom")
     c2 = FakeSMTP("h", 1)
+    gw, pool = _gateway_with_pool([c1, c2], scheduler=sched)
 
-    seq = SeqClients([c1, c2])
+    msg = types.SimpleNamespace(
+        to="dest@test", subject="s", text="t", html="<p>t</p>"
+    )
+    gw.send(msg)
 
-    def factory(host, port, timeout=None):
-        c = seq()
-        c.host, c.port, c.timeout = host, port, timeout
-        return c
+    assert sched.scheduled == []
+    assert c1.quit_called == 1
+    assert len(c2.sent) == 1
+    assert pool.size == 1
+    assert pool.stats()["reconnects"] == 1
+    assert pool.stats()["probes"] == 0
 
-    _patch_minimal_settings(monkeypatch)
-    monkeypatch.setattr(f"{MODULE}.smtplib.SMTP", factory, raising=True)
-    monkeypatch.setattr(f"{MODULE}._smtp_client", None, raising=True)
+
+def test_send_transient_failure_returns_and_retries_in_scheduler(monkeypatch):
+    _patch_minimal_settings(monkeypatch, SMTP_MAX_RETRIES=3)
+    monkeypatch.setattr(f"{MODULE}.backoff_delay", lambda attempt, base, cap: 0.5 * attempt, raising=True)
+    sched = ManualScheduler()
+
+    c1 = FakeSMTP("h", 1)
+    c1.hook_sendmail_exc = m.smtplib.SMTPDataError(451, b"try later")
+    c2 = FakeSMTP("h", 1)
+    gw, pool = _gateway_with_pool([c1, c2], scheduler=sched)
 
     msg = types.SimpleNamespace(
         to="dest@test", subject="s", text="t", html="<p>t</p>"
     )
-    gw = m.SmtpEmailGateway()
-    gw.send(msg)
+    future = gw.submit(msg)
 
+    assert not future.done()
+    assert [d for d, _ in sched.scheduled] == [0.5]
     assert c1.quit_called == 1
+
+    sched.run_all()
+    assert future.result() is None
     assert len(c2.sent) == 1
 
 
 def test_send_non_transient_exception_raises_runtimeerror(monkeypatch):
     _patch_minimal_settings(monkeypatch, SMTP_MAX_RETRIES=3)
-    monkeypatch.setattr(f"{MODULE}.time.sleep", lambda *_: None, raising=True)
+    sched = ManualScheduler()
 
     c = FakeSMTP("h", 1)
     c.hook_sendmail_exc = ValueError("invalid from")
-
-    monkeypatch.setattr(f"{MODULE}._get_client", lambda: c, raising=True)
+    gw, pool = _gateway_with_pool([c], scheduler=sched)
 
     msg = types.SimpleNamespace(
         to="dest@test", subject="x", text="t", html="<p>t</p>"
     )
-    gw = m.SmtpEmailGateway()
     with pytest.raises(RuntimeError) as exc:
         gw.send(msg)
     assert "Falha ao enviar e-mail: " in str(exc.value)
     assert c.quit_called == 0
+    assert pool.idle == 1
+    assert sched.scheduled == []
 
 
-def test_send_exhausts_retries_and_fails(monkeypatch):
+def test_send_exhausts_retry_budget_and_fails(monkeypatch):
     _patch_minimal_settings(monkeypatch, SMTP_MAX_RETRIES=2)
-    monkeypatch.setattr(f"{MODULE}.time.sleep", lambda *_: None, raising=True)
+    sched = ManualScheduler()
 
     c = FakeSMTP("h", 1)
     c.hook_sendmail_exc = m.smtplib.SMTPServerDisconnected("down")
-
-    monkeypatch.setattr(f"{MODULE}._get_client", lambda: c, raising=True)
-    monkeypatch.setattr(f"{MODULE}._smtp_client", c, raising=True)
+    gw, pool = _gateway_with_pool([c], scheduler=sched)
 
     msg = types.SimpleNamespace(
         to="dest@test", subject="x", text="t", html="<p>t</p>"
     )
-    gw = m.SmtpEmailGateway()
+    future = gw.submit(msg)
+    assert len(sched.scheduled) == 1
+    sched.run_all()
+
     with pytest.raises(RuntimeError) as exc:
-        gw.send(msg)
+        future.result()
     s = str(exc.value)
     assert "Falha ao enviar e-mail:" in s
     assert "down" in s
     assert c.quit_called >= 1
+    assert pool.size == 0
+
+
+def test_send_gives_up_when_backoff_passes_deadline(monkeypatch):
+    _patch_minimal_settings(monkeypatch, SMTP_MAX_RETRIES=5, SMTP_RETRY_DEADLINE=1.0)
+    monkeypatch.setattr(f"{MODULE}.backoff_delay", lambda *a: 2.0, raising=True)
+    sched = ManualScheduler()
+
+    c = FakeSMTP("h", 1)
+    c.hook_sendmail_exc = m.smtplib.SMTPDataError(451, b"busy")
+    gw, _ = _gateway_with_pool([c], scheduler=sched)
+
+    msg = types.SimpleNamespace(to="dest@test", subject="x", text="t", html="<p>t</p>")
+    with pytest.raises(RuntimeError, match="busy"):
+        gw.send(msg)
+    assert sched.scheduled == []
+
+
+def test_async_gateway_bounds_concurrency_and_runs_off_loop(monkeypatch):
+    import asyncio
+    import threading
+
+    _patch_minimal_settings(monkeypatch)
+    active = {"now": 0, "max": 0}
+    threads = set()
+    lock = threading.Lock()
+    release = threading.Event()
+
+    class SlowGateway(FakeGateway):
+        def submit(self, message):
+            fut = m.Future()
+            threads.add(threading.current_thread().name)
+            with lock:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+            release.wait(0.05)
+            with lock:
+                active["now"] -= 1
+            fut.set_result(None)
+            return fut
+
+    gw = m.AsyncSmtpEmailGateway(SlowGateway(), max_concurrency=2)
+    msg = types.SimpleNamespace(to="d@test", subject="s", text="t", html="<p>t</p>")
+
+    async def run():
+        await asyncio.gather(*(gw.send(msg) for _ in range(6)))
+
+    asyncio.run(run())
+    gw.close()
+    assert active["max"] == 2
+    assert all(name.startswith("smtp-send") for name in threads)
+
+
+def test_async_gateway_propagates_errors(monkeypatch):
+    import asyncio
+
+    _patch_minimal_settings(monkeypatch)
+
+    class Failing(FakeGateway):
+        def submit(self, message):
+            fut = m.Future()
+            fut.set_exception(RuntimeError("Falha ao enviar e-mail: x"))
+            return fut
+
+    gw = m.AsyncSmtpEmailGateway(Failing(), max_concurrency=1)
+    msg = types.SimpleNamespace(to="d@test", subject="s", text="t", html="<p>t</p>")
+    with pytest.raises(RuntimeError, match="Falha ao enviar"):
+        asyncio.run(gw.send(msg))
+    gw.close()
+
+
+def test_async_gateway_awaits_scheduled_retry_without_holding_a_thread(monkeypatch):
+    import asyncio
+
+    _patch_minimal_settings(monkeypatch)
+    pending = m.Future()
+
+    class Deferred(FakeGateway):
+        def submit(self, message):
+            return pending
+
+    gw = m.AsyncSmtpEmailGateway(Deferred(), max_concurrency=1)
+    msg = types.SimpleNamespace(to="d@test", subject="s", text="t", html="<p>t</p>")
+
+    async def run():
+        task = asyncio.create_task(gw.send(msg))
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        # o slot já foi liberado: outro envio não fica bloqueado pela retentativa
+        assert not gw._slots.locked()
+        pending.set_result(None)
+        await asyncio.wait_for(task, 1)
+
+    asyncio.run(run())
+    gw.close()
+
+
+def test_send_many_groups_messages_per_session_limit(monkeypatch):
+    _patch_minimal_settings(monkeypatch)
+    c1, c2 = FakeSMTP("h", 1), FakeSMTP("h", 1)
+    gw, pool = _gateway_with_pool([c1, c2], max_messages=2)
+
+    msgs = [types.SimpleNamespace(to=f"d{i}@test", subject="s", text="t", html="<p>t</p>") for i in range(3)]
+    assert gw.send_many(msgs) == [None, None, None]
+    assert [to for _, (to,), _ in c1.sent] == ["d0@test", "d1@test"]
+    assert [to for _, (to,), _ in c2.sent] == ["d2@test"]
+    assert c1.quit_called == 1
+    assert pool.size == 1
+
+
+def test_send_many_reports_permanent_and_schedules_transient_failures(monkeypatch):
+    _patch_minimal_settings(monkeypatch)
+    sched = ManualScheduler()
+
+    class Picky(FakeSMTP):
+        def sendmail(self, from_addr, to_addrs, data):
+            if to_addrs[0] == "busy@test":
+                raise m.smtplib.SMTPDataError(451, b"later")
+            if to_addrs[0] == "bad@test":
+                raise m.smtplib.SMTPSenderRefused(550, b"no", from_addr)
+            return super().sendmail(from_addr, to_addrs, data)
+
+    c = Picky("h", 1)
+    gw, _ = _gateway_with_pool([c], scheduler=sched)
+    msgs = [types.SimpleNamespace(to=to, subject="s", text="t", html="<p>t</p>")
+            for to in ("ok@test", "busy@test", "bad@test")]
+
+    futures = gw.submit_many(msgs)
+    assert futures[0].result() is None
+    assert not futures[1].done()
+    assert len(sched.scheduled) == 1
+    with pytest.raises(RuntimeError, match="Falha ao enviar"):
+        futures[2].result()
+
+
+def test_send_many_uses_pipelining_when_advertised(monkeypatch):
+    _patch_minimal_settings(monkeypatch)
+    calls = []
+
+    class Pipelining(FakeSMTP):
+        def has_extn(self, name):
+            return name == "pipelining"
+
+    def fake_pipelined(client, envelopes, outcomes):
+        calls.append([to for _, to, _ in envelopes])
+        outcomes.extend([None] * len(envelopes))
+
+    monkeypatch.setattr(f"{MODULE}.send_pipelined", fake_pipelined, raising=True)
+    c = Pipelining("h", 1)
+    gw, _ = _gateway_with_pool([c])
+    msgs = [types.SimpleNamespace(to=f"d{i}@test", subject="s", text="t", html="<p>t</p>") for i in range(2)]
+
+    assert gw.send_many(msgs) == [None, None]
+    assert calls == [["d0@test", "d1@test"]]
+    assert c.sent == []
+
+
+def test_send_many_session_drop_retries_unanswered_messages(monkeypatch):
+    _patch_minimal_settings(monkeypatch)
+    sched = ManualScheduler()
+
+    class Pipelining(FakeSMTP):
+        def has_extn(self, name):
+            return True
+
+    def dropping(client, envelopes, outcomes):
+        outcomes.append(None)
+        raise m.smtplib.SMTPServerDisconnected("gone")
+
+    monkeypatch.setattr(f"{MODULE}.send_pipelined", dropping, raising=True)
+    gw, pool = _gateway_with_pool([Pipelining("h", 1)], scheduler=sched)
+    msgs = [types.SimpleNamespace(to=f"d{i}@test", subject="s", text="t", html="<p>t</p>") for i in range(3)]
+
+    futures = gw.submit_many(msgs)
+    assert futures[0].result() is None
+    assert [f.done() for f in futures[1:]] == [False, False]
+    assert len(sched.scheduled) == 2
+    assert pool.size == 0
+
+
+def test_async_send_many_splits_into_concurrent_chunks(monkeypatch):
+    import asyncio
+
+    _patch_minimal_settings(monkeypatch, SMTP_PIPELINE_BATCH=2)
+    chunks = []
+
+    class Recording(FakeGateway):
+        def submit_many(self, messages):
+            chunks.append([msg.to for msg in messages])
+            futures = []
+            for msg in messages:
+                f = m.Future()
+                if msg.to == "bad":
+                    f.set_exception(RuntimeError("Falha ao enviar e-mail: bad"))
+                else:
+                    f.set_result(None)
+                futures.append(f)
+            return futures
+
+    gw = m.AsyncSmtpEmailGateway(Recording(), max_concurrency=2)
+    msgs = [types.SimpleNamespace(to=to, subject="s", text="t", html="h") for to in ("a", "b", "bad", "c", "d")]
+    outcomes = asyncio.run(gw.send_many(msgs))
+    gw.close()
+
+    assert sorted(chunks) == [["a", "b"], ["bad", "c"], ["d"]]
+    assert [o is None for o in outcomes] == [True, True, False, True, True]
+
+
+def test_rate_limiter_throttles_each_send_and_pipelined_batch(monkeypatch):
+    _patch_minimal_settings(monkeypatch)
+    waits = []
+
+    class Recording(m.SmtpRateLimiter):
+        def acquire(self, recipients, conn=None):
+            waits.append((list(recipients), conn is not None))
+            return 0.0
+
+    c = FakeSMTP("h", 1)
+    gw, _ = _gateway_with_pool([c], limiter=Recording(global_rate=10))
+    gw.send(types.SimpleNamespace(to="a@x", subject="s", text="t", html="h"))
+    gw.send_many([types.SimpleNamespace(to=t, subject="s", text="t", html="h") for t in ("b@x", "c@y")])
+
+    assert waits == [(["a@x"], True), (["b@x"], True), (["c@y"], True)]
+    assert len(c.sent) == 3
+
+
+def test_disabled_rate_limiter_is_skipped(monkeypatch):
+    _patch_minimal_settings(monkeypatch)
+
+    class Exploding(m.SmtpRateLimiter):
+        def acquire(self, recipients, conn=None):
+            raise AssertionError("não deveria ser chamado")
+
+    gw, _ = _gateway_with_pool([FakeSMTP("h", 1)], limiter=Exploding())
+    gw.send(types.SimpleNamespace(to="a@x", subject="s", text="t", html="h"))
+
+
+def test_circuit_breaker_fails_fast_while_relay_is_down(monkeypatch):
+    from app.adapters.driven.circuit_breaker import CircuitBreaker
+    from app.domain.ports import CircuitOpenError
+
+    _patch_minimal_settings(monkeypatch, SMTP_MAX_RETRIES=1)
+    now = [0.0]
+    breaker = CircuitBreaker("SMTP", window=2, min_calls=2, cooldown=10, clock=lambda: now[0])
+    client = FakeSMTP("h", 1)
+    calls = []
+
+    def connect():
+        calls.append(1)
+        if len(calls) <= 2:
+            raise ConnectionRefusedError("refused")
+        return client
+
+    pool = m.SmtpConnectionPool(connect, max_size=1)
+    gw = m.SmtpEmailGateway(pool=pool, scheduler=ManualScheduler(), limiter=m.SmtpRateLimiter(), breaker=breaker)
+    msg = types.SimpleNamespace(to="a@x", subject="s", text="t", html="h")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="refused"):
+            gw.send(msg)
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError) as exc:
+        gw.send(msg)
+    assert exc.value.retry_after == 10
+    assert all(isinstance(o, CircuitOpenError) for o in gw.send_many([msg, msg]))
+    assert len(calls) == 2
+
+    now[0] = 10
+    gw.send(msg)
+    assert breaker.state == "closed"
+    assert len(client.sent) == 1
+
+
+def test_circuit_breaker_ignores_refused_messages(monkeypatch):
+    from app.adapters.driven.circuit_breaker import CircuitBreaker
+
+    _patch_minimal_settings(monkeypatch)
+    breaker = CircuitBreaker("SMTP", window=2, min_calls=2)
+    c = FakeSMTP("h", 1)
+    c.hook_sendmail_exc = ValueError("invalid from")
+    gw, _ = _gateway_with_pool([c], breaker=breaker)
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            gw.send(types.SimpleNamespace(to="a@x", subject="s", text="t", html="h"))
+    assert breaker.stats()["state"] == "closed"
+    assert breaker.stats()["failure_rate"] == 0.0
+
+
+# --------- Vários relays ---------
+def _relay(name, clients, weight=1, breaker=None):
+    return m.Relay(name, m.SmtpConnectionPool(SeqClients(clients), max_size=2), m.SmtpRateLimiter(), breaker, weight)
+
+
+def _gateway_with_relays(relays, scheduler=None, strategy="least_outstanding"):
+    router = m.RelayRouter(relays, strategy, is_outage=m._smtp_outage)
+    return m.SmtpEmailGateway(scheduler=scheduler or ManualScheduler(), router=router), router
+
+
+def test_transient_failure_fails_over_to_other_relay_without_backoff(monkeypatch):
+    _patch_minimal_settings(monkeypatch, SMTP_MAX_RETRIES=3)
+    sched = ManualScheduler()
+    bad, good = FakeSMTP("a", 1), FakeSMTP("b", 1)
+    bad.hook_sendmail_exc = m.smtplib.SMTPDataError(451, b"later")
+    a, b = _relay("a", [bad]), _relay("b", [good])
+    gw, router = _gateway_with_relays([a, b], scheduler=sched)
+
+    future = gw.submit(types.SimpleNamespace(to="d@test", subject="s", text="t", html="h"))
+    assert [d for d, _ in sched.scheduled] == [0.0]
+    sched.run_all()
+
+    assert future.result() is None
+    assert len(good.sent) == 1 and bad.sent == []
+    stats = {s["name"]: s for s in router.stats()}
+    assert (stats["a"]["errors"], stats["a"]["failovers"], stats["b"]["picked"]) == (1, 1, 1)
+    assert all(s["outstanding"] == 0 for s in stats.values())
+
+
+def test_failover_backs_off_once_every_relay_failed(monkeypatch):
+    _patch_minimal_settings(monkeypatch, SMTP_MAX_RETRIES=4)
+    monkeypatch.setattr(f"{MODULE}.backoff_delay", lambda attempt, base, cap: 0.5 * attempt, raising=True)
+    sched = ManualScheduler()
+    clients = [FakeSMTP("a", 1), FakeSMTP("b", 1)]
+    for c in clients:
+        c.hook_sendmail_exc = m.smtplib.SMTPDataError(451, b"later")
+    gw, _ = _gateway_with_relays([_relay("a", [clients[0]]), _relay("b", [clients[1]])], scheduler=sched)
+
+    gw.submit(types.SimpleNamespace(to="d@test", subject="s", text="t", html="h"))
+    _, fn = sched.scheduled.pop(0)
+    fn()
+    assert [d for d, _ in sched.scheduled] == [1.0]
+
+
+def test_session_drop_fails_over_unanswered_messages(monkeypatch):
+    _patch_minimal_settings(monkeypatch)
+    sched = ManualScheduler()
+    bad, good = FakeSMTP("a", 1), FakeSMTP("b", 1)
+    bad.hook_sendmail_exc = m.smtplib.SMTPServerDisconnected("bye")
+    gw, _ = _gateway_with_relays([_relay("a", [bad]), _relay("b", [good])], scheduler=sched)
+
+    msgs = [types.SimpleNamespace(to=f"d{i}@test", subject="s", text="t", html="h") for i in range(3)]
+    futures = gw.submit_many(msgs)
+    sched.run_all()
+
+    assert [f.result() for f in futures] == [None, None, None]
+    assert sorted(to for _, (to,), _ in good.sent) == ["d0@test", "d1@test", "d2@test"]
+
+
+def test_all_relays_ejected_fails_fast_with_circuit_open(monkeypatch):
+    _patch_minimal_settings(monkeypatch)
+    breakers = [m.CircuitBreaker(n, window=1, min_calls=1, cooldown=30) for n in "ab"]
+    for br in breakers:
+        br.allow()
+        br.record(False)
+    gw, _ = _gateway_with_relays([_relay("a", [FakeSMTP("a", 1)], breaker=breakers[0]),
+                                  _relay("b", [FakeSMTP("b", 1)], breaker=breakers[1])])
+
+    future = gw.submit(types.SimpleNamespace(to="d@test", subject="s", text="t", html="h"))
+    with pytest.raises(m.CircuitOpenError):
+        future.result()
+
+
+def test_router_built_from_smtp_relays_setting(monkeypatch):
+    relays = (
+        '[{"name": "a", "host": "smtp.a", "port": 25, "user": "ua", "password": "pa", "use_starttls": false,'
+        ' "max_connections": 3}, {"name": "b", "host": "smtp.b", "weight": 2, "rate": 5}]'
+    )
+    _patch_minimal_settings(monkeypatch, SMTP_RELAYS=relays, SMTP_ROUTING="weighted", SMTP_BREAKER_ENABLED=True,
+                            SMTP_BREAKER_FAILURE_RATE=0.5, SMTP_BREAKER_WINDOW=10, SMTP_BREAKER_MIN_CALLS=5,
+                            SMTP_BREAKER_COOLDOWN=30.0)
+    _patch_smtplib(monkeypatch)
+    monkeypatch.setattr(f"{MODULE}._router", None, raising=True)
+
+    gw = m.SmtpEmailGateway()
+    router = gw.router
+    assert router is m._get_router()
+    assert [(r.name, r.weight, r.pool.max_size) for r in router.relays] == [("a", 1, 3), ("b", 2, 4)]
+    assert router.relays[1].limiter.enabled and not router.relays[0].limiter.enabled
+    assert router.relays[0].breaker.name == "SMTP a"
+    assert gw.breaker is None  # nenhum breaker global que o roteador não usa
+    assert m.AsyncSmtpEmailGateway(gw)._slots._value == 7
+
+    conn = router.relays[0].pool.acquire()
+    assert (conn.client.host, conn.client.port, conn.client.logged) == ("smtp.a", 25, ("ua", "pa"))
+
+
+def test_close_shuts_pools_and_scheduler_and_rebuilds_singletons(monkeypatch):
+    _patch_minimal_settings(monkeypatch)
+    _patch_smtplib(monkeypatch)
+    monkeypatch.setattr(f"{MODULE}._pool", None, raising=True)
+    monkeypatch.setattr(f"{MODULE}._scheduler", None, raising=True)
+    gw = m.SmtpEmailGateway()
+    pool, scheduler = gw.router.relays[0].pool, gw.scheduler
+    pool.release(pool.acquire())
+
+    async_gw = m.AsyncSmtpEmailGateway(gw, max_concurrency=1)
+    executor = async_gw._executor
+    async_gw.close()
+    assert pool.size == 0
+    with pytest.raises(RuntimeError):
+        scheduler.schedule(0, lambda: None)
+    with pytest.raises(RuntimeError):
+        executor.submit(lambda: None)
+    assert m._get_pool() is not pool and m._get_scheduler() is not scheduler
+    assert async_gw._executor.submit(lambda: "ok").result() == "ok"  # um novo startup volta a enviar
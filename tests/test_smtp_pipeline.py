@@ -0,0 +1,87 @@
+import smtplib
+
+from app.adapters.driven.smtp_pipeline import dot_stuff, send_pipelined, supports_pipelining
+
+
+class ScriptedClient:
+    """Cliente SMTP falso: grava o que foi escrito e devolve respostas roteirizadas."""
+    def __init__(self, replies, extensions=("pipelining",)):
+        self.replies = list(replies)
+        self.writes = []
+        self.rsets = 0
+        self.extensions = extensions
+        self.ehlo_checked = False
+
+    def ehlo_or_helo_if_needed(self):
+        self.ehlo_checked = True
+
+    def has_extn(self, name):
+        return name in self.extensions
+
+    def send(self, data):
+        self.writes.append(data)
+
+    def getreply(self):
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def rset(self):
+        self.rsets += 1
+        return (250, b"ok")
+
+
+OK, GO = (250, b"ok"), (354, b"go ahead")
+
+
+def test_dot_stuff_normalizes_eols_and_escapes_leading_dots():
+    assert dot_stuff("a\n.b\r\nc") == b"a\r\n..b\r\nc\r\n.\r\n"
+    assert dot_stuff(b"x\r\n") == b"x\r\n.\r\n"
+
+
+def test_supports_pipelining_checks_ehlo_first():
+    client = ScriptedClient([], extensions=())
+    assert supports_pipelining(client) is False
+    assert client.ehlo_checked
+
+
+def test_send_pipelined_batches_final_dot_with_next_envelope():
+    client = ScriptedClient([OK, OK, GO, OK, OK, OK, GO, OK])
+    outcomes = []
+    send_pipelined(client, [("f@x", "a@x", "one"), ("f@x", "b@x", "two")], outcomes)
+
+    assert outcomes == [None, None]
+    assert client.writes == [
+        "MAIL FROM:<f@x>\r\nRCPT TO:<a@x>\r\nDATA\r\n",
+        b"one\r\n.\r\n",
+        "MAIL FROM:<f@x>\r\nRCPT TO:<b@x>\r\nDATA\r\n",
+        b"two\r\n.\r\n",
+    ]
+    assert client.replies == []
+
+
+def test_send_pipelined_reports_per_message_errors_and_resets():
+    client = ScriptedClient([
+        OK, (550, b"no such user"), (554, b"no valid recipients"),
+        (550, b"bad sender"), (503, b"need rcpt"), (503, b"need mail"),
+        OK, OK, GO, (452, b"mailbox full"),
+    ])
+    outcomes = []
+    send_pipelined(client, [("f@x", "a@x", "1"), ("bad@x", "b@x", "2"), ("f@x", "c@x", "3")], outcomes)
+
+    assert isinstance(outcomes[0], smtplib.SMTPRecipientsRefused)
+    assert isinstance(outcomes[1], smtplib.SMTPSenderRefused)
+    assert isinstance(outcomes[2], smtplib.SMTPDataError)
+    assert outcomes[2].smtp_code == 452
+    assert client.rsets == 2
+
+
+def test_send_pipelined_connection_error_keeps_partial_outcomes():
+    client = ScriptedClient([OK, OK, GO, smtplib.SMTPServerDisconnected("gone")])
+    outcomes = []
+    try:
+        send_pipelined(client, [("f@x", "a@x", "1"), ("f@x", "b@x", "2")], outcomes)
+    except smtplib.SMTPServerDisconnected:
+        pass
+    assert outcomes == []
@@ -0,0 +1,206 @@
+import threading
+import pytest
+
+from app.adapters.driven.smtp_pool import SmtpConnectionPool, PoolTimeout
+
+
+class FakeClient:
+    def __init__(self, n):
+        self.n = n
+        self.sock = object()
+        self.quit_called = 0
+        self.noop_called = 0
+        self.noop_exc = None
+
+    def noop(self):
+        self.noop_called += 1
+        if self.noop_exc:
+            raise self.noop_exc
+        return (250, b"ok")
+
+    def quit(self):
+        self.quit_called += 1
+        self.sock = None
+
+
+def _factory():
+    made = []
+
+    def connect():
+        c = FakeClient(len(made))
+        made.append(c)
+        return c
+
+    return connect, made
+
+
+def test_acquire_reuses_released_connection():
+    connect, made = _factory()
+    pool = SmtpConnectionPool(connect, max_size=2)
+
+    c1 = pool.acquire()
+    pool.release(c1)
+    c2 = pool.acquire()
+    assert c2 is c1
+    assert len(made) == 1
+
+
+def test_acquire_opens_up_to_max_size_then_times_out():
+    connect, made = _factory()
+    pool = SmtpConnectionPool(connect, max_size=2, acquire_timeout=0.01)
+
+    a = pool.acquire()
+    b = pool.acquire()
+    assert a.client is not b.client
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    stats = pool.stats()
+    assert (stats["size"], stats["idle"], stats["in_use"]) == (2, 0, 2)
+    assert stats["connects"] == 2
+
+
+def test_acquire_waits_for_release_from_other_thread():
+    connect, made = _factory()
+    pool = SmtpConnectionPool(connect, max_size=1, acquire_timeout=2)
+    held = pool.acquire()
+
+    t = threading.Timer(0.05, pool.release, args=(held,))
+    t.start()
+    got = pool.acquire()
+    t.join()
+    assert got is held
+    assert len(made) == 1
+
+
+def test_connection_recycled_after_max_messages():
+    connect, made = _factory()
+    pool = SmtpConnectionPool(connect, max_size=1, max_messages=2)
+
+    conn = pool.acquire()
+    conn.messages = 2
+    pool.release(conn)
+    assert made[0].quit_called == 1
+    assert pool.size == 0
+
+    again = pool.acquire()
+    assert again.client is made[1]
+
+
+def test_closed_socket_is_discarded_on_checkout():
+    connect, made = _factory()
+    pool = SmtpConnectionPool(connect, max_size=1)
+
+    conn = pool.acquire()
+    pool.release(conn)
+    made[0].sock = None
+
+    fresh = pool.acquire()
+    assert fresh.client is made[1]
+    assert pool.size == 1
+
+
+def test_idle_eviction_keeps_min_size(clock):
+    connect, made = _factory()
+    pool = SmtpConnectionPool(connect, min_size=1, max_size=3, idle_timeout=10, clock=clock)
+
+    conns = [pool.acquire() for _ in range(3)]
+    for c in conns:
+        pool.release(c)
+    clock.now = 30
+
+    conn = pool.acquire()
+    assert pool.size == 1
+    assert sum(c.quit_called for c in made) == 2
+    assert conn.client.quit_called == 0
+
+
+def test_connect_failure_frees_slot():
+    calls = {"n": 0}
+
+    def connect():
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise OSError("refused")
+        return FakeClient(calls["n"])
+
+    pool = SmtpConnectionPool(connect, max_size=1, acquire_timeout=0.01)
+    with pytest.raises(OSError):
+        pool.acquire()
+    assert pool.size == 0
+    assert pool.acquire().client.n == 2
+
+
+def test_discard_and_close():
+    connect, made = _factory()
+    pool = SmtpConnectionPool(connect, max_size=2)
+
+    a = pool.acquire()
+    b = pool.acquire()
+    pool.release(a, discard=True)
+    pool.release(b)
+    assert made[0].quit_called == 1
+    pool.close()
+    assert made[1].quit_called == 1
+    assert pool.size == 0
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+
+def test_probe_only_after_idle_threshold(clock):
+    connect, made = _factory()
+    pool = SmtpConnectionPool(connect, max_size=1, probe_idle_after=5, idle_timeout=60, clock=clock)
+
+    conn = pool.acquire()
+    pool.release(conn)
+    clock.now = 4
+    conn = pool.acquire()
+    assert made[0].noop_called == 0
+    pool.release(conn)
+
+    clock.now = 10
+    conn = pool.acquire()
+    assert made[0].noop_called == 1
+    assert conn.client is made[0]
+    assert pool.stats()["probes"] == 1
+
+
+def test_failed_probe_discards_and_reconnects(clock):
+    connect, made = _factory()
+    pool = SmtpConnectionPool(connect, max_size=1, probe_idle_after=5, idle_timeout=60, clock=clock)
+
+    pool.release(pool.acquire())
+    made[0].noop_exc = OSError("reset")
+    clock.now = 10
+
+    conn = pool.acquire()
+    assert conn.client is made[1]
+    assert made[0].quit_called == 1
+    stats = pool.stats()
+    assert stats["probe_failures"] == 1
+    assert stats["size"] == 1
+
+
+def test_replace_keeps_slot_and_counts_reconnect():
+    connect, made = _factory()
+    pool = SmtpConnectionPool(connect, max_size=1)
+
+    conn = pool.acquire()
+    fresh = pool.replace(conn)
+    assert fresh.client is made[1]
+    assert made[0].quit_called == 1
+    assert pool.size == 1
+    assert pool.stats()["reconnects"] == 1
+
+
+def test_invalid_max_size():
+    with pytest.raises(ValueError):
+        SmtpConnectionPool(lambda: None, max_size=0)
+
+
+def test_remaining_counts_down_to_recycle():
+    connect, _ = _factory()
+    pool = SmtpConnectionPool(connect, max_size=1, max_messages=3)
+    conn = pool.acquire()
+    assert pool.remaining(conn) == 3
+    conn.messages = 3
+    assert pool.remaining(conn) == 0
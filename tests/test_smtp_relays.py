@@ -0,0 +1,152 @@
+import types
+import pytest
+
+from app.domain.ports import CircuitOpenError
+from app.adapters.driven.circuit_breaker import CircuitBreaker
+from app.adapters.driven.rate_limit import SmtpRateLimiter
+from app.adapters.driven.smtp_pool import PoolTimeout, SmtpConnectionPool
+from app.adapters.driven.smtp_relays import Relay, RelayRouter, parse_relays
+
+
+def _relay(name, weight=1, breaker=None, max_size=2):
+    return Relay(name, SmtpConnectionPool(lambda: None, max_size=max_size), SmtpRateLimiter(), breaker, weight)
+
+
+def _breaker(clock):
+    return CircuitBreaker("r", failure_rate=0.5, window=2, min_calls=2, cooldown=10, clock=clock)
+
+
+def test_parse_relays_defaults_and_validation():
+    relays = parse_relays('[{"name": "a", "host": "smtp.a", "weight": 3}, {"name": "b", "host": "smtp.b", "port": 465}]')
+    assert [(r.name, r.host, r.port, r.weight, r.max_connections) for r in relays] == [
+        ("a", "smtp.a", 587, 3, 4), ("b", "smtp.b", 465, 1, 4),
+    ]
+    assert parse_relays("  ") == []
+    for bad in ("{", '[{"host": "x"}]', '[{"name": "a", "host": "x", "foo": 1}]',
+                '[{"name": "a", "host": "x"}, {"name": "a", "host": "y"}]', '[{"name": "a", "host": "x", "weight": 0}]'):
+        with pytest.raises(ValueError, match="SMTP_RELAYS"):
+            parse_relays(bad)
+
+
+def test_router_rejects_empty_and_unknown_strategy():
+    with pytest.raises(ValueError):
+        RelayRouter([])
+    with pytest.raises(ValueError):
+        RelayRouter([_relay("a")], strategy="random")
+
+
+def test_least_outstanding_prefers_idle_relay_and_rotates_by_weight():
+    a, b = _relay("a", weight=2), _relay("b")
+    router = RelayRouter([a, b])
+
+    assert router.pick() is a
+    assert router.pick() is b  # a tem 1 em andamento
+    router.done(a)
+    router.done(b)
+    picks = [router.pick() for _ in range(6)]
+    for relay in picks:
+        router.done(relay)
+    assert picks.count(a) == 4 and picks.count(b) == 2
+    assert router.capacity == 4
+
+
+def test_weighted_round_robin_is_smooth_and_proportional():
+    a, b, c = _relay("a", weight=5), _relay("b"), _relay("c")
+    router = RelayRouter([a, b, c], strategy="weighted")
+
+    names = []
+    for _ in range(7):
+        relay = router.pick()
+        names.append(relay.name)
+        router.done(relay)
+    assert names == ["a", "a", "b", "a", "c", "a", "a"]
+
+
+def test_open_circuit_ejects_relay_until_cooldown(clock):
+    a, b = _relay("a", breaker=_breaker(clock)), _relay("b", breaker=_breaker(clock))
+    router = RelayRouter([a, b])
+
+    for _ in range(2):
+        relay = router.pick(exclude=[b])
+        router.done(relay, OSError("down"))
+    assert a.ejected and not router.available(exclude=[b])
+    assert {router.pick().name for _ in range(3)} == {"b"}
+
+    clock.now = 10
+    assert router.available(exclude=[b])
+
+
+def test_pick_raises_when_every_circuit_is_open(clock):
+    a = _relay("a", breaker=_breaker(clock))
+    router = RelayRouter([a], is_outage=lambda exc: True)
+    for _ in range(2):
+        router.done(router.pick(), OSError("down"))
+    clock.now = 4
+
+    with pytest.raises(CircuitOpenError) as exc:
+        router.pick()
+    assert exc.value.retry_after == pytest.approx(6)
+
+
+def test_exclude_falls_back_to_all_relays():
+    a = _relay("a")
+    router = RelayRouter([a])
+    assert router.pick(exclude=[a]) is a
+
+
+def test_done_counts_errors_and_releases_breaker_on_pool_timeout(clock):
+    a = _relay("a", breaker=_breaker(clock))
+    router = RelayRouter([a], is_outage=lambda exc: isinstance(exc, OSError))
+
+    router.done(router.pick(), PoolTimeout("esgotado"))
+    router.done(router.pick(), ValueError("recusado"))
+    router.failover(a)
+
+    stats = router.stats()[0]
+    assert (stats["outstanding"], stats["picked"], stats["errors"], stats["failovers"]) == (0, 2, 2, 1)
+    assert stats["circuit"] == "closed"
+    assert a.breaker.stats()["calls"] == 1  # o PoolTimeout não entrou na janela
+    assert stats["pool"]["size"] == 0
+
+
+def test_stats_include_rate_limit_waits_per_relay(clock):
+    limiter = SmtpRateLimiter(global_rate=2, global_burst=1, clock=clock, sleep=lambda s: None)
+    a = Relay("a", SmtpConnectionPool(lambda: None, max_size=1), limiter)
+    router = RelayRouter([a, _relay("b")])
+    limiter.acquire(["x@a.com"])
+    limiter.acquire(["x@a.com"])
+
+    stats = {s["name"]: s["rate_limit"] for s in router.stats()}
+    assert stats["a"]["global"] == {"waits": 1, "wait_seconds": 0.5, "max_wait": 0.5}
+    assert stats["b"]["global"]["waits"] == 0
+
+
+def _down_and_up(monkeypatch):
+    from tests.test_smtp_email_gateway import FakeSMTP, ManualScheduler, _patch_minimal_settings, m
+
+    _patch_minimal_settings(monkeypatch, SMTP_MAX_RETRIES=3)
+
+    def refuse():
+        raise ConnectionRefusedError(111, "refused")
+
+    good = FakeSMTP("b", 1)
+    down = Relay("a", SmtpConnectionPool(refuse, max_size=1), SmtpRateLimiter())
+    up = Relay("b", SmtpConnectionPool(lambda: good, max_size=1), SmtpRateLimiter())
+    router = RelayRouter([down, up], is_outage=m._smtp_outage)
+    sched = ManualScheduler()
+    return m.SmtpEmailGateway(scheduler=sched, router=router), router, sched, good
+
+
+@pytest.mark.parametrize("batch", [False, True])
+def test_gateway_fails_over_when_relay_refuses_connections(monkeypatch, batch):
+    gw, router, sched, good = _down_and_up(monkeypatch)
+    msg = types.SimpleNamespace(to="d@test", subject="s", text="t", html="h")
+
+    futures = gw.submit_many([msg, msg]) if batch else [gw.submit(msg)]
+    assert [d for d, _ in sched.scheduled] == [0.0] * len(futures)  # failover sem backoff
+    sched.run_all()
+
+    assert [f.result() for f in futures] == [None] * len(futures)
+    assert len(good.sent) == len(futures)
+    stats = {s["name"]: s for s in router.stats()}
+    assert (stats["a"]["errors"], stats["a"]["failovers"]) == (1, len(futures))